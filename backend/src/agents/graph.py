@@ -4,25 +4,58 @@ graph.py
 Constructs the LangGraph Workflow.
 """
 
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
 from src.agents.state import AgentState
-from src.agents.nodes import retrieve_node, diagnose_node, validate_node
+from src.core.lazy import Lazy
+from src.core.timing import timed_node
+from src.agents.nodes import (
+    retrieve_node, aretrieve_node,
+    triage_node, atriage_node,
+    diagnose_node, adiagnose_node,
+    validate_node, avalidate_node,
+    repair_node, arepair_node,
+)
 
 # 1. Initialize Graph
 workflow = StateGraph(AgentState)
 
 # 2. Add Nodes
-workflow.add_node("retrieve", retrieve_node)
-workflow.add_node("diagnose", diagnose_node)
-workflow.add_node("validate", validate_node)
+# Each node pairs a sync and an async implementation:
+# invoke() uses the sync one, ainvoke()/astream() use the non-blocking one.
+# Both are timed into node_timings (per-node latency for /stats and benchmarks).
+def add_timed_node(name, func, afunc):
+    workflow.add_node(name, RunnableLambda(timed_node(name, func), afunc=timed_node(name, afunc)))
+
+add_timed_node("retrieve", retrieve_node, aretrieve_node)
+add_timed_node("triage", triage_node, atriage_node)
+add_timed_node("diagnose", diagnose_node, adiagnose_node)
+add_timed_node("validate", validate_node, avalidate_node)
+add_timed_node("repair", repair_node, arepair_node)
 
 # 3. Define Entry Point
 workflow.set_entry_point("retrieve")
 
 # 4. Define Edges (Standard Flow)
-workflow.add_edge("retrieve", "diagnose")
+workflow.add_edge("retrieve", "triage")
 workflow.add_edge("diagnose", "validate")
 
+# Known faults go straight to the guardrail; everything else goes to the LLM
+def route_after_triage(state: AgentState):
+    """
+    Skips the LLM when a triage rule already produced the report.
+    """
+    return "validate" if state.get("triage_rule") else "diagnose"
+
+workflow.add_conditional_edges(
+    "triage",
+    route_after_triage,
+    {
+        "validate": "validate",
+        "diagnose": "diagnose"
+    }
+)
+
 # 5. Define Conditional Logic (The Loop)
 def should_retry(state: AgentState):
     """
@@ -36,9 +69,25 @@ def should_retry(state: AgentState):
         return "diagnose"
     return END
 
-# Add the conditional edge
+# Rejected drafts are repaired locally first; only unrepairable ones loop back
+def route_after_validate(state: AgentState):
+    """
+    Sends a rejected draft to the repair node, or finishes.
+    """
+    return "repair" if state.get("validation_error") else END
+
 workflow.add_conditional_edges(
     "validate",
+    route_after_validate,
+    {
+        "repair": "repair",
+        END: END
+    }
+)
+
+# Add the conditional edge
+workflow.add_conditional_edges(
+    "repair",
     should_retry,
     {
         "diagnose": "diagnose", # Map return value to node name
@@ -46,5 +95,5 @@ workflow.add_conditional_edges(
     }
 )
 
-# 6. Compile
-app_graph = workflow.compile()
\ No newline at end of file
+# 6. Compile (on first use, normally during warmup)
+app_graph = Lazy(workflow.compile)
\ No newline at end of file
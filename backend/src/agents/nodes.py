@@ -5,10 +5,23 @@ The functional units of the LangGraph.
 Each function takes the current AgentState, performs work, and returns an update.
 """
 
+import asyncio
+import logging
+
 from src.agents.state import AgentState
+from src.agents.prompts import build_diagnosis_messages
+from src.agents.streaming import summary_token_sink
 from src.services.vector_service import vector_service
-from src.services.llm_service import llm_service
+from src.services.llm_service import DraftParseError, llm_service
+from src.services.triage_engine import triage_engine
+from src.services.report_repair import needs_safety_warning, repair_report, repair_stats
 from src.core.schema import DiagnosticResult
+from src.core.config import get_settings
+from src.core.observability import DIAGNOSIS_RETRIES, GUARDRAIL_TRIGGERS, REPAIRS, TRIAGE_MATCHES
+from src.core.tokens import TokenUsage
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------
 # NODE 1: Context Retrieval
@@ -17,115 +30,146 @@ def retrieve_node(state: AgentState) -> AgentState:
     """
     Looks at the telemetry error codes and fetches relevant manuals.
     """
-    print("--- Node: Retrieving Context ---")
-    telemetry = state["telemetry"]
-    
-    # Construct a query from error codes + ID
-    # In a real system, we might expand this query
-    search_queries = telemetry.error_codes if telemetry.error_codes else ["general maintenance"]
-    
-    all_docs = []
-    for query in search_queries:
-        docs = vector_service.search_similar(query, limit=2)
-        all_docs.extend(docs)
+    logger.debug("Node: retrieve")
+    search_queries = _search_queries(state)
     
-    # Deduplicate by chunk_id
-    unique_docs = {doc.chunk_id: doc for doc in all_docs}.values()
+    # Exactly-tagged chunks come from the payload index (no embedding);
+    # remaining codes share one embedding call + one Qdrant batch search.
+    # Results come back deduplicated and ranked by score.
+    docs = vector_service.retrieve(
+        search_queries,
+        limit_per_query=settings.RETRIEVAL_LIMIT_PER_QUERY,
+        limit=settings.RETRIEVAL_LIMIT
+    )
     
-    return {"retrieved_docs": list(unique_docs)}
+    return {"retrieved_docs": docs}
+
+async def aretrieve_node(state: AgentState) -> AgentState:
+    """
+    Async variant of retrieve_node (non-blocking embeddings + AsyncQdrantClient).
+    """
+    logger.debug("Node: retrieve")
+    docs = await vector_service.aretrieve(
+        _search_queries(state),
+        limit_per_query=settings.RETRIEVAL_LIMIT_PER_QUERY,
+        limit=settings.RETRIEVAL_LIMIT
+    )
+    return {"retrieved_docs": docs}
+
+def _search_queries(state: AgentState) -> list:
+    """
+    Construct the queries from the error codes.
+    In a real system, we might expand this query.
+    """
+    telemetry = state["telemetry"]
+    return telemetry.error_codes if telemetry.error_codes else ["general maintenance"]
 
 # ---------------------------------------------------------
-# NODE 2: AI Diagnosis
+# NODE 2: Rule-Based Pre-Triage
+# ---------------------------------------------------------
+def triage_node(state: AgentState) -> AgentState:
+    """
+    Matches the reading against the deterministic rule set.
+    A confident match produces the report directly (cited from the retrieved docs);
+    otherwise the graph continues to the LLM.
+    """
+    logger.debug("Node: triage")
+    if not settings.TRIAGE_ENABLED:
+        return {"triage_rule": None}
+
+    outcome = triage_engine.triage(state["telemetry"], state.get("retrieved_docs") or [])
+    if outcome is None:
+        return {"triage_rule": None}
+
+    rule_id, report = outcome
+    logger.info("Triage rule matched: %s", rule_id)
+    TRIAGE_MATCHES.labels(rule=rule_id).inc()
+    return {"triage_rule": rule_id, "diagnostic_report": report}
+
+async def atriage_node(state: AgentState) -> AgentState:
+    """
+    Async entry point for triage_node (pure CPU, runs inline).
+    """
+    return triage_node(state)
+
+# ---------------------------------------------------------
+# NODE 3: AI Diagnosis
 # ---------------------------------------------------------
 def diagnose_node(state: AgentState) -> AgentState:
     """
     Synthesizes Telemetry + Manuals into a Report.
     """
-    print("--- Node: Generating Diagnosis ---")
-    
-    analyzer = llm_service.get_analyzer()
-    
-    # Construct the Prompt Context
-    telemetry_context = state["telemetry"].model_dump_json(indent=2)
-    
-    # Handle retrieved docs (ensure they are strings, not objects)
-    manual_context = "\n\n".join(
-        [f"Source: {d.source_doc} (Pg {d.page_number}): {d.content}" 
-         for d in state["retrieved_docs"]]
-    )
-    
-    # Inject previous errors if we are retrying
-    retry_context = ""
-    if state.get("validation_error"):
-        retry_context = f"""
-        CRITICAL INSTRUCTION: Your previous attempt failed validation.
-        ERROR: {state['validation_error']}
-        
-        Reflect on this error. Ensure you provide ALL required fields:
-        - severity_score (int)
-        - recommended_actions (list of objects)
-        - safety_warnings (list of strings)
-        """
-
-    prompt = f"""
-    You are an expert KONE Industrial IoT Engineer. 
-    Analyze the following Elevator Telemetry and Technical Manuals to produce a diagnostic report.
-    
-    TELEMETRY DATA:
-    {telemetry_context}
-    
-    TECHNICAL MANUALS (Reference these explicitly):
-    {manual_context}
-    
-    {retry_context}
-    
-    REQUIREMENTS:
-    1. Identify the root cause based on sensor values and error codes.
-    2. Cite specific manuals in your findings.
-    3. Assign a severity score (1-10).
-    4. Provide a step-by-step action plan for the technician.
-    
-    IMPORTANT SCHEMA NOTE:
-    You MUST populate the 'recommended_actions' list.
-    Each action object MUST strictly follow this structure:
-    - 'step_order': integer (1, 2, 3...)
-    - 'instruction': string (Clear action verb)
-    - 'tool_required': string (Optional, e.g., "Multimeter", "Wrench")
-
-    Do NOT invent fields like 'action_type' or 'estimated_time'. 
-    Stick strictly to the schema provided.
-    
-    Example JSON Structure (Fill this):
-    {{
-      "fault_summary": "...",
-      "root_cause_hypothesis": "...",
-      "severity_score": 8,
-      "cited_manual_references": ["ManualID..."],
-      "recommended_actions": [
-        {{ "step_order": 1, "instruction": "Lock out power", "tool_required": "Lockout Kit" }}
-      ],
-      "safety_warnings": ["Risk of electric shock"]
-    }}
-    """
+    logger.debug("Node: diagnose")
+    _count_retry(state)
+    messages = build_diagnosis_messages(state)
+    usage = TokenUsage()
     
     # Invoke LLM
     try:
-        response: DiagnosticResult = analyzer.invoke(prompt)
-        return {"diagnostic_report": response}
+        response: DiagnosticResult = llm_service.diagnose(messages, usage=usage)
+        return {"diagnostic_report": response, "token_usage": _add_usage(state, usage)}
+    except DraftParseError as e:
+        return _unparsed_draft(state, e, usage)
     except Exception as e:
         # Fallback for LLM parsing errors
-        print(f"LLM Generation Error: {e}")
-        return {"validation_error": str(e)}
+        logger.warning("LLM generation error: %s", e)
+        return {"validation_error": str(e), "token_usage": _add_usage(state, usage)}
+
+async def adiagnose_node(state: AgentState) -> AgentState:
+    """
+    Async variant of diagnose_node (awaits the structured LLM instead of blocking).
+    When a streaming client is attached, fault_summary tokens are forwarded as they arrive.
+    """
+    logger.debug("Node: diagnose")
+    _count_retry(state)
+    messages = build_diagnosis_messages(state)
+    sink = summary_token_sink.get()
+    usage = TokenUsage()
+    
+    try:
+        if sink is not None:
+            response: DiagnosticResult = await llm_service.astream_diagnose(messages, sink, usage=usage)
+        else:
+            response = await llm_service.adiagnose(messages, usage=usage)
+        return {"diagnostic_report": response, "token_usage": _add_usage(state, usage)}
+    except DraftParseError as e:
+        return _unparsed_draft(state, e, usage)
+    except Exception as e:
+        logger.warning("LLM generation error: %s", e)
+        return {"validation_error": str(e), "token_usage": _add_usage(state, usage)}
+
+def _unparsed_draft(state: AgentState, error: DraftParseError, usage: TokenUsage) -> dict:
+    """
+    A report that failed to parse goes on as the raw dict: the guardrail rejects it and
+    the repair node fixes stray fields, wrong types or step numbering without a retry.
+    """
+    logger.warning("LLM report did not parse: %s", error)
+    if error.draft is None:
+        return {"validation_error": str(error), "token_usage": _add_usage(state, usage)}
+    return {"diagnostic_report": error.draft, "token_usage": _add_usage(state, usage)}
+
+def _count_retry(state: AgentState):
+    """A diagnose run with a pending validation_error is an LLM retry."""
+    if state.get("validation_error"):
+        DIAGNOSIS_RETRIES.inc()
+
+def _add_usage(state: AgentState, usage: TokenUsage) -> dict:
+    """Token usage of this run so far (retries accumulate)."""
+    total = TokenUsage(**{
+        k: v for k, v in (state.get("token_usage") or {}).items() if k != "total_tokens"
+    })
+    total.add(usage)
+    return total.to_dict()
 
 # ---------------------------------------------------------
-# NODE 3: Safety Guardrail
+# NODE 4: Safety Guardrail
 # ---------------------------------------------------------
 def validate_node(state: AgentState) -> AgentState:
     """
     Post-processing check.
     Ensures that high-severity issues have explicit safety warnings.
     """
-    print("--- Node: Validating Output ---")
+    logger.debug("Node: validate")
     report = state["diagnostic_report"]
     
     if not report:
@@ -136,8 +180,9 @@ def validate_node(state: AgentState) -> AgentState:
         try:
             report = DiagnosticResult(**report)
         except Exception as e:
-            # PRINT THE ERROR so we know why it's failing
-            print(f"!!! Pydantic Conversion Error: {e} !!!")
+            # Log the error so we know why it's failing
+            logger.warning("Guardrail triggered: invalid report format: %s", e)
+            GUARDRAIL_TRIGGERS.labels(reason="invalid_format").inc()
             return {
                 "validation_error": f"Invalid report format: {e}",
                 # CRITICAL: Increment retry count to prevent infinite loops
@@ -146,17 +191,68 @@ def validate_node(state: AgentState) -> AgentState:
     # --- FIX END ---
     
     # RULE: If Severity > 7, there MUST be a "Safety" or "Lockout" warning
-    if report.severity_score >= 7:
-        has_safety_term = any(
-            term in " ".join(report.safety_warnings).lower() 
-            for term in ["lock out", "power off", "safety", "danger", "stop"]
-        )
-        if not has_safety_term:
-            print("!!! Guardrail Triggered: Missing Safety Warning !!!")
-            return {
-                "validation_error": "High severity detected but no 'Lock Out' or 'Safety' warning provided.",
-                "retry_count": state.get("retry_count", 0) + 1
-            }
+    if needs_safety_warning(report):
+        logger.warning("Guardrail triggered: missing safety warning")
+        GUARDRAIL_TRIGGERS.labels(reason="missing_safety_warning").inc()
+        return {
+            "validation_error": "High severity detected but no 'Lock Out' or 'Safety' warning provided.",
+            "retry_count": state.get("retry_count", 0) + 1
+        }
             
     # If we get here, it's valid
-    return {"validation_error": None}
\ No newline at end of file
+    return {"validation_error": None}
+
+async def avalidate_node(state: AgentState) -> AgentState:
+    """
+    Async entry point for validate_node.
+    The check is pure CPU, so it runs inline instead of in a worker thread.
+    """
+    return validate_node(state)
+
+# ---------------------------------------------------------
+# NODE 5: Local Repair
+# ---------------------------------------------------------
+def repair_node(state: AgentState) -> AgentState:
+    """
+    Runs after a rejected draft, before any LLM retry.
+    Mechanical problems (stray fields, wrong types, step numbering, a missing lockout
+    warning that the safety manual covers) are fixed in place. Only drafts that cannot
+    be repaired keep their validation_error and go back to the LLM.
+    """
+    logger.debug("Node: repair")
+    if not settings.REPAIR_ENABLED:
+        return {}
+
+    repaired, fixes = repair_report(
+        state.get("diagnostic_report"), state.get("retrieved_docs") or [], fetch_safety_docs=_safety_manual_chunks
+    )
+    repair_stats.record(repaired is not None, fixes)
+
+    if repaired is None:
+        logger.info("Repair failed; escalating to LLM retry")
+        REPAIRS.labels(outcome="escalated").inc()
+        return {}
+
+    logger.info("Report repaired: %s", ", ".join(fixes) or "no changes")
+    REPAIRS.labels(outcome="repaired").inc()
+    return {
+        "diagnostic_report": repaired,
+        "validation_error": None,
+        # The rejected draft was fixed locally, so it does not use up an LLM retry
+        "retry_count": max(0, state.get("retry_count", 0) - 1),
+        "repair_count": (state.get("repair_count") or 0) + 1
+    }
+
+async def arepair_node(state: AgentState) -> AgentState:
+    """
+    Async entry point for repair_node (on a worker thread: it may look up the safety manual).
+    """
+    return await asyncio.to_thread(repair_node, state)
+
+def _safety_manual_chunks():
+    """Safety-manual chunks for a lockout warning; none if Qdrant cannot be reached."""
+    try:
+        return vector_service.fetch_by_source(settings.REPAIR_SAFETY_SOURCES, limit=1)
+    except Exception as e:
+        logger.warning("Could not fetch the safety manual for repair: %s", e)
+        return []
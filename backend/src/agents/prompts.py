@@ -0,0 +1,116 @@
+"""
+prompts.py
+----------
+Prompt assembly for the diagnosis node.
+The static instructions + schema block is a module constant sent first as the system
+message, so it is byte-identical across calls (provider-side prefix caching applies).
+The variable part (telemetry, trend, manuals, retry feedback) follows in the user message,
+with manual context capped to a token budget and ranked by retrieval score.
+"""
+
+from typing import List, Sequence
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+from src.core.config import get_settings
+from src.core.schema import ManualChunk
+from src.core.tokens import count_tokens
+
+settings = get_settings()
+
+STATIC_SYSTEM_PROMPT = """You are an expert KONE Industrial IoT Engineer.
+Analyze the Elevator Telemetry and Technical Manuals in the user message to produce a diagnostic report.
+
+REQUIREMENTS:
+1. Identify the root cause based on sensor values and error codes.
+2. Cite specific manuals in your findings.
+3. Assign a severity score (1-10).
+4. Provide a step-by-step action plan for the technician.
+
+IMPORTANT SCHEMA NOTE:
+You MUST populate the 'recommended_actions' list.
+Each action object MUST strictly follow this structure:
+- 'step_order': integer (1, 2, 3...)
+- 'instruction': string (Clear action verb)
+- 'tool_required': string (Optional, e.g., "Multimeter", "Wrench")
+
+Do NOT invent fields like 'action_type' or 'estimated_time'.
+Stick strictly to the schema provided.
+
+Example JSON Structure (Fill this):
+{
+  "fault_summary": "...",
+  "root_cause_hypothesis": "...",
+  "severity_score": 8,
+  "cited_manual_references": ["ManualID..."],
+  "recommended_actions": [
+    { "step_order": 1, "instruction": "Lock out power", "tool_required": "Lockout Kit" }
+  ],
+  "safety_warnings": ["Risk of electric shock"]
+}"""
+
+
+# ---------------------------------------------------------
+# Manual context
+# ---------------------------------------------------------
+
+def format_chunk(doc: ManualChunk) -> str:
+    return f"Source: {doc.source_doc} (Pg {doc.page_number}): {doc.content}"
+
+
+def select_manual_context(docs: Sequence[ManualChunk], budget_tokens: int) -> List[ManualChunk]:
+    """
+    Highest-scoring chunks that fit in budget_tokens.
+    Chunks without a score (e.g. exact matches before ranking) keep their retrieval order
+    after the scored ones; a chunk that does not fit is skipped so smaller ones can still be used.
+    """
+    ranked = sorted(
+        enumerate(docs),
+        key=lambda item: (item[1].score is None, -(item[1].score or 0.0), item[0])
+    )
+    selected, used = [], 0
+    for _, doc in ranked:
+        cost = count_tokens(format_chunk(doc))
+        if used + cost > budget_tokens:
+            continue
+        selected.append(doc)
+        used += cost
+    return selected
+
+
+# ---------------------------------------------------------
+# Prompt
+# ---------------------------------------------------------
+
+def build_diagnosis_messages(state) -> List[BaseMessage]:
+    """
+    [static system prompt, variable user message] for the diagnosis LLM call.
+    """
+    # Compact JSON: indentation is pure token overhead for the model
+    telemetry_context = state["telemetry"].model_dump_json()
+
+    docs = select_manual_context(state.get("retrieved_docs") or [], settings.PROMPT_MANUAL_TOKEN_BUDGET)
+    manual_context = "\n\n".join(format_chunk(d) for d in docs) or "(no matching manual sections)"
+
+    sections = [f"TELEMETRY DATA:\n{telemetry_context}"]
+
+    # Lets the model tell a one-off spike from a sustained drift
+    trend = state.get("trend")
+    if trend is not None:
+        sections.append(f"RECENT TREND (this elevator):\n{trend.summary()}")
+
+    sections.append(f"TECHNICAL MANUALS (Reference these explicitly):\n{manual_context}")
+
+    # Inject previous errors if we are retrying
+    if state.get("validation_error"):
+        sections.append(
+            "CRITICAL INSTRUCTION: Your previous attempt failed validation.\n"
+            f"ERROR: {state['validation_error']}\n\n"
+            "Reflect on this error. Ensure you provide ALL required fields:\n"
+            "- severity_score (int)\n"
+            "- recommended_actions (list of objects)\n"
+            "- safety_warnings (list of strings)"
+        )
+
+    return [SystemMessage(content=STATIC_SYSTEM_PROMPT), HumanMessage(content="\n\n".join(sections))]
+
@@ -8,17 +8,30 @@ in the graph.
 
 from typing import TypedDict, List, Optional
 from src.core.schema import TelemetryReading, ManualChunk, DiagnosticResult
+from src.services.telemetry_history import TrendFeatures
 
 class AgentState(TypedDict):
     # INPUT: The raw sensor data from the request
     telemetry: TelemetryReading
     
+    # HISTORY: Rolling features of this elevator (None without enough history)
+    trend: Optional[TrendFeatures]
+    
     # PROCESS: Documentation retrieved from Vector DB
     retrieved_docs: List[ManualChunk]
     
+    # TRIAGE: ID of the rule that produced the report (None = LLM path)
+    triage_rule: Optional[str]
+    
     # OUTPUT: The structured diagnosis (can be None during processing)
     diagnostic_report: Optional[DiagnosticResult]
     
     # CONTROL FLOW: Tracking retries for the cyclic loop
     retry_count: int
-    validation_error: Optional[str]
\ No newline at end of file
+    validation_error: Optional[str]
+    
+    # COST: Prompt/completion tokens spent on this run (TokenUsage.to_dict())
+    token_usage: Optional[dict]
+    
+    # REPAIR: Rejected drafts fixed locally (without an LLM retry)
+    repair_count: int
\ No newline at end of file
@@ -0,0 +1,15 @@
+"""
+streaming.py
+------------
+Hooks for streaming partial LLM output out of a running graph.
+The streaming endpoint sets a token sink for the duration of one graph run;
+diagnose nodes executed inside that run forward 'fault_summary' tokens to it.
+"""
+
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+# Callable receiving each new piece of the report's fault_summary (None = not streaming)
+summary_token_sink: ContextVar[Optional[Callable[[str], None]]] = ContextVar(
+    "summary_token_sink", default=None
+)
@@ -2,12 +2,13 @@
 config.py
 ---------
 Application-level configuration management using Pydantic Settings.
-This ensures strict type validation for environment variables, failing fast
-if critical keys (like OPENAI_API_KEY) are missing.
+This ensures strict type validation for environment variables. Keys only some
+services need (like OPENAI_API_KEY) are checked when that service is built.
 """
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
+from typing import List, Optional
 import os
 
 class Settings(BaseSettings):
@@ -28,12 +29,185 @@ class Settings(BaseSettings):
     BACKEND_CORS_ORIGINS: list[str] = ["http://localhost:5173", "http://localhost:3000"]
 
     # External APIs
-    OPENAI_API_KEY: str
+    # Optional at import; required when the LLM (or OpenAI embeddings) is first used
+    OPENAI_API_KEY: Optional[str] = None
     
     # Vector Database (Qdrant)
     QDRANT_HOST: str = "qdrant" # Service name in Docker Compose
     QDRANT_PORT: int = 6333
-    
+    # gRPC (port 6334) instead of REST for points calls; benchmark both (see README)
+    QDRANT_PREFER_GRPC: bool = False
+    QDRANT_GRPC_PORT: int = 6334
+    QDRANT_TIMEOUT_SECONDS: int = 10
+    # REST connection pool (per client; the service holds one sync and one async client)
+    QDRANT_MAX_CONNECTIONS: int = 100
+    QDRANT_MAX_KEEPALIVE_CONNECTIONS: int = 32
+    # Collection storage profile: 'full' | 'scalar' (int8) | 'binary' (see collection_profiles.py).
+    # Applied when the collection is created; switching means re-creating it and re-seeding.
+    QDRANT_COLLECTION_PROFILE: str = "full"
+    # Per-field overrides of the profile (None = the profile's value)
+    QDRANT_ON_DISK: Optional[bool] = None                 # Original vectors on disk (mmap)
+    QDRANT_HNSW_M: Optional[int] = None
+    QDRANT_HNSW_EF_CONSTRUCT: Optional[int] = None
+    QDRANT_SEARCH_HNSW_EF: Optional[int] = None
+    QDRANT_QUANTIZATION_OVERSAMPLING: Optional[float] = None
+    QDRANT_QUANTIZATION_RESCORE: Optional[bool] = None
+
+    # Shared OpenAI HTTP client (chat + embeddings use one pool)
+    OPENAI_MAX_CONNECTIONS: int = 200
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 64
+    OPENAI_CHAT_TIMEOUT_SECONDS: float = 60.0
+    OPENAI_EMBEDDING_TIMEOUT_SECONDS: float = 15.0
+    OPENAI_MAX_RETRIES: int = 2
+    # Applies to both pools
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    HTTP_POOL_TIMEOUT_SECONDS: float = 5.0   # Wait for a free pooled connection
+
+    # Embeddings
+    EMBEDDING_PROVIDER: str = "openai"   # 'openai' | 'local' (CPU, offline) | 'hashing' (tests)
+    EMBEDDING_MODEL: str = "text-embedding-3-small"
+    # Vector size; None = the provider's native size (hashing defaults to 384)
+    EMBEDDING_DIMENSION: Optional[int] = None
+    # Local sentence-transformers model directory (EMBEDDING_PROVIDER='local')
+    EMBEDDING_LOCAL_MODEL_PATH: str = "models/all-MiniLM-L6-v2"
+    EMBEDDING_LOCAL_BATCH_SIZE: int = 32
+    EMBEDDING_LOCAL_THREADS: int = 2
+    # Query embedding cache: in-process LRU size + SQLite file ("" disables the disk tier)
+    EMBEDDING_CACHE_SIZE: int = 4096
+    EMBEDDING_CACHE_PATH: str = ".cache/embeddings.sqlite3"
+
+    # In-process vector mirror (memory-mapped NumPy copy of the collection; off by default)
+    VECTOR_MIRROR_ENABLED: bool = False
+    VECTOR_MIRROR_PATH: str = ".cache/vector_mirror"
+    VECTOR_MIRROR_DTYPE: str = "float32"              # 'float32' | 'float16' (half the memory)
+    VECTOR_MIRROR_REFRESH_SECONDS: float = 30.0
+    VECTOR_MIRROR_MAX_STALENESS_SECONDS: float = 120.0  # Older than this -> search Qdrant
+
+    # Retrieval: hits per error code, and the global cap after merging
+    RETRIEVAL_LIMIT_PER_QUERY: int = 2
+    RETRIEVAL_LIMIT: int = 6
+    # 'dense' | 'exact_first' (payload-index lookup, dense only as fallback) | 'hybrid'
+    RETRIEVAL_MODE: str = "exact_first"
+    # Tagged chunks a code needs before its dense search is skipped ('exact_first')
+    RETRIEVAL_MIN_TAGGED_HITS: int = 1
+
+    # Rule-Based Pre-Triage (known faults skip the LLM)
+    TRIAGE_ENABLED: bool = True
+    TRIAGE_RULES_PATH: str = "config/triage_rules.json"
+    TRIAGE_MIN_CONFIDENCE: float = 0.9
+
+    # Prompt Assembly
+    # Max tokens of manual context per diagnosis prompt (highest-scoring chunks first)
+    PROMPT_MANUAL_TOKEN_BUDGET: int = 1500
+
+    # Local Report Repair (fix rejected drafts before spending an LLM retry)
+    REPAIR_ENABLED: bool = True
+    # Retrieved chunks from these documents ground an injected lockout warning
+    REPAIR_SAFETY_SOURCES: List[str] = ["KONE_Global_Safety_Manual.pdf"]
+    REPAIR_LOCKOUT_WARNING: str = "Lock out power before servicing."
+
+    # Diagnosis Result Cache (repeat faults skip the LLM)
+    DIAGNOSIS_CACHE_TTL_SECONDS: float = 900.0
+    DIAGNOSIS_CACHE_MAX_ENTRIES: int = 2048
+    # Band widths used when fingerprinting telemetry
+    FINGERPRINT_VELOCITY_BUCKET_M_S: float = 0.5
+    FINGERPRINT_VIBRATION_BUCKET_HZ: float = 0.5
+    FINGERPRINT_DOOR_CYCLES_BUCKET: int = 10000
+
+    # Batch Diagnosis
+    BATCH_DIAGNOSE_CONCURRENCY: int = 8   # Graph runs in flight per batch
+    BATCH_DIAGNOSE_MAX_ITEMS: int = 1000
+
+    # Streaming Telemetry Ingest
+    # Background consumer: 'mqtt' (IoT gateways) | 'queue' (in-process producers) | 'none'.
+    # POST /api/v1/telemetry/ingest feeds the monitor directly and works with any of them.
+    TELEMETRY_SOURCE: str = "none"
+    TELEMETRY_QUEUE_SIZE: int = 10000
+    TELEMETRY_MQTT_HOST: str = "mqtt"  # Service name in Docker Compose
+    TELEMETRY_MQTT_PORT: int = 1883
+    TELEMETRY_MQTT_TOPIC: str = "flowguard/telemetry/#"
+    TELEMETRY_MQTT_RECONNECT_MIN_SECONDS: float = 1.0   # First retry after a lost broker connection
+    TELEMETRY_MQTT_RECONNECT_MAX_SECONDS: float = 30.0  # Backoff doubles up to this
+    TELEMETRY_WINDOW_SIZE: int = 60    # Readings kept per elevator
+    TELEMETRY_MAX_ELEVATORS: int = 50000  # Least recently seen windows are dropped beyond this
+    TELEMETRY_DEBOUNCE_SECONDS: float = 300.0
+    TELEMETRY_VIBRATION_THRESHOLD_HZ: float = 4.0  # Guide rail roller wear (Ride Comfort Standards)
+    TELEMETRY_VELOCITY_THRESHOLD_M_S: float = 2.5
+    TELEMETRY_MAX_CONCURRENT_DIAGNOSES: int = 4
+
+    # Telemetry History (per-elevator ring buffers + trend features in the prompt)
+    HISTORY_ENABLED: bool = True
+    HISTORY_CAPACITY: int = 1000        # Readings kept per elevator (20 bytes each)
+    HISTORY_MAX_ELEVATORS: int = 50000  # Least recently seen elevators are dropped beyond this
+    HISTORY_EWMA_ALPHA: float = 0.1
+    HISTORY_MIN_READINGS: int = 5       # No trend summary before this many readings
+    HISTORY_ZSCORE_THRESHOLD: float = 3.0
+    # Fitted change across the window that counts as a rising/falling trend
+    HISTORY_VIBRATION_TREND_HZ: float = 1.0
+    HISTORY_VELOCITY_TREND_M_S: float = 0.3
+
+    # Telemetry Archive (Parquet partitioned by day/site) and Fleet Analytics
+    ARCHIVE_ENABLED: bool = True
+    ARCHIVE_PATH: str = "data/telemetry_archive"
+    # A batch is written when either limit is reached (fewer, larger files)
+    ARCHIVE_FLUSH_ROWS: int = 100000
+    ARCHIVE_FLUSH_SECONDS: float = 60.0
+    ARCHIVE_MAX_BUFFERED_ROWS: int = 1000000  # Readings beyond this are dropped (counted) if flushing stalls
+    # The 'site' group of the elevator ID (KONE-ESPOO-01 -> ESPOO)
+    ARCHIVE_SITE_PATTERN: str = r"^[^-]+-(?P<site>.+)-[^-]+$"
+    FLEET_RISING_VIBRATION_HZ_PER_DAY: float = 0.05
+
+    # Document Ingestion (manual library -> chunks -> Qdrant)
+    MANUALS_PATH: str = "manuals"   # PDF/.txt/.md manuals; must exist (a missing path fails the ingest)
+    # Add the bundled sample manuals when MANUALS_PATH is empty even if the collection
+    # already has points (by default they only seed an empty collection; never deletes)
+    INGEST_SEED_SAMPLES: bool = False
+    INGEST_MANIFEST_PATH: str = ".cache/ingest_manifest.json"  # Per-file hashes for incremental re-index
+    INGEST_WORKERS: int = 4         # Parser processes
+    INGEST_CHUNK_CHARS: int = 1200
+    INGEST_CHUNK_OVERLAP_CHARS: int = 150
+    # Error codes a chunk mentions are stored as its related_error_codes tags
+    INGEST_ERROR_CODE_PATTERN: str = r"\b[A-Z]{1,3}-\d{3}\b"
+    # Ingestion jobs: checkpoints live here; interrupted jobs are resumed at startup
+    INGEST_JOBS_PATH: str = ".cache/ingest_jobs"
+    INGEST_MAX_QUEUED_JOBS: int = 4   # Further /admin/seed calls get 429 until one finishes
+    # Token bucket on ingestion's embedding calls (estimated tokens; 0 = unlimited).
+    # Keep it well under the provider quota so live diagnoses are never starved.
+    INGEST_EMBED_TOKENS_PER_SECOND: float = 5000.0
+    INGEST_EMBED_BURST_TOKENS: float = 20000.0
+    # Recall check after an ingest that changed the collection: sampled stored vectors are
+    # searched with the profile's params and exactly (full precision); 0 queries disables it
+    INGEST_RECALL_CHECK_QUERIES: int = 20
+    INGEST_RECALL_CHECK_K: int = 10
+    INGEST_RECALL_MIN: float = 0.95   # Below this the ingestion job records an error (it still succeeds)
+
+    # Knowledge-base listing: facet counts are kept current in-process and fully
+    # recounted after this long (picks up writes made by other processes)
+    KB_SUMMARY_TTL_SECONDS: float = 300.0
+    KB_LIST_MAX_PAGE_SIZE: int = 500
+
+    # Startup Warmup (/ready flips once it completes)
+    WARMUP_ENABLED: bool = True
+    # Embedded into the query cache at startup, in addition to every triage rule code
+    WARMUP_ERROR_CODES: List[str] = []
+    WARMUP_RETRY_SECONDS: float = 5.0   # Retry interval while Qdrant is unreachable
+
+    # Ingestion Tuning
+    # Chunks per embed_documents call, and how many of those calls run at once
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_MAX_CONCURRENCY: int = 4
+    # Points per Qdrant upsert request; each request is retried independently
+    UPSERT_BATCH_SIZE: int = 256
+    UPSERT_MAX_RETRIES: int = 3
+    UPSERT_RETRY_BACKOFF_SECONDS: float = 0.5
+
+    # Observability
+    LOG_LEVEL: str = "INFO"
+    OTEL_SERVICE_NAME: str = "flowguard-engine"
+    # OTLP/HTTP collector base URL (e.g. http://otel-collector:4318); "" = spans stay in-process
+    OTEL_EXPORTER_OTLP_ENDPOINT: str = ""
+
     # Model Configuration
     # We use GPT-4o-mini as specified for cost-effective, high-frequency telemetry parsing
     MODEL_NAME: str = "gpt-4o-mini"
@@ -0,0 +1,96 @@
+"""
+http_clients.py
+---------------
+Shared, tuned network clients.
+- One OpenAI client pair (sync + async) with a bounded keep-alive connection pool is
+  shared by the chat model and the embedding provider, instead of each LangChain
+  wrapper opening its own pools with default limits. Chat and embeddings get their
+  own per-call timeouts via with_options(), which reuses the same pool.
+- Qdrant client arguments (REST pool limits and timeouts, or gRPC) come from one place
+  so the sync and async Qdrant clients are configured identically.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+
+import httpx
+import openai
+
+from src.core.config import get_settings
+
+settings = get_settings()
+
+
+def http_limits(max_connections: int, max_keepalive: int) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS
+    )
+
+
+def http_timeout(read_seconds: float) -> httpx.Timeout:
+    """Connect/pool waits are short; `read_seconds` bounds the call itself."""
+    return httpx.Timeout(
+        read_seconds,
+        connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS,
+        pool=settings.HTTP_POOL_TIMEOUT_SECONDS
+    )
+
+
+@lru_cache(maxsize=1)
+def openai_clients() -> Tuple[openai.OpenAI, openai.AsyncOpenAI]:
+    """The process-wide (OpenAI, AsyncOpenAI) pair. Requires OPENAI_API_KEY."""
+    if not settings.OPENAI_API_KEY:
+        raise RuntimeError("OPENAI_API_KEY is not set; it is required for OpenAI chat and embeddings.")
+
+    limits = http_limits(settings.OPENAI_MAX_CONNECTIONS, settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS)
+    timeout = http_timeout(settings.OPENAI_CHAT_TIMEOUT_SECONDS)
+    common = {"api_key": settings.OPENAI_API_KEY, "max_retries": settings.OPENAI_MAX_RETRIES, "timeout": timeout}
+    return (
+        openai.OpenAI(http_client=httpx.Client(limits=limits, timeout=timeout), **common),
+        openai.AsyncOpenAI(http_client=httpx.AsyncClient(limits=limits, timeout=timeout), **common),
+    )
+
+
+def openai_chat_clients() -> Tuple[Any, Any]:
+    """(sync, async) chat.completions resources on the shared pool."""
+    sync_client, async_client = openai_clients()
+    timeout = http_timeout(settings.OPENAI_CHAT_TIMEOUT_SECONDS)
+    return (
+        sync_client.with_options(timeout=timeout).chat.completions,
+        async_client.with_options(timeout=timeout).chat.completions,
+    )
+
+
+def openai_embedding_clients() -> Tuple[Any, Any]:
+    """(sync, async) embeddings resources on the shared pool, with the shorter embedding timeout."""
+    sync_client, async_client = openai_clients()
+    timeout = http_timeout(settings.OPENAI_EMBEDDING_TIMEOUT_SECONDS)
+    return (
+        sync_client.with_options(timeout=timeout).embeddings,
+        async_client.with_options(timeout=timeout).embeddings,
+    )
+
+
+def qdrant_client_args() -> Dict[str, Any]:
+    """
+    Keyword arguments for QdrantClient / AsyncQdrantClient.
+    gRPC multiplexes calls over one HTTP/2 channel, so the REST pool limits only apply
+    when QDRANT_PREFER_GRPC is off (collection management still uses REST either way).
+    """
+    args: Dict[str, Any] = {
+        "host": settings.QDRANT_HOST,
+        "port": settings.QDRANT_PORT,
+        "grpc_port": settings.QDRANT_GRPC_PORT,
+        "prefer_grpc": settings.QDRANT_PREFER_GRPC,
+        "timeout": settings.QDRANT_TIMEOUT_SECONDS,
+        # Explicit limits also re-enable keep-alive, which the client turns off for localhost
+        "limits": http_limits(settings.QDRANT_MAX_CONNECTIONS, settings.QDRANT_MAX_KEEPALIVE_CONNECTIONS),
+    }
+    if settings.QDRANT_PREFER_GRPC:
+        args["grpc_options"] = {
+            "grpc.keepalive_time_ms": int(settings.HTTP_KEEPALIVE_EXPIRY_SECONDS * 1000),
+            "grpc.keepalive_permit_without_calls": 1,
+        }
+    return args
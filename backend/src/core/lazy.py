@@ -0,0 +1,66 @@
+"""
+lazy.py
+-------
+Lazily constructed module-level singletons.
+`vector_service = Lazy(VectorService)` keeps the familiar import
+(`from src.services.vector_service import vector_service`) while deferring the
+constructor (network clients, model loading, API-key checks) to first use,
+normally the warmup phase of the app lifespan. Importing a module stays cheap.
+
+Attribute reads, writes and deletes are forwarded to the real instance, so
+`monkeypatch.setattr(vector_service, "client", ...)` works as before.
+"""
+
+import threading
+from typing import Any, Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+_UNSET = object()
+
+
+class Lazy(Generic[T]):
+    __slots__ = ("_factory", "_instance", "_lock")
+
+    def __init__(self, factory: Callable[[], T]):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_instance", _UNSET)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(resolve(self), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(resolve(self), name, value)
+
+    def __delattr__(self, name: str):
+        delattr(resolve(self), name)
+
+    def __repr__(self) -> str:
+        instance = object.__getattribute__(self, "_instance")
+        factory = object.__getattribute__(self, "_factory")
+        if instance is _UNSET:
+            return f"<Lazy {getattr(factory, '__qualname__', factory)} (not built)>"
+        return f"<Lazy {instance!r}>"
+
+
+def resolve(lazy: "Lazy[T]") -> T:
+    """
+    The real instance, built on first call (thread-safe; concurrent callers share one build).
+    Anything that is not a Lazy (e.g. a test double patched in its place) is returned as is.
+    """
+    if not isinstance(lazy, Lazy):
+        return lazy
+    instance = object.__getattribute__(lazy, "_instance")
+    if instance is not _UNSET:
+        return instance
+    with object.__getattribute__(lazy, "_lock"):
+        instance = object.__getattribute__(lazy, "_instance")
+        if instance is _UNSET:
+            instance = object.__getattribute__(lazy, "_factory")()
+            object.__setattr__(lazy, "_instance", instance)
+        return instance
+
+
+def is_built(lazy: Any) -> bool:
+    return not isinstance(lazy, Lazy) or object.__getattribute__(lazy, "_instance") is not _UNSET
@@ -0,0 +1,126 @@
+"""
+observability.py
+----------------
+Metrics, tracing and logging for FlowGuard-Engine.
+- Prometheus: latency histograms for graph nodes, embedding calls, Qdrant searches and
+  LLM calls, plus counters for retries, guardrail triggers, validation failures, cache
+  hits and tokens. Served at GET /metrics.
+- OpenTelemetry: one span per request with child spans per node / backend call.
+  Spans are exported over OTLP/HTTP when OTEL_EXPORTER_OTLP_ENDPOINT is set
+  (e.g. a local collector or Jaeger), otherwise only recorded in-process.
+- Server-Timing: per-request node durations, so a browser/devtools or a load test can see
+  where a slow request spent its time without a tracing backend.
+- Logging: standard `logging` (replaces print statements), configured once at startup.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from prometheus_client import Counter, Histogram
+
+from src.core.config import get_settings
+
+settings = get_settings()
+
+# Buckets from 1 ms (cached lookups) to 30 s (slow LLM calls with retries)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+# ---------------------------------------------------------
+# Prometheus metrics
+# ---------------------------------------------------------
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "flowguard_http_request_seconds", "HTTP request latency", ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+GRAPH_NODE_SECONDS = Histogram(
+    "flowguard_graph_node_seconds", "Diagnostic graph node latency", ["node"], buckets=LATENCY_BUCKETS
+)
+EMBEDDING_SECONDS = Histogram(
+    "flowguard_embedding_seconds", "Embedding call latency (cache misses only)", ["operation"],
+    buckets=LATENCY_BUCKETS
+)
+QDRANT_SECONDS = Histogram(
+    "flowguard_qdrant_seconds", "Vector search latency", ["operation", "backend"], buckets=LATENCY_BUCKETS
+)
+LLM_SECONDS = Histogram(
+    "flowguard_llm_seconds", "LLM call latency", ["mode"], buckets=LATENCY_BUCKETS
+)
+
+DIAGNOSIS_RETRIES = Counter("flowguard_diagnosis_retries_total", "Drafts sent back to the LLM")
+GUARDRAIL_TRIGGERS = Counter("flowguard_guardrail_triggers_total", "Drafts rejected by validate", ["reason"])
+VALIDATION_FAILURES = Counter(
+    "flowguard_validation_failures_total", "Runs that finished without a validated report"
+)
+REPAIRS = Counter("flowguard_report_repairs_total", "Local repair attempts", ["outcome"])
+TRIAGE_MATCHES = Counter("flowguard_triage_matches_total", "Reports produced by triage rules", ["rule"])
+CACHE_LOOKUPS = Counter("flowguard_cache_lookups_total", "Cache lookups", ["cache", "result"])
+COALESCED_CALLS = Counter("flowguard_coalesced_calls_total", "Diagnoses that joined an in-flight run")
+LLM_TOKENS = Counter("flowguard_llm_tokens_total", "LLM tokens", ["kind"])
+
+
+# ---------------------------------------------------------
+# Tracing
+# ---------------------------------------------------------
+
+tracer = trace.get_tracer("flowguard")
+
+# Per-request {name: seconds} collected for the Server-Timing header
+server_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("server_timings", default=None)
+
+
+def configure_tracing():
+    """Installs the SDK tracer provider (and an OTLP exporter if an endpoint is configured)."""
+    if isinstance(trace.get_tracer_provider(), TracerProvider):
+        return
+    provider = TracerProvider(resource=Resource.create({"service.name": settings.OTEL_SERVICE_NAME}))
+    if settings.OTEL_EXPORTER_OTLP_ENDPOINT:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        provider.add_span_processor(BatchSpanProcessor(
+            OTLPSpanExporter(endpoint=f"{settings.OTEL_EXPORTER_OTLP_ENDPOINT.rstrip('/')}/v1/traces")
+        ))
+    trace.set_tracer_provider(provider)
+
+
+@contextmanager
+def observe(histogram: Histogram, span_name: str, server_timing: Optional[str] = None,
+            **labels: str) -> Iterator[trace.Span]:
+    """
+    Times a block into `histogram` (with labels) inside an OpenTelemetry span.
+    If `server_timing` is given, the duration is also added to the request's Server-Timing.
+    """
+    started = time.perf_counter()
+    with tracer.start_as_current_span(span_name, attributes=labels) as span:
+        try:
+            yield span
+        finally:
+            elapsed = time.perf_counter() - started
+            histogram.labels(**labels).observe(elapsed)
+            timings = server_timings.get()
+            if server_timing and timings is not None:
+                timings[server_timing] = timings.get(server_timing, 0.0) + elapsed
+
+
+def format_server_timing(timings: Dict[str, float]) -> str:
+    """{'retrieve': 0.0012} -> 'retrieve;dur=1.2' (milliseconds, as the header expects)."""
+    return ", ".join(f"{name};dur={seconds * 1000.0:.1f}" for name, seconds in timings.items())
+
+
+# ---------------------------------------------------------
+# Logging
+# ---------------------------------------------------------
+
+def configure_logging():
+    """Root logging config for the app (uvicorn keeps its own access/error loggers)."""
+    logging.basicConfig(
+        level=settings.LOG_LEVEL.upper(),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
@@ -7,7 +7,7 @@ These models serve as the bridge between raw IoT data, the Vector DB, and the LL
 """
 
 from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 
 # ------------------------------------------------------------------
@@ -61,6 +61,9 @@ class ManualChunk(BaseModel):
     # Metadata for filtering
     related_error_codes: List[str] = Field(default=[], description="Tags for error codes mentioned in this chunk")
 
+    # Set by retrieval; used to rank chunks across queries
+    score: Optional[float] = Field(default=None, description="Similarity score from the vector search")
+
 
 # ------------------------------------------------------------------
 # OUTPUT MODELS (LLM Diagnostic)
@@ -97,4 +100,27 @@ class DiagnosticResult(BaseModel):
     def check_severity_range(cls, v: int) -> int:
         if v < 1 or v > 10:
             raise ValueError('Severity score must be between 1 and 10')
-        return v
\ No newline at end of file
+        return v
+
+
+# ------------------------------------------------------------------
+# BATCH MODELS (Gateway Bulk Diagnosis)
+# ------------------------------------------------------------------
+
+class BatchDiagnosticItem(BaseModel):
+    """Outcome for one reading of a batch, reported at its input position."""
+    index: int = Field(..., description="Position of the reading in the request")
+    elevator_id: Optional[str] = Field(default=None, description="Asset ID, if the reading had one")
+    status: Literal["ok", "error"]
+    result: Optional[DiagnosticResult] = None
+    error: Optional[str] = Field(default=None, description="Why this reading could not be diagnosed")
+    cached: bool = Field(default=False, description="Served from the diagnosis cache")
+    deduplicated: bool = Field(default=False, description="Shared the result of an identical fault in the same batch")
+
+class BatchDiagnosticResponse(BaseModel):
+    """Per-item results for POST /api/v1/diagnose/batch, in input order."""
+    total: int
+    unique_faults: int = Field(..., description="Distinct fingerprints actually diagnosed")
+    succeeded: int
+    failed: int
+    results: List[BatchDiagnosticItem]
@@ -0,0 +1,114 @@
+"""
+timing.py
+---------
+Lightweight latency recording.
+TimingRecorder keeps a bounded sample of durations per name (e.g. per graph node) and
+summarizes them as count / mean / percentiles. `timed_node` wraps graph node functions
+so every run records into the process-wide `node_timings` recorder (and the metrics/spans
+in observability.py).
+"""
+
+import functools
+import inspect
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List
+
+from src.core.observability import GRAPH_NODE_SECONDS, observe
+
+# Samples kept per name (oldest dropped first)
+DEFAULT_MAX_SAMPLES = 10000
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Linear-interpolated percentile (q in [0, 100]) of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * q / 100.0
+    low, high = math.floor(rank), math.ceil(rank)
+    if low == high:
+        return sorted_values[low]
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def summarize(durations: Iterable[float]) -> Dict[str, float]:
+    """count, mean and p50/p95/p99/max of durations (seconds in, milliseconds out)."""
+    values = sorted(durations)
+    if not values:
+        return {"count": 0}
+    ms = [v * 1000.0 for v in values]
+    return {
+        "count": len(ms),
+        "mean_ms": round(sum(ms) / len(ms), 3),
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "max_ms": round(ms[-1], 3),
+    }
+
+
+class TimingRecorder:
+    def __init__(self, max_samples: int = DEFAULT_MAX_SAMPLES):
+        self.max_samples = max_samples
+        self._samples: Dict[str, Deque[float]] = {}
+        self._totals: Dict[str, float] = {}
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.max_samples)
+            samples.append(seconds)
+            self._totals[name] = self._totals.get(name, 0.0) + seconds
+            self._counts[name] = self._counts.get(name, 0) + 1
+
+    def totals(self) -> Dict[str, Dict[str, float]]:
+        """All-time count and summed seconds per name (not limited by max_samples)."""
+        with self._lock:
+            return {name: {"count": self._counts[name], "seconds": self._totals[name]} for name in self._counts}
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            snapshot = {name: list(samples) for name, samples in self._samples.items()}
+        return {name: summarize(samples) for name, samples in snapshot.items()}
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+            self._counts.clear()
+
+
+# Process-wide per-node timings of the diagnostic graph
+node_timings = TimingRecorder()
+
+
+def timed_node(name: str, fn: Callable) -> Callable:
+    """
+    Wraps a sync or async graph node: its duration goes to `node_timings`, the
+    Prometheus node histogram, an OpenTelemetry span and the request's Server-Timing.
+    """
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(state):
+            started = time.perf_counter()
+            try:
+                with observe(GRAPH_NODE_SECONDS, f"graph.{name}", server_timing=name, node=name):
+                    return await fn(state)
+            finally:
+                node_timings.record(name, time.perf_counter() - started)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(state):
+        started = time.perf_counter()
+        try:
+            with observe(GRAPH_NODE_SECONDS, f"graph.{name}", server_timing=name, node=name):
+                return fn(state)
+        finally:
+            node_timings.record(name, time.perf_counter() - started)
+    return wrapper
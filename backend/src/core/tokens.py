@@ -0,0 +1,88 @@
+"""
+tokens.py
+---------
+Token counting and per-request token usage accounting.
+Uses tiktoken (already a dependency of langchain-openai) when the model's encoding is
+available, and falls back to a length-based estimate otherwise (e.g., offline hosts
+that cannot download the BPE file).
+"""
+
+import logging
+import threading
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Any, Optional
+
+from src.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Fallback ratio when no tokenizer is available (OpenAI's rule of thumb for English)
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=8)
+def _encoding(model_name: str):
+    """tiktoken encoding for the model, or None if it cannot be loaded."""
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model(model_name)
+    except Exception as e:
+        logger.warning(
+            "Tokenizer unavailable for %s (%s); estimating tokens from length.", model_name, type(e).__name__
+        )
+        return None
+
+
+def count_tokens(text: str, model_name: Optional[str] = None) -> int:
+    """Token count of text for the configured model (len/4 estimate as a fallback)."""
+    encoding = _encoding(model_name or settings.MODEL_NAME)
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(text))
+
+
+def count_prompt_tokens(prompt: Any, model_name: Optional[str] = None) -> int:
+    """Tokens in a prompt given as a string or a list of chat messages (contents only)."""
+    if isinstance(prompt, str):
+        return count_tokens(prompt, model_name)
+    return sum(count_tokens(str(getattr(m, "content", m)), model_name) for m in prompt)
+
+
+@dataclass
+class TokenUsage:
+    """Prompt/completion tokens of one or more LLM calls."""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    calls: int = 0
+    estimated: bool = False   # True if any call had no provider-reported usage
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, other: "TokenUsage"):
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.calls += other.calls
+        self.estimated = self.estimated or other.estimated
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "total_tokens": self.total_tokens}
+
+
+class UsageTotals:
+    """Thread-safe process-wide accumulator of TokenUsage."""
+
+    def __init__(self):
+        self._usage = TokenUsage()
+        self._lock = threading.Lock()
+
+    def add(self, usage: TokenUsage):
+        with self._lock:
+            self._usage.add(usage)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return self._usage.to_dict()
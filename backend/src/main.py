@@ -5,15 +5,69 @@ Entry point for the FlowGuard-Engine Backend.
 Exposes the LangGraph Agent via a RESTful API.
 """
 
-from fastapi import FastAPI, HTTPException
+import asyncio
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, List
+from fastapi import Body, FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from src.routers import admin
+from opentelemetry.trace import SpanKind
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from src.routers import admin, fleet, telemetry
 from src.core.config import get_settings
-from src.core.schema import TelemetryReading, DiagnosticResult
-from src.agents.graph import app_graph
+from src.core.observability import (
+    HTTP_REQUEST_SECONDS, configure_logging, configure_tracing, format_server_timing,
+    server_timings, tracer
+)
+from src.core.schema import TelemetryReading, DiagnosticResult, BatchDiagnosticResponse
+from src.services.diagnosis_service import diagnosis_service
+from src.services.ingestion_jobs import ingestion_jobs
+from src.services.telemetry_archive import telemetry_archive
+from src.services.telemetry_monitor import telemetry_monitor
+from src.services.vector_service import vector_service
+from src.services.warmup import readiness, warm_up
+
+# Response header telling clients whether the diagnosis came from the result cache
+CACHE_HEADER = "X-Diagnosis-Cache"
+
+# Response header with per-stage durations of the request (graph nodes, embed, qdrant, llm)
+SERVER_TIMING_HEADER = "Server-Timing"
 
 # Load configuration
 settings = get_settings()
+configure_logging()
+configure_tracing()
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(application: FastAPI):
+    """
+    Starts background consumers on startup and stops them on shutdown.
+    Services are warmed up in the background: the app serves /health at once and
+    /ready flips when warmup completes.
+    """
+    warmup = asyncio.create_task(warm_up(readiness))
+    telemetry_monitor.start()
+    archive_flush = asyncio.create_task(telemetry_archive.run_flush())
+
+    async def after_warmup():
+        await readiness.wait()
+        # Ingestion jobs cut short by the last shutdown/crash pick up where they stopped
+        await asyncio.to_thread(ingestion_jobs.resume_interrupted)
+        await vector_service.run_mirror_refresh()
+
+    background = asyncio.create_task(after_warmup())
+    yield
+    for task in (warmup, background, archive_flush):
+        task.cancel()
+    await asyncio.gather(warmup, background, archive_flush, return_exceptions=True)
+    await telemetry_monitor.stop()
+    ingestion_jobs.shutdown()
+    # Readings still buffered would otherwise be lost
+    await asyncio.to_thread(telemetry_archive.flush)
 
 def get_application() -> FastAPI:
     application = FastAPI(
@@ -21,7 +75,8 @@ def get_application() -> FastAPI:
         version=settings.VERSION,
         description="Industrial IoT GenAI Diagnostic Backend",
         docs_url="/docs",
-        redoc_url="/redoc"
+        redoc_url="/redoc",
+        lifespan=lifespan
     )
 
     application.add_middleware(
@@ -30,9 +85,43 @@ def get_application() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[CACHE_HEADER, SERVER_TIMING_HEADER],
     )
 
+    @application.middleware("http")
+    async def observe_request(request: Request, call_next):
+        """
+        Root span + latency histogram per request, and a Server-Timing header
+        built from the stages timed while handling it.
+        """
+        timings = {}
+        token = server_timings.set(timings)
+        started = time.perf_counter()
+        status = 500
+        try:
+            with tracer.start_as_current_span(
+                f"{request.method} {request.url.path}", kind=SpanKind.SERVER
+            ) as span:
+                response = await call_next(request)
+                status = response.status_code
+                span.set_attribute("http.status_code", status)
+        finally:
+            server_timings.reset(token)
+            # Label by route template (e.g. /api/v1/diagnose), not the raw path, to bound cardinality
+            route = request.scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                method=request.method,
+                route=getattr(route, "path", "unmatched"),
+                status=str(status)
+            ).observe(time.perf_counter() - started)
+
+        timings["total"] = time.perf_counter() - started
+        response.headers[SERVER_TIMING_HEADER] = format_server_timing(timings)
+        return response
+
     application.include_router(admin.router, prefix="/api/v1/admin", tags=["Admin"])
+    application.include_router(telemetry.router, prefix="/api/v1/telemetry", tags=["Telemetry"])
+    application.include_router(fleet.router, prefix="/api/v1/fleet", tags=["Fleet"])
 
     return application
 
@@ -47,46 +136,72 @@ async def health_check():
         "version": settings.VERSION
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness probe: 503 until warmup (service clients, Qdrant collection, hot
+    embeddings) has completed. /health only says the process is alive.
+    """
+    return JSONResponse(status_code=200 if readiness.ready else 503, content=readiness.snapshot())
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint."""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 # ---------------------------------------------------------
 # NEW: Diagnostic Endpoint
 # ---------------------------------------------------------
 @app.post("/api/v1/diagnose", response_model=DiagnosticResult)
-async def run_diagnostic(telemetry: TelemetryReading):
+async def run_diagnostic(telemetry: TelemetryReading, response: Response):
     """
     Triggers the Agentic RAG Workflow.
     1. Receives Telemetry.
-    2. Initializes Agent State.
-    3. Runs the Graph (Retrieve -> Diagnose -> Validate).
+    2. Serves repeat faults from the diagnosis cache.
+    3. Otherwise runs the Graph (Retrieve -> Diagnose -> Validate).
     4. Returns Structured Report.
     """
-    # Initialize the state for the graph
-    initial_state = {
-        "telemetry": telemetry,
-        "retry_count": 0,
-        "validation_error": None
-    }
-
     try:
-        # Run the graph
-        # ainvoke waits for the entire graph to finish execution
-        final_state = await app_graph.ainvoke(initial_state)
-        
-        report = final_state.get("diagnostic_report")
-        
-        if not report:
-            raise HTTPException(status_code=500, detail="Agent failed to generate a report.")
-        
-        # Ensure we return a proper Pydantic object to FastAPI
-        # (FastAPI handles the JSON serialization automatically)
-        if isinstance(report, dict):
-            return DiagnosticResult(**report)
-            
+        report, cache_hit = await diagnosis_service.diagnose(telemetry)
+        response.headers[CACHE_HEADER] = "HIT" if cache_hit else "MISS"
         return report
 
     except Exception as e:
-        print(f"Error processing request: {e}")
+        logger.exception("Error processing request: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/v1/diagnose/batch", response_model=BatchDiagnosticResponse)
+async def run_batch_diagnostic(readings: List[Any] = Body(...)):
+    """
+    Bulk variant of /api/v1/diagnose for edge gateways.
+    Identical faults within the batch are diagnosed once, unique faults run concurrently,
+    and each reading gets its own result or error (in input order).
+    """
+    if len(readings) > settings.BATCH_DIAGNOSE_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(readings)} readings (max {settings.BATCH_DIAGNOSE_MAX_ITEMS})."
+        )
+
+    return await diagnosis_service.diagnose_batch(readings)
+
+@app.post("/api/v1/diagnose/stream")
+async def stream_diagnostic(telemetry: TelemetryReading):
+    """
+    Server-Sent Events variant of /api/v1/diagnose.
+    Emits 'retrieved', 'token', 'retry' and finally 'report' (or 'error') events
+    as the graph progresses, so the UI can render before the loop finishes.
+    """
+    async def event_stream():
+        async for event, data in diagnosis_service.stream(telemetry):
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -5,59 +5,120 @@ Administrative endpoints for managing the Knowledge Base.
 Allows the frontend to trigger RAG ingestion (ETL Pipeline) and view indexed documents.
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from src.services.vector_service import vector_service
-from src.core.schema import ManualChunk
+import asyncio
+import os
 import uuid
+from dataclasses import asdict
+from typing import Optional
 
-router = APIRouter()
+from fastapi import APIRouter, HTTPException, Query
+from src.services.vector_service import vector_service
+from src.services.diagnosis_service import diagnosis_service
+from src.services.report_repair import repair_stats
+from src.services.llm_service import llm_service
+from src.services.telemetry_archive import telemetry_archive
+from src.services.telemetry_history import telemetry_history
+from src.services.ingestion_jobs import JobQueueFull, ingestion_jobs
+from src.core.config import get_settings
+from src.core.lazy import is_built
+from src.core.timing import node_timings
 
-# Mock data source (simulating a PDF parser output)
-MOCK_MANUALS = [
-    ManualChunk(
-        chunk_id=str(uuid.uuid4()),
-        content="Error E-302 indicates a door obstruction during the closing cycle. Check for debris in the sill groove.",
-        source_doc="KONE_Door_Systems_Maintenance_2024.pdf",
-        page_number=42,
-        related_error_codes=["E-302"]
-    ),
-    ManualChunk(
-        chunk_id=str(uuid.uuid4()),
-        content="High vibration (> 4.0 Hz) suggests guide rail roller wear. Verify lubrication immediately.",
-        source_doc="KONE_Ride_Comfort_Standards.pdf",
-        page_number=12,
-        related_error_codes=["W-104", "VIB-HIGH"]
-    ),
-    ManualChunk(
-        chunk_id=str(uuid.uuid4()),
-        content="Safety Protocol: Engage pit stop switch before entering. Never enter if water is present.",
-        source_doc="KONE_Global_Safety_Manual.pdf",
-        page_number=5,
-        related_error_codes=[]
-    )
-]
+router = APIRouter()
+settings = get_settings()
 
 @router.post("/seed")
-async def seed_knowledge_base(background_tasks: BackgroundTasks):
+async def seed_knowledge_base():
     """
-    Triggers the ETL pipeline to ingest technical manuals into Qdrant.
-    Runs in the background to avoid blocking the UI.
+    Starts an ingestion job for the manuals in MANUALS_PATH and returns its ID.
+    Poll GET /jobs/{job_id} for progress. Re-runs are incremental: only new or
+    changed chunks are embedded, and stale ones are deleted.
     """
+    if not os.path.isdir(settings.MANUALS_PATH):
+        # Never let a missing (e.g. unmounted) library look like an empty one
+        raise HTTPException(status_code=400, detail=f"Manual directory '{settings.MANUALS_PATH}' does not exist.")
     try:
-        # We run this in the background because real vectorization takes time
-        background_tasks.add_task(vector_service.upsert_manuals, MOCK_MANUALS)
-        return {"status": "success", "message": "Ingestion pipeline triggered. Data is being vectorised."}
+        job = ingestion_jobs.submit(settings.MANUALS_PATH)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "status": "success",
+        "message": "Ingestion job queued. Data is being vectorised.",
+        "job_id": job.job_id,
+        "job": job.to_dict()
+    }
+
+@router.get("/jobs")
+async def list_jobs():
+    """Recent ingestion jobs, newest first."""
+    return {"jobs": [job.to_dict() for job in ingestion_jobs.list_jobs()]}
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Progress of one ingestion job: stage, chunks embedded/upserted/failed,
+    embedding rate (chunks/s), ETA and errors.
+    """
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown ingestion job: {job_id}")
+    return job.to_dict()
 
 @router.get("/documents")
-async def list_documents():
+async def list_documents(
+    limit: int = Query(50, ge=1),
+    cursor: Optional[str] = None,
+    source_doc: Optional[str] = None,
+    include_content: bool = False
+):
+    """
+    Returns what is actually indexed in Qdrant:
+    - "documents" / "error_codes": chunk counts per source document and per error code
+      (cached summary, kept current on upsert; no full collection scan per page load),
+    - "chunks": one page of chunk metadata (payload only, no vectors); pass
+      "next_cursor" back as `cursor` for the next page.
+    """
+    limit = min(limit, settings.KB_LIST_MAX_PAGE_SIZE)
+    if cursor is not None and not cursor.isdigit():
+        try:
+            uuid.UUID(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+    try:
+        summary = await asyncio.to_thread(vector_service.collection_summary)
+        chunks, next_cursor = await asyncio.to_thread(
+            vector_service.list_chunks, limit, cursor, source_doc, include_content
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        "count": summary["chunks"],
+        "documents": summary["documents"],
+        "error_codes": summary["error_codes"],
+        "chunks": chunks,
+        "next_cursor": next_cursor
+    }
+
+@router.get("/stats")
+async def service_stats():
     """
-    Returns a list of documents currently indexed (Mocked for this view).
-    In a real app, we would query Qdrant points, but Qdrant doesn't support 'select *' easily.
+    Returns runtime counters (e.g., embedding and diagnosis cache hits/misses, local repairs vs. LLM retries).
+    Services that have not been built yet (warmup still running) report null.
     """
-    # Simply returning the source docs we know about for the UI display
+    vector_ready = is_built(vector_service)
     return {
-        "count": len(MOCK_MANUALS),
-        "documents": list(set(d.source_doc for d in MOCK_MANUALS))
-    }
\ No newline at end of file
+        "embedding_cache": vector_service.query_cache.stats() if vector_ready else None,
+        "collection_summary": vector_service.summary.stats() if vector_ready else None,
+        "collection_profile": asdict(vector_service.profile) if vector_ready else None,
+        "vector_mirror": vector_service.mirror.stats() if vector_ready and vector_service.mirror else None,
+        "diagnosis_cache": diagnosis_service.cache.stats(),
+        "diagnosis_coalescing": diagnosis_service.flight.stats(),
+        "report_repair": repair_stats.snapshot(),
+        "llm_tokens": llm_service.usage_totals.stats() if is_built(llm_service) else None,
+        "telemetry_history": telemetry_history.stats(),
+        "telemetry_archive": telemetry_archive.stats(),
+        "ingestion": ingestion_jobs.stats(),
+        "node_timings": node_timings.summary()
+    }
@@ -0,0 +1,39 @@
+"""
+fleet.py
+--------
+Fleet analytics over the telemetry archive.
+Scans are CPU/disk bound, so each query runs in a worker thread.
+"""
+
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Query
+from src.core.config import get_settings
+from src.services import fleet_analytics
+from src.services.telemetry_archive import telemetry_archive
+
+router = APIRouter()
+settings = get_settings()
+
+@router.get("/summary")
+async def fleet_summary(days: int = Query(7, ge=1, le=366), site: Optional[str] = None):
+    """Readings, elevators, sensor averages and error rate per site."""
+    sites = await asyncio.to_thread(fleet_analytics.site_summary, telemetry_archive, days, site)
+    return {"days": days, "sites": sites}
+
+@router.get("/vibration-trends")
+async def vibration_trends(days: int = Query(14, ge=2, le=366), site: Optional[str] = None,
+                           min_slope_hz_per_day: Optional[float] = None):
+    """Sites whose daily mean vibration is rising, steepest first."""
+    threshold = settings.FLEET_RISING_VIBRATION_HZ_PER_DAY if min_slope_hz_per_day is None else min_slope_hz_per_day
+    sites = await asyncio.to_thread(fleet_analytics.vibration_trends, telemetry_archive, days, threshold, site)
+    return {"days": days, "min_slope_hz_per_day": threshold, "sites": sites}
+
+@router.get("/error-cooccurrence")
+async def error_cooccurrence(days: int = Query(7, ge=1, le=366), site: Optional[str] = None,
+                             min_count: int = Query(2, ge=1), limit: int = Query(50, ge=1, le=1000)):
+    """Error-code pairs reported together on the same reading."""
+    result = await asyncio.to_thread(
+        fleet_analytics.error_cooccurrence, telemetry_archive, days, site, min_count, limit
+    )
+    return {"days": days, **result}
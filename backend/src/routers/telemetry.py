@@ -0,0 +1,56 @@
+"""
+telemetry.py
+------------
+Streaming telemetry ingest endpoints.
+Readings posted here go through the same rolling-window monitor as the configured
+source (queue/MQTT), so a diagnosis only runs when a reading is a trigger.
+"""
+
+from typing import List
+from fastapi import APIRouter, HTTPException
+from src.core.schema import TelemetryReading
+from src.services.telemetry_history import telemetry_history
+from src.services.telemetry_monitor import telemetry_monitor
+
+router = APIRouter()
+
+@router.post("/ingest")
+async def ingest_telemetry(readings: List[TelemetryReading]):
+    """
+    Records readings in their elevators' rolling windows.
+    Returns which readings triggered (or were queued for) a diagnosis.
+    """
+    triggers = []
+    for index, reading in enumerate(readings):
+        reason = await telemetry_monitor.ingest(reading)
+        if reason is not None:
+            triggers.append({"index": index, "elevator_id": reading.elevator_id, "reason": reason})
+    return {"accepted": len(readings), "triggers": triggers}
+
+@router.get("/elevators/{elevator_id}")
+async def elevator_status(elevator_id: str):
+    """
+    Current window and the latest streaming diagnosis for one elevator.
+    """
+    window = telemetry_monitor.windows.get(elevator_id)
+    if window is None:
+        raise HTTPException(status_code=404, detail=f"No telemetry received for {elevator_id}.")
+
+    latest = window.readings[-1] if window.readings else None
+    trend = telemetry_history.features(elevator_id)
+    return {
+        "elevator_id": elevator_id,
+        "window_size": len(window.readings),
+        "recent_error_codes": sorted(window.recent_codes()),
+        "latest_reading": latest,
+        "last_trigger": window.last_trigger,
+        "last_diagnosis": window.last_result,
+        "last_error": window.last_error,
+        "diagnosis_pending": window.pending is not None,
+        "trend": trend.to_dict() if trend else None
+    }
+
+@router.get("/stats")
+async def monitor_stats():
+    """Counters for the streaming monitor (readings, triggers, debounced, diagnoses)."""
+    return telemetry_monitor.stats
@@ -0,0 +1,175 @@
+"""
+bench_transport.py
+------------------
+Compares Qdrant transports (REST vs gRPC) against a live Qdrant.
+Unlike benchmark.py this needs a running Qdrant (e.g. `docker compose up qdrant`);
+it never calls OpenAI. A scratch collection is filled with random vectors of the
+configured dimension, then each transport runs the same search workload at a fixed
+concurrency through AsyncQdrantClient built from qdrant_client_args(), so pool
+limits, keep-alive and timeouts are the ones the service would use.
+Writes p50/p95/p99 latency and searches/s per transport to a JSON file, together with
+the benchmark host and the Qdrant server version, so a result can be compared later.
+
+Usage (from backend/):
+    python src/scripts/bench_transport.py --requests 2000 --concurrency 32 --output transport.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+# Add parent directory to path so we can import src
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../"))
+
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.http import models
+
+from src.core.config import get_settings
+from src.core.http_clients import qdrant_client_args
+
+settings = get_settings()
+
+COLLECTION = "flowguard_transport_bench"
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def random_vector(rng: random.Random, dim: int) -> List[float]:
+    return [rng.uniform(-1.0, 1.0) for _ in range(dim)]
+
+
+def prepare_collection(points: int, dim: int, seed: int):
+    client = QdrantClient(**qdrant_client_args())
+    if client.collection_exists(COLLECTION):
+        client.delete_collection(COLLECTION)
+    client.create_collection(
+        collection_name=COLLECTION,
+        vectors_config=models.VectorParams(size=dim, distance=models.Distance.COSINE)
+    )
+    rng = random.Random(seed)
+    for start in range(0, points, 256):
+        client.upsert(
+            collection_name=COLLECTION,
+            points=[
+                models.PointStruct(id=i, vector=random_vector(rng, dim), payload={"source_doc": f"doc-{i % 10}"})
+                for i in range(start, min(points, start + 256))
+            ]
+        )
+    client.close()
+
+
+def describe_setup() -> Dict[str, Any]:
+    """The host running the benchmark and the Qdrant server it talks to."""
+    client = QdrantClient(**{**qdrant_client_args(), "prefer_grpc": False})
+    try:
+        version = client.http.service_api.root().version
+    finally:
+        client.close()
+    return {
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "qdrant_version": version,
+    }
+
+
+async def run_transport(prefer_grpc: bool, requests: int, concurrency: int, dim: int, top_k: int,
+                        seed: int) -> Dict[str, Any]:
+    args = {**qdrant_client_args(), "prefer_grpc": prefer_grpc}
+    if not prefer_grpc:
+        args.pop("grpc_options", None)
+    client = AsyncQdrantClient(**args)
+    rng = random.Random(seed)
+    queries = [random_vector(rng, dim) for _ in range(requests)]
+    # Untimed warmup so connection setup is not counted
+    await client.search(collection_name=COLLECTION, query_vector=queries[0], limit=top_k)
+
+    latencies: List[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(query: List[float]):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await client.search(collection_name=COLLECTION, query_vector=query, limit=top_k)
+            except Exception:
+                errors += 1
+                return
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(query) for query in queries))
+    elapsed = time.perf_counter() - started
+    await client.close()
+
+    return {
+        "transport": "grpc" if prefer_grpc else "rest",
+        "requests": requests,
+        "errors": errors,
+        "searches_per_second": round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50), 2),
+            "p95": round(percentile(latencies, 0.95), 2),
+            "p99": round(percentile(latencies, 0.99), 2),
+        } if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Qdrant REST vs gRPC search.")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--points", type=int, default=5000)
+    # text-embedding-3-small's native size; match EMBEDDING_DIMENSION if you shorten it
+    parser.add_argument("--dim", type=int, default=settings.EMBEDDING_DIMENSION or 1536)
+    parser.add_argument("--top-k", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="transport.json")
+    args = parser.parse_args()
+
+    print(f"Filling '{COLLECTION}' with {args.points} x {args.dim}d points...")
+    prepare_collection(args.points, args.dim, args.seed)
+
+    results = []
+    for prefer_grpc in (False, True):
+        result = asyncio.run(run_transport(prefer_grpc, args.requests, args.concurrency, args.dim,
+                                           args.top_k, args.seed))
+        print(json.dumps(result))
+        results.append(result)
+
+    QdrantClient(**qdrant_client_args()).delete_collection(COLLECTION)
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "qdrant": f"{settings.QDRANT_HOST}:{settings.QDRANT_PORT} (grpc {settings.QDRANT_GRPC_PORT})",
+        "setup": describe_setup(),
+        "concurrency": args.concurrency,
+        "points": args.points,
+        "dim": args.dim,
+        "top_k": args.top_k,
+        "pool": {
+            "max_connections": settings.QDRANT_MAX_CONNECTIONS,
+            "max_keepalive_connections": settings.QDRANT_MAX_KEEPALIVE_CONNECTIONS,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
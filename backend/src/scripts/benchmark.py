@@ -0,0 +1,338 @@
+"""
+benchmark.py
+------------
+Offline load test for POST /api/v1/diagnose.
+Runs the real FastAPI app and graph against stand-ins, so no OpenAI key or Qdrant
+container is needed:
+- an in-memory Qdrant seeded with the mock manuals,
+- the deterministic hashing embedder,
+- a fake structured LLM with configurable latency, failure rate and guardrail-retry rate.
+Drives the app at a fixed concurrency and writes p50/p95/p99 latency, requests/s and
+per-node timings to a JSON file; pass --compare to diff against an earlier run.
+
+Usage (from backend/):
+    python src/scripts/benchmark.py --requests 500 --concurrency 32 --output bench.json
+    python src/scripts/benchmark.py --compare bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+# Add parent directory to path so we can import src
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../"))
+
+# Stand-in configuration must be in place before src.* builds its singletons
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("EMBEDDING_PROVIDER", "hashing")
+os.environ.setdefault("TELEMETRY_SOURCE", "none")
+
+# Error codes the generated readings draw from (the first two have seeded manuals)
+ERROR_CODES = ["E-302", "W-104", "E-501", "E-777"]
+
+
+# ---------------------------------------------------------
+# Stand-ins
+# ---------------------------------------------------------
+
+class FakeStructuredLLM:
+    """
+    Replaces LLMService.structured_llm: sleeps for the configured latency, then returns a
+    DiagnosticResult (in the include_raw envelope), raises (failure_rate) or returns a draft
+    the guardrail rejects (retry_rate).
+    """
+
+    def __init__(self, latency_ms: float, jitter_ms: float, failure_rate: float, retry_rate: float, seed: int):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.retry_rate = retry_rate
+        self._random = random.Random(seed)
+        self.calls = 0
+
+    async def ainvoke(self, prompt, config=None):
+        from src.core.schema import DiagnosticResult, MaintenanceStep
+
+        self.calls += 1
+        delay = max(0.0, self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms))
+        await asyncio.sleep(delay / 1000.0)
+
+        roll = self._random.random()
+        if roll < self.failure_rate:
+            raise RuntimeError("Simulated LLM failure")
+        unsafe = roll < self.failure_rate + self.retry_rate
+
+        return {"raw": None, "parsing_error": None, "parsed": DiagnosticResult(
+            fault_summary="Simulated diagnosis",
+            root_cause_hypothesis="Simulated root cause",
+            severity_score=8,
+            cited_manual_references=["KONE_Door_Systems_Maintenance_2024.pdf (Pg 42)"],
+            recommended_actions=[MaintenanceStep(step_order=1, instruction="Inspect the sill groove")],
+            # Severity 8 without a safety term is rejected by the guardrail
+            safety_warnings=["Wear gloves"] if unsafe else ["Lock out power before servicing"]
+        )}
+
+    def invoke(self, prompt, config=None):
+        return asyncio.run(self.ainvoke(prompt, config))
+
+
+def install_stand_ins(options: argparse.Namespace, patch: Callable[[Any, str, Any], None] = setattr) -> FakeStructuredLLM:
+    """
+    Points the service singletons at in-memory stand-ins.
+    `patch` defaults to setattr; tests pass monkeypatch.setattr so everything is undone.
+    """
+    from qdrant_client import AsyncQdrantClient, QdrantClient
+    from src.core.tokens import count_tokens
+    from src.services.diagnosis_service import diagnosis_service
+    from src.services.diagnosis_cache import DiagnosisCache
+    from src.services.embedding_cache import EmbeddingCache
+    from src.services.embedding_providers import HashingEmbeddingProvider
+    from src.services.ingestion import SAMPLE_MANUALS
+    from src.services.llm_service import llm_service
+    from src.services.single_flight import SingleFlight
+    from src.services.vector_service import vector_service
+
+    # Embeddings: deterministic and local (cache kept in memory only)
+    embedder = HashingEmbeddingProvider(options.embedding_dimension)
+    patch(vector_service, "embeddings", embedder)
+    patch(vector_service, "vector_size", embedder.dimension)
+    patch(vector_service, "query_cache", EmbeddingCache(model_name=embedder.name))
+
+    # Qdrant: one in-memory instance per client, seeded with identical points
+    patch(vector_service, "client", QdrantClient(":memory:"))
+    patch(vector_service, "async_client", AsyncQdrantClient(":memory:"))
+    patch(vector_service, "mirror", None)
+    vector_service.upsert_manuals(SAMPLE_MANUALS)
+    asyncio.run(_copy_collection(vector_service))
+
+    fake = FakeStructuredLLM(options.llm_latency_ms, options.llm_jitter_ms,
+                             options.failure_rate, options.retry_rate, options.seed)
+    patch(llm_service, "structured_llm", fake)
+
+    # Resolve the tokenizer up front: a first lookup that tries to download the
+    # BPE file would otherwise stall the event loop inside the measured run
+    count_tokens("warmup")
+
+    # Fresh result cache/coalescer so earlier runs do not skew the numbers
+    patch(diagnosis_service, "cache", DiagnosisCache(options.cache_ttl_seconds, max_entries=100000))
+    patch(diagnosis_service, "flight", SingleFlight())
+    return fake
+
+
+async def _copy_collection(vector_service):
+    """Mirrors the sync in-memory collection into the async in-memory client."""
+    from qdrant_client.http import models
+
+    info = vector_service.client.get_collection(vector_service.collection_name)
+    await vector_service.async_client.create_collection(
+        collection_name=vector_service.collection_name,
+        vectors_config=models.VectorParams(size=info.config.params.vectors.size, distance=models.Distance.COSINE)
+    )
+    records, _ = vector_service.client.scroll(
+        collection_name=vector_service.collection_name, limit=10000, with_payload=True, with_vectors=True
+    )
+    await vector_service.async_client.upsert(
+        collection_name=vector_service.collection_name,
+        points=[models.PointStruct(id=r.id, vector=r.vector, payload=r.payload) for r in records]
+    )
+
+
+# ---------------------------------------------------------
+# Load generation
+# ---------------------------------------------------------
+
+def make_payloads(count: int, unique_faults: int, seed: int) -> List[Dict[str, Any]]:
+    """
+    Readings spread over `unique_faults` distinct fingerprints (the rest are repeats,
+    which exercise the result cache and request coalescing like a real fleet would).
+    """
+    rng = random.Random(seed)
+    faults = []
+    for i in range(max(1, unique_faults)):
+        faults.append({
+            "error_codes": rng.sample(ERROR_CODES, k=rng.randint(1, 2)),
+            "vibration_level_hz": round(rng.uniform(0.1, 6.0), 1),
+            "velocity_m_s": round(rng.uniform(0.0, 2.0), 1),
+            # Distinct door-cycle bands keep fingerprints unique per fault
+            "door_cycles_count": 10000 * (i + 1),
+        })
+    return [
+        {"elevator_id": f"BENCH-{i:05d}", **faults[rng.randrange(len(faults))]}
+        for i in range(count)
+    ]
+
+
+async def drive(app, payloads: List[Dict[str, Any]], concurrency: int) -> Dict[str, Any]:
+    """Sends every payload with at most `concurrency` requests in flight."""
+    from httpx import ASGITransport, AsyncClient
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    cache_hits = 0
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench", timeout=120.0) as client:
+        async def one(payload):
+            nonlocal cache_hits
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/api/v1/diagnose", json=payload)
+                latencies.append(time.perf_counter() - started)
+                statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+                if response.headers.get("X-Diagnosis-Cache") == "HIT":
+                    cache_hits += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(p) for p in payloads))
+        wall = time.perf_counter() - started
+
+    return {"latencies": latencies, "statuses": statuses, "cache_hits": cache_hits, "wall_seconds": wall}
+
+
+async def run_benchmark(options: argparse.Namespace, fake_llm: FakeStructuredLLM) -> Dict[str, Any]:
+    """Runs warmup + measured load and returns the result document."""
+    from src.core.timing import node_timings, summarize
+    from src.main import app
+    from src.services.diagnosis_service import diagnosis_service
+    from src.services.report_repair import repair_stats
+
+    if options.warmup:
+        await drive(app, make_payloads(options.warmup, options.unique_faults, options.seed + 1), options.concurrency)
+    node_timings.reset()
+    llm_calls_before = fake_llm.calls
+    repairs_before = repair_stats.snapshot()
+
+    payloads = make_payloads(options.requests, options.unique_faults, options.seed)
+    outcome = await drive(app, payloads, options.concurrency)
+
+    latency = summarize(outcome["latencies"])
+    repairs = repair_stats.snapshot()
+    return {
+        "benchmark": "diagnose",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "config": {
+            "requests": options.requests,
+            "concurrency": options.concurrency,
+            "unique_faults": options.unique_faults,
+            "warmup": options.warmup,
+            "llm_latency_ms": options.llm_latency_ms,
+            "llm_jitter_ms": options.llm_jitter_ms,
+            "failure_rate": options.failure_rate,
+            "retry_rate": options.retry_rate,
+            "cache_ttl_seconds": options.cache_ttl_seconds,
+            "embedding_dimension": options.embedding_dimension,
+            "seed": options.seed,
+        },
+        "results": {
+            "requests_per_second": round(len(payloads) / outcome["wall_seconds"], 2),
+            "wall_seconds": round(outcome["wall_seconds"], 3),
+            "latency": latency,
+            "status_codes": outcome["statuses"],
+            "cache_hits": outcome["cache_hits"],
+            "llm_calls": fake_llm.calls - llm_calls_before,
+            "repaired": repairs["repaired"] - repairs_before["repaired"],
+            "escalated": repairs["escalated"] - repairs_before["escalated"],
+            "coalescing": diagnosis_service.flight.stats(),
+            "nodes": node_timings.summary(),
+        },
+    }
+
+
+# ---------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------
+
+COMPARED_METRICS = [
+    ("requests_per_second", lambda r: r["requests_per_second"]),
+    ("p50_ms", lambda r: r["latency"].get("p50_ms")),
+    ("p95_ms", lambda r: r["latency"].get("p95_ms")),
+    ("p99_ms", lambda r: r["latency"].get("p99_ms")),
+    ("llm_calls", lambda r: r["llm_calls"]),
+]
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Dict[str, Optional[float]]]:
+    """Metric-by-metric delta of two result documents (percent change vs. the baseline)."""
+    deltas = {}
+    for name, get in COMPARED_METRICS:
+        new, old = get(current["results"]), get(baseline["results"])
+        change = None
+        if isinstance(new, (int, float)) and isinstance(old, (int, float)) and old:
+            change = round((new - old) / old * 100.0, 1)
+        deltas[name] = {"baseline": old, "current": new, "change_pct": change}
+    return deltas
+
+
+def print_report(result: Dict[str, Any], deltas: Optional[Dict[str, Any]] = None):
+    res = result["results"]
+    lat = res["latency"]
+    print("\n=== DIAGNOSE BENCHMARK ===")
+    print(f"Commit: {result['git_commit'] or 'unknown'}   Config: {json.dumps(result['config'])}")
+    print(f"Throughput: {res['requests_per_second']} req/s over {res['wall_seconds']}s")
+    print(f"Latency: p50 {lat.get('p50_ms')} ms | p95 {lat.get('p95_ms')} ms | p99 {lat.get('p99_ms')} ms")
+    print(f"Status codes: {res['status_codes']}   Cache hits: {res['cache_hits']}   LLM calls: {res['llm_calls']}")
+    print("Per-node time:")
+    for node, stats in sorted(res["nodes"].items()):
+        print(f"  {node:<9} n={stats['count']:<6} mean {stats['mean_ms']} ms  p95 {stats['p95_ms']} ms")
+    if deltas:
+        print("Versus baseline:")
+        for name, delta in deltas.items():
+            print(f"  {name:<20} {delta['baseline']} -> {delta['current']} ({delta['change_pct']}%)")
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline load test for /api/v1/diagnose")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--unique-faults", type=int, default=50, help="Distinct fingerprints among the requests")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests sent first")
+    parser.add_argument("--llm-latency-ms", type=float, default=800.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=200.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of LLM calls that raise")
+    parser.add_argument("--retry-rate", type=float, default=0.1, help="Share of drafts the guardrail rejects")
+    parser.add_argument("--cache-ttl-seconds", type=float, default=900.0, help="0 disables result caching")
+    parser.add_argument("--embedding-dimension", type=int, default=384)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="benchmark-results/diagnose.json")
+    parser.add_argument("--compare", help="Earlier result JSON to diff against")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    options = parse_args(argv)
+    fake_llm = install_stand_ins(options)
+    result = asyncio.run(run_benchmark(options, fake_llm))
+
+    deltas = None
+    if options.compare:
+        with open(options.compare, encoding="utf-8") as f:
+            deltas = compare(result, json.load(f))
+        result["comparison"] = {"baseline": options.compare, "deltas": deltas}
+
+    os.makedirs(os.path.dirname(os.path.abspath(options.output)), exist_ok=True)
+    with open(options.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+
+    print_report(result, deltas)
+    print(f"\nResults written to {options.output}")
+
+
+if __name__ == "__main__":
+    main()
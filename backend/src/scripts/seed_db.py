@@ -1,8 +1,11 @@
 """
 seed_db.py
 ----------
-Utility script to populate the Vector Database with mock KONE technical data.
-Run this once to give the AI a "Knowledge Base".
+Utility script to populate the Vector Database with KONE technical manuals.
+Ingests every PDF/text manual under MANUALS_PATH (or the directory given as the
+first argument). The directory must exist; when it holds no manuals the bundled
+samples seed an empty collection (see INGEST_SEED_SAMPLES).
+Re-running it is incremental: unchanged manuals are not re-embedded.
 """
 
 import sys
@@ -11,51 +14,26 @@ import os
 # Add parent directory to path so we can import src
 sys.path.append(os.path.join(os.path.dirname(__file__), "../../"))
 
-from src.services.vector_service import vector_service
-from src.core.schema import ManualChunk
-import asyncio
+from src.core.config import get_settings
+from src.services.ingestion import ingestion_pipeline
 
-def run_seed():
+def run_seed(directory: str):
     """
-    Creates fake technical manual entries and uploads them to Qdrant.
+    Syncs the Qdrant collection with the manual library.
     """
-    print("Starting Knowledge Base Seeding...")
-    
-    mock_data = [
-        ManualChunk(
-            chunk_id="1",
-            content="Error E-302 indicates a door obstruction during the closing cycle. "
-                    "This is often caused by debris in the bottom track or a misaligned photo-eye sensor. "
-                    "Technicians should inspect the sill groove and clean any particulate matter.",
-            source_doc="KONE_Door_Systems_Maintenance_2024.pdf",
-            page_number=42,
-            related_error_codes=["E-302"]
-        ),
-        ManualChunk(
-            chunk_id="2",
-            content="High vibration levels (> 4.0 Hz) in the main cabin often suggest "
-                    "wear on the guide rail rollers. If accompanied by screeching noise, "
-                    "verify lubrication levels on the guide shoes immediately to prevent rail damage.",
-            source_doc="KONE_Ride_Comfort_Standards.pdf",
-            page_number=12,
-            related_error_codes=["W-104", "VIB-HIGH"]
-        ),
-        ManualChunk(
-            chunk_id="3",
-            content="Safety Protocol for Pit Access: Before entering the elevator pit, "
-                    "engage the pit stop switch and verify the car is secured. "
-                    "Never enter the pit if water is present.",
-            source_doc="KONE_Global_Safety_Manual.pdf",
-            page_number=5,
-            related_error_codes=[]
-        )
-    ]
+    print(f"Starting Knowledge Base Seeding from {directory}...")
 
     try:
-        vector_service.upsert_manuals(mock_data)
-        print("Seeding Complete! Qdrant is now populated.")
+        report = ingestion_pipeline.sync(directory)
+        print(
+            f"Seeding Complete! {report.chunks} chunks from {report.files} documents "
+            f"({report.embedded} embedded, {report.unchanged} unchanged, {report.deleted} deleted) "
+            f"in {report.elapsed_seconds:.2f}s."
+        )
+        for source_doc, error in report.failed_files.items():
+            print(f"  Skipped {source_doc}: {error}")
     except Exception as e:
         print(f"Error during seeding: {e}")
 
 if __name__ == "__main__":
-    run_seed()
\ No newline at end of file
+    run_seed(sys.argv[1] if len(sys.argv) > 1 else get_settings().MANUALS_PATH)
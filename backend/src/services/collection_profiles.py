@@ -0,0 +1,107 @@
+"""
+collection_profiles.py
+----------------------
+Storage profiles for the Qdrant collection: how vectors are stored and indexed, and the
+matching search-time parameters.
+- full:   float32 vectors in RAM, no quantization (the exact-precision baseline).
+- scalar: int8 scalar quantization kept in RAM (~4x smaller), float32 originals on disk;
+          searches oversample the quantized index and rescore with the originals.
+- binary: 1-bit binary quantization in RAM (~32x smaller), originals on disk; needs more
+          oversampling and works best on high-dimensional OpenAI embeddings.
+The profile is picked by QDRANT_COLLECTION_PROFILE; the QDRANT_* overrides replace
+individual fields. Quantization and on_disk only take effect when the collection is
+created, so switching profiles means re-creating the collection and re-seeding.
+Combine with EMBEDDING_DIMENSION (shortened text-embedding-3 output) to cut memory further.
+"""
+
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Optional
+
+from qdrant_client.http import models
+
+from src.core.config import get_settings
+
+settings = get_settings()
+
+QUANTIZATION_TYPES = ("none", "scalar", "binary")
+
+
+@dataclass(frozen=True)
+class CollectionProfile:
+    name: str
+    quantization: str = "none"       # 'none' | 'scalar' | 'binary'
+    on_disk: bool = False            # Keep the original float32 vectors on disk (mmap)
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 100
+    search_hnsw_ef: Optional[int] = None   # None = Qdrant's default (ef_construct)
+    oversampling: float = 1.0        # Candidates fetched from the quantized index, as a multiple of limit
+    rescore: bool = True             # Re-rank those candidates with the original vectors
+
+    @property
+    def quantized(self) -> bool:
+        return self.quantization != "none"
+
+
+PROFILES: Dict[str, CollectionProfile] = {
+    "full": CollectionProfile(name="full"),
+    "scalar": CollectionProfile(name="scalar", quantization="scalar", on_disk=True, oversampling=2.0),
+    "binary": CollectionProfile(name="binary", quantization="binary", on_disk=True, oversampling=3.0),
+}
+
+
+def get_profile(name: str, **overrides: Any) -> CollectionProfile:
+    """Looks up a profile; `overrides` that are None keep the profile's value."""
+    if name not in PROFILES:
+        raise ValueError(f"Unknown collection profile '{name}'; expected one of {sorted(PROFILES)}.")
+    profile = replace(PROFILES[name], **{key: value for key, value in overrides.items() if value is not None})
+    if profile.quantization not in QUANTIZATION_TYPES:
+        raise ValueError(f"Unknown quantization '{profile.quantization}'; expected one of {QUANTIZATION_TYPES}.")
+    return profile
+
+
+def active_profile() -> CollectionProfile:
+    return get_profile(
+        settings.QDRANT_COLLECTION_PROFILE,
+        on_disk=settings.QDRANT_ON_DISK,
+        hnsw_m=settings.QDRANT_HNSW_M,
+        hnsw_ef_construct=settings.QDRANT_HNSW_EF_CONSTRUCT,
+        search_hnsw_ef=settings.QDRANT_SEARCH_HNSW_EF,
+        oversampling=settings.QDRANT_QUANTIZATION_OVERSAMPLING,
+        rescore=settings.QDRANT_QUANTIZATION_RESCORE,
+    )
+
+
+# ---------------------------------------------------------
+# Qdrant configuration
+# ---------------------------------------------------------
+
+def vectors_config(profile: CollectionProfile, size: int) -> models.VectorParams:
+    return models.VectorParams(size=size, distance=models.Distance.COSINE, on_disk=profile.on_disk)
+
+
+def hnsw_config(profile: CollectionProfile) -> models.HnswConfigDiff:
+    return models.HnswConfigDiff(m=profile.hnsw_m, ef_construct=profile.hnsw_ef_construct)
+
+
+def quantization_config(profile: CollectionProfile) -> Optional[models.QuantizationConfig]:
+    if profile.quantization == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if profile.quantization == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def search_params(profile: CollectionProfile) -> Optional[models.SearchParams]:
+    """Search-time parameters for the profile (None = Qdrant defaults)."""
+    quantization = models.QuantizationSearchParams(
+        rescore=profile.rescore, oversampling=profile.oversampling
+    ) if profile.quantized else None
+    if quantization is None and profile.search_hnsw_ef is None:
+        return None
+    return models.SearchParams(hnsw_ef=profile.search_hnsw_ef, quantization=quantization)
+
+
+# Exact (brute-force, full-precision) search: the baseline for recall checks
+EXACT_SEARCH_PARAMS = models.SearchParams(exact=True, quantization=models.QuantizationSearchParams(ignore=True))
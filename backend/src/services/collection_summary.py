@@ -0,0 +1,121 @@
+"""
+collection_summary.py
+---------------------
+Cached per-document chunk counts and error-code facets for the manual collection.
+The first read builds the summary with one payload-only scroll (two small fields per
+point, no vectors); after that VectorService keeps it current in-process:
+- upserted and deleted points are applied as deltas (no re-scan),
+- an upsert that may have partially failed invalidates it (rebuilt on the next read),
+- it also expires after a TTL so writes from other processes (seed_db.py) show up.
+"""
+
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+# (point_id, source_doc, related_error_codes)
+PointFacets = Tuple[str, str, Tuple[str, ...]]
+
+
+class CollectionSummary:
+    def __init__(self, ttl_seconds: float = 300.0, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._points: Optional[Dict[str, Tuple[str, Tuple[str, ...]]]] = None
+        self._documents: Counter = Counter()
+        self._error_codes: Counter = Counter()
+        self._built_at = 0.0
+        # Bumped by every write so a scroll that raced with one is not cached
+        self._generation = 0
+
+        self.builds = 0
+        self.hits = 0
+        self.invalidations = 0
+
+    def get(self, load: Callable[[], Iterable[PointFacets]]) -> Dict[str, Any]:
+        """The summary, rebuilt from `load()` (a full scroll) only when missing or expired."""
+        with self._lock:
+            if self._points is not None and self._clock() - self._built_at < self.ttl_seconds:
+                self.hits += 1
+                return self._snapshot()
+            generation = self._generation
+
+        points = {point_id: (source_doc, tuple(codes)) for point_id, source_doc, codes in load()}
+        with self._lock:
+            self._points = {}
+            self._documents.clear()
+            self._error_codes.clear()
+            for point_id, (source_doc, codes) in points.items():
+                self._add(point_id, source_doc, codes)
+            snapshot = self._snapshot()
+            self.builds += 1
+            if generation == self._generation:
+                self._built_at = self._clock()
+            else:
+                # The collection changed during the scroll; serve this result but do not keep it
+                self._points = None
+            return snapshot
+
+    def apply_upsert(self, points: Iterable[PointFacets]):
+        with self._lock:
+            self._generation += 1
+            if self._points is None:
+                return
+            for point_id, source_doc, codes in points:
+                self._remove(point_id)
+                self._add(point_id, source_doc, tuple(codes))
+
+    def apply_delete(self, point_ids: Iterable[str]):
+        with self._lock:
+            self._generation += 1
+            if self._points is None:
+                return
+            for point_id in point_ids:
+                self._remove(point_id)
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            if self._points is not None:
+                self.invalidations += 1
+            self._points = None
+
+    def _add(self, point_id: str, source_doc: str, codes: Tuple[str, ...]):
+        self._points[point_id] = (source_doc, codes)
+        self._documents[source_doc] += 1
+        self._error_codes.update(set(codes))
+
+    def _remove(self, point_id: str):
+        previous = self._points.pop(point_id, None)
+        if previous is None:
+            return
+        source_doc, codes = previous
+        self._documents[source_doc] -= 1
+        if self._documents[source_doc] <= 0:
+            del self._documents[source_doc]
+        for code in set(codes):
+            self._error_codes[code] -= 1
+            if self._error_codes[code] <= 0:
+                del self._error_codes[code]
+
+    def _snapshot(self) -> Dict[str, Any]:
+        return {
+            "chunks": len(self._points),
+            "documents": [
+                {"source_doc": doc, "chunks": count} for doc, count in sorted(self._documents.items())
+            ],
+            "error_codes": [
+                {"code": code, "chunks": count}
+                for code, count in sorted(self._error_codes.items(), key=lambda item: (-item[1], item[0]))
+            ],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cached": self._points is not None,
+            "builds": self.builds,
+            "hits": self.hits,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,100 @@
+"""
+diagnosis_cache.py
+------------------
+Result cache for repeat faults.
+Readings are reduced to a canonical fingerprint (sorted error codes + bucketed sensor
+values, ignoring elevator_id and timestamp), and validated DiagnosticResults are kept
+for a TTL in a size-bounded LRU.
+"""
+
+import hashlib
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from src.core.config import get_settings
+from src.core.observability import CACHE_LOOKUPS
+from src.core.schema import DiagnosticResult, TelemetryReading
+
+settings = get_settings()
+
+
+def _bucket(value: float, width: float) -> int:
+    """Maps a sensor value to the index of its band (e.g., 4.3 Hz with width 0.5 -> 8)."""
+    return math.floor(value / width) if width > 0 else value
+
+
+def telemetry_fingerprint(telemetry: TelemetryReading, trend_flags: Sequence[str] = ()) -> str:
+    """
+    Canonical key for 'the same fault seen again'.
+    Two readings share a fingerprint when they report the same error-code set and
+    their sensor values fall into the same bands. Trend flags (e.g. 'vibration_rising')
+    are part of the key when present, since they change the diagnosis prompt.
+    """
+    canonical = {
+        "error_codes": sorted({code.strip().upper() for code in telemetry.error_codes}),
+        "velocity": _bucket(telemetry.velocity_m_s, settings.FINGERPRINT_VELOCITY_BUCKET_M_S),
+        "vibration": _bucket(telemetry.vibration_level_hz, settings.FINGERPRINT_VIBRATION_BUCKET_HZ),
+        "door_cycles": _bucket(telemetry.door_cycles_count, settings.FINGERPRINT_DOOR_CYCLES_BUCKET),
+    }
+    if trend_flags:
+        canonical["trend"] = sorted(trend_flags)
+    encoded = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class DiagnosisCache:
+    def __init__(self, ttl_seconds: float, max_entries: int,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, DiagnosticResult]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[DiagnosticResult]:
+        """Returns a copy of the cached result, or None if absent/expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, result = entry
+                if expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    CACHE_LOOKUPS.labels(cache="diagnosis", result="hit").inc()
+                    return result.model_copy(deep=True)
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            CACHE_LOOKUPS.labels(cache="diagnosis", result="miss").inc()
+            return None
+
+    def put(self, key: str, result: DiagnosticResult):
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl_seconds, result.model_copy(deep=True))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+            }
@@ -0,0 +1,297 @@
+"""
+diagnosis_service.py
+--------------------
+Runs the diagnostic graph for a single TelemetryReading.
+Sits in front of `app_graph` so every entry point (REST, batch, streaming) shares
+the same result cache, and concurrent identical requests share one graph run.
+"""
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from src.agents.graph import app_graph, should_retry
+from src.agents.streaming import summary_token_sink
+from src.core.config import get_settings
+from src.core.observability import COALESCED_CALLS, VALIDATION_FAILURES
+from src.core.schema import (
+    BatchDiagnosticItem, BatchDiagnosticResponse, DiagnosticResult, TelemetryReading
+)
+from src.services.diagnosis_cache import DiagnosisCache, telemetry_fingerprint
+from src.services.single_flight import SingleFlight
+from src.services.telemetry_archive import telemetry_archive
+from src.services.telemetry_history import TrendFeatures, telemetry_history
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class DiagnosisError(Exception):
+    """Raised when the agent finishes without producing a report."""
+
+
+def initial_state(telemetry: TelemetryReading, trend: Optional[TrendFeatures] = None) -> dict:
+    """Initial AgentState for a graph run."""
+    return {
+        "telemetry": telemetry,
+        "trend": trend,
+        "retry_count": 0,
+        "validation_error": None,
+        "repair_count": 0
+    }
+
+
+class DiagnosisService:
+    def __init__(self):
+        self.cache = DiagnosisCache(
+            ttl_seconds=settings.DIAGNOSIS_CACHE_TTL_SECONDS,
+            max_entries=settings.DIAGNOSIS_CACHE_MAX_ENTRIES
+        )
+        # Coalesces concurrent cache misses for the same fingerprint
+        self.flight = SingleFlight()
+
+    async def diagnose(self, telemetry: TelemetryReading, recorded: bool = False) -> Tuple[DiagnosticResult, bool]:
+        """
+        Returns (report, cache_hit).
+        `recorded` is True when the caller (the telemetry monitor) has already recorded the
+        reading in the history and the archive.
+        Repeat faults are served from the cache; otherwise the graph runs
+        (Retrieve -> Triage -> Diagnose -> Validate -> Repair) and a validated report is cached.
+        Concurrent calls for the same fingerprint share a single graph run.
+        """
+        key, trend = self._prepare(telemetry, recorded)
+        return await self._diagnose(telemetry, key, trend)
+
+    def _prepare(self, telemetry: TelemetryReading,
+                 recorded: bool = False) -> Tuple[str, Optional[TrendFeatures]]:
+        """
+        Records the reading in its elevator's history and the archive (unless the caller
+        already did) and returns (cache key, trend). Trend flags are part of the key:
+        a drifting elevator gets its own diagnosis.
+        """
+        trend = None
+        if recorded:
+            if settings.HISTORY_ENABLED:
+                trend = telemetry_history.features(telemetry.elevator_id)
+        else:
+            if settings.ARCHIVE_ENABLED:
+                telemetry_archive.append(telemetry)
+            if settings.HISTORY_ENABLED:
+                trend = telemetry_history.record(telemetry)
+        return telemetry_fingerprint(telemetry, trend.flags() if trend else ()), trend
+
+    async def _diagnose(self, telemetry: TelemetryReading, key: str,
+                        trend: Optional[TrendFeatures]) -> Tuple[DiagnosticResult, bool]:
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached, True
+
+        report, shared = await self.flight.do(key, lambda: self._run_graph(key, telemetry, trend))
+        if shared:
+            COALESCED_CALLS.inc()
+        # Callers that joined another run get their own copy of the shared report
+        return (report.model_copy(deep=True) if shared else report), False
+
+    async def _run_graph(self, key: str, telemetry: TelemetryReading,
+                         trend: Optional[TrendFeatures] = None) -> DiagnosticResult:
+        final_state = await app_graph.ainvoke(initial_state(telemetry, trend))
+
+        report = final_state.get("diagnostic_report")
+        if not report:
+            raise DiagnosisError("Agent failed to generate a report.")
+
+        if isinstance(report, dict):
+            report = DiagnosticResult(**report)
+
+        # Only reports that passed the safety guardrail are reused
+        if final_state.get("validation_error") is None:
+            self.cache.put(key, report)
+        else:
+            VALIDATION_FAILURES.inc()
+
+        return report
+
+    async def diagnose_batch(self, raw_readings: List[Any]) -> BatchDiagnosticResponse:
+        """
+        Diagnoses many readings at once.
+        1. Validates each reading on its own (a bad reading only fails its own item).
+        2. Collapses identical fault fingerprints so each distinct fault runs once.
+        3. Runs the unique faults concurrently, bounded by BATCH_DIAGNOSE_CONCURRENCY.
+        4. Returns per-item results or errors in input order.
+        """
+        items: List[Optional[BatchDiagnosticItem]] = [None] * len(raw_readings)
+        groups: Dict[str, List[int]] = {}
+        representatives: Dict[str, Tuple[TelemetryReading, Optional[TrendFeatures]]] = {}
+
+        for index, raw in enumerate(raw_readings):
+            try:
+                reading = TelemetryReading.model_validate(raw)
+            except ValidationError as e:
+                items[index] = BatchDiagnosticItem(
+                    index=index,
+                    elevator_id=_raw_elevator_id(raw),
+                    status="error",
+                    error=_format_validation_error(e)
+                )
+                continue
+
+            # Recorded in input order, so each reading's trend includes the ones before it
+            key, trend = self._prepare(reading)
+            groups.setdefault(key, []).append(index)
+            representatives.setdefault(key, (reading, trend))
+
+        semaphore = asyncio.Semaphore(max(1, settings.BATCH_DIAGNOSE_CONCURRENCY))
+
+        async def run(key: str, reading: TelemetryReading, trend: Optional[TrendFeatures]):
+            async with semaphore:
+                try:
+                    report, cache_hit = await self._diagnose(reading, key, trend)
+                    return report, cache_hit, None
+                except Exception as e:
+                    logger.exception("Error processing batch item: %s", e)
+                    return None, False, str(e) or type(e).__name__
+
+        outcomes = await asyncio.gather(*(
+            run(key, reading, trend) for key, (reading, trend) in representatives.items()
+        ))
+
+        for (key, indices), (report, cache_hit, error) in zip(groups.items(), outcomes):
+            for position, index in enumerate(indices):
+                items[index] = BatchDiagnosticItem(
+                    index=index,
+                    elevator_id=_raw_elevator_id(raw_readings[index]),
+                    status="ok" if report is not None else "error",
+                    result=report,
+                    error=error,
+                    cached=cache_hit,
+                    deduplicated=position > 0
+                )
+
+        succeeded = sum(1 for item in items if item.status == "ok")
+        return BatchDiagnosticResponse(
+            total=len(items),
+            unique_faults=len(representatives),
+            succeeded=succeeded,
+            failed=len(items) - succeeded,
+            results=items
+        )
+
+    async def stream(self, telemetry: TelemetryReading) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Runs the graph via astream and yields (event, data) pairs as work completes:
+        - 'retrieved': manual sources found for the reading
+        - 'token':     new fault_summary text while the model is generating
+        - 'repaired':  a rejected draft was fixed locally (no LLM retry needed)
+        - 'retry':     a draft that could not be repaired and the validation_error that sent it back
+        - 'report':    the final report (also the only event on a cache hit)
+        - 'error':     the run failed
+        """
+        key, trend = self._prepare(telemetry)
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield "report", {"report": cached.model_dump(mode="json"), "cached": True, "validated": True}
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def pump():
+            # The sink is set inside this task, so only this graph run streams tokens
+            summary_token_sink.set(lambda delta: queue.put_nowait(("token", delta)))
+            try:
+                async for update in app_graph.astream(initial_state(telemetry, trend)):
+                    queue.put_nowait(("update", update))
+            except Exception as e:
+                queue.put_nowait(("failed", e))
+            finally:
+                queue.put_nowait(None)
+
+        task = asyncio.create_task(pump())
+        state: Dict[str, Any] = initial_state(telemetry, trend)
+        try:
+            while (item := await queue.get()) is not None:
+                kind, payload = item
+
+                if kind == "token":
+                    yield "token", {"delta": payload}
+                elif kind == "failed":
+                    logger.error("Error processing stream: %s", payload)
+                    yield "error", {"detail": str(payload)}
+                    return
+                else:
+                    for node, output in payload.items():
+                        if node == "__end__":
+                            continue
+                        state.update(output or {})
+                        event = _node_event(node, output or {}, state)
+                        if event is not None:
+                            yield event
+
+            report = state.get("diagnostic_report")
+            if not report:
+                yield "error", {"detail": "Agent failed to generate a report."}
+                return
+
+            if isinstance(report, dict):
+                report = DiagnosticResult(**report)
+            validated = state.get("validation_error") is None
+            if validated:
+                self.cache.put(key, report)
+            else:
+                VALIDATION_FAILURES.inc()
+
+            yield "report", {
+                "report": report.model_dump(mode="json"),
+                "cached": False,
+                "validated": validated,
+                "token_usage": state.get("token_usage"),
+                "trend": trend.to_dict() if trend else None
+            }
+        finally:
+            # Client went away (or we are done): never leave the graph running unobserved
+            if not task.done():
+                task.cancel()
+
+
+def _node_event(node: str, output: Dict[str, Any], state: Dict[str, Any]) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Translates one graph node update into a client-facing stream event."""
+    if node == "retrieve":
+        return "retrieved", {
+            "sources": [
+                {
+                    "chunk_id": doc.chunk_id,
+                    "source_doc": doc.source_doc,
+                    "page_number": doc.page_number,
+                    "score": doc.score
+                }
+                for doc in output.get("retrieved_docs", [])
+            ]
+        }
+    if node == "repair" and not state.get("validation_error"):
+        return "repaired", {"repair_count": state.get("repair_count", 0)}
+    if node == "repair":
+        return "retry", {
+            "retry_count": state.get("retry_count", 0),
+            "validation_error": state["validation_error"],
+            # Mirrors the graph's own routing decision
+            "will_retry": should_retry(state) == "diagnose"
+        }
+    return None
+
+
+def _raw_elevator_id(raw: Any) -> Optional[str]:
+    value = raw.get("elevator_id") if isinstance(raw, dict) else None
+    return value if isinstance(value, str) else None
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    """Compact 'field: message' summary of a Pydantic validation error."""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'reading'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+
+# Singleton instance for import
+diagnosis_service = DiagnosisService()
@@ -0,0 +1,130 @@
+"""
+embedding_cache.py
+------------------
+Two-tier cache for query embeddings.
+Tier 1 is an in-process LRU (bounded by entry count).
+Tier 2 is a local SQLite file, so vectors survive restarts and are shared by workers.
+Entries are keyed by embedding model name + normalized query text.
+"""
+
+import os
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.core.observability import CACHE_LOOKUPS
+
+CacheKey = Tuple[str, str]
+
+
+def normalize_query(text: str) -> str:
+    """Collapses whitespace so 'E-302 ' and ' E-302' share one cache entry."""
+    return " ".join(text.split())
+
+
+class EmbeddingCache:
+    def __init__(self, model_name: str, max_entries: int = 4096, db_path: Optional[str] = None):
+        """
+        model_name: part of every key, so switching models never serves stale vectors.
+        max_entries: size bound of the in-memory LRU tier.
+        db_path: SQLite file for the persistent tier (None disables it).
+        """
+        self.model_name = model_name
+        self.max_entries = max(1, max_entries)
+        self._memory: "OrderedDict[CacheKey, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._db = self._open_db(db_path)
+
+    @staticmethod
+    def _open_db(db_path: str) -> sqlite3.Connection:
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        # WAL lets several uvicorn workers read while one writes
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS query_embeddings ("
+            " model TEXT NOT NULL,"
+            " query TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " PRIMARY KEY (model, query))"
+        )
+        return conn
+
+    def _key(self, text: str) -> CacheKey:
+        return (self.model_name, normalize_query(text))
+
+    def _remember(self, key: CacheKey, vector: List[float]):
+        """Inserts into the LRU tier and evicts the least recently used entries."""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, text: str) -> Optional[List[float]]:
+        """Returns the cached vector for text, or None on a miss."""
+        key = self._key(text)
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                CACHE_LOOKUPS.labels(cache="embedding", result="hit").inc()
+                return vector
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT vector FROM query_embeddings WHERE model = ? AND query = ?", key
+                ).fetchone()
+                if row is not None:
+                    vector = array("f", row[0]).tolist()
+                    self._remember(key, vector)
+                    self.disk_hits += 1
+                    CACHE_LOOKUPS.labels(cache="embedding", result="disk_hit").inc()
+                    return vector
+
+            self.misses += 1
+            CACHE_LOOKUPS.labels(cache="embedding", result="miss").inc()
+            return None
+
+    def put(self, text: str, vector: List[float]):
+        """Stores a vector in both tiers."""
+        key = self._key(text)
+        with self._lock:
+            self._remember(key, list(vector))
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (model, query, vector) VALUES (?, ?, ?)",
+                    (*key, array("f", vector).tobytes())
+                )
+
+    def get_or_embed(self, text: str, embed: Callable[[str], List[float]]) -> List[float]:
+        """Returns the cached vector, computing and storing it with `embed` on a miss."""
+        vector = self.get(text)
+        if vector is None:
+            vector = embed(normalize_query(text))
+            self.put(text, vector)
+        return vector
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+            }
@@ -0,0 +1,178 @@
+"""
+embedding_providers.py
+----------------------
+Pluggable embedding backends, selected by settings.EMBEDDING_PROVIDER.
+- 'openai':  OpenAI embeddings API (remote round trip per call).
+- 'local':   a sentence-transformers model loaded from a local path, run on CPU in a
+             thread pool with batching (no network; for air-gapped rigs).
+- 'hashing': deterministic feature-hashing embedder (no model, no network; for tests).
+Every provider implements the LangChain Embeddings interface and reports its
+vector dimension, which sizes the Qdrant collection.
+"""
+
+import asyncio
+import hashlib
+import math
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+from src.core.config import get_settings
+from src.core.http_clients import openai_embedding_clients
+
+settings = get_settings()
+
+# Native output sizes of the OpenAI embedding models
+OPENAI_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+
+
+class EmbeddingProvider(Embeddings):
+    """
+    Base class for embedding backends.
+    `name` identifies the vector space (used to namespace cached vectors),
+    `dimension` is the length of every vector it returns.
+    """
+    name: str
+    dimension: int
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    def __init__(self, model: str, dimension: Optional[int] = None):
+        native = OPENAI_DIMENSIONS.get(model)
+        if dimension is None and native is None:
+            raise ValueError(f"Unknown vector size for '{model}'; set EMBEDDING_DIMENSION.")
+        self.dimension = dimension or native
+        self.name = model if self.dimension == native else f"{model}@{self.dimension}"
+
+        self.model = model
+        # text-embedding-3 models can return shortened vectors natively
+        self.shortened = self.dimension if self.dimension != native else None
+        # Created on the first embed call, so building the provider needs no OPENAI_API_KEY
+        self._client: Optional[OpenAIEmbeddings] = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> OpenAIEmbeddings:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    if not settings.OPENAI_API_KEY:
+                        raise RuntimeError("OPENAI_API_KEY is not set; it is required for OpenAI embeddings.")
+                    # Shares the tuned connection pool with the chat model (see http_clients)
+                    client, async_client = openai_embedding_clients()
+                    self._client = OpenAIEmbeddings(
+                        model=self.model, dimensions=self.shortened, api_key=settings.OPENAI_API_KEY,
+                        client=client, async_client=async_client
+                    )
+        return self._client
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.client.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.client.embed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.client.aembed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.client.aembed_query(text)
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """
+    CPU embedder backed by a sentence-transformers model directory (e.g. all-MiniLM-L6-v2,
+    or an ONNX export of it). Requires the optional 'sentence-transformers' package.
+    Encoding is CPU-bound, so async calls run in a dedicated thread pool.
+    """
+
+    def __init__(self, model_path: str, batch_size: int = 32, max_workers: int = 2):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise RuntimeError("EMBEDDING_PROVIDER='local' requires the 'sentence-transformers' package.") from e
+
+        self.model = SentenceTransformer(model_path, device="cpu")
+        self.dimension = self.model.get_sentence_embedding_dimension()
+        self.name = f"local:{model_path}"
+        self.batch_size = max(1, batch_size)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="embed")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        vectors = self.model.encode(
+            texts, batch_size=self.batch_size, normalize_embeddings=True, show_progress_bar=False
+        )
+        return [vector.tolist() for vector in vectors]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, self.embed_documents, texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Deterministic bag-of-features embedder: word tokens and character trigrams are
+    hashed (blake2b, stable across processes) into signed buckets and L2-normalized.
+    Texts sharing codes/words end up close in cosine space, which is enough for tests
+    and offline smoke runs.
+    """
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+        self.name = f"hashing-{dimension}"
+
+    def _features(self, text: str) -> List[str]:
+        words = re.findall(r"[a-z0-9]+(?:-[a-z0-9]+)*", text.lower())
+        grams = [w[i:i + 3] for w in words for i in range(max(1, len(w) - 2))]
+        return [f"w:{w}" for w in words] + [f"g:{g}" for g in grams]
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimension
+        for feature in self._features(text):
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vector[value % self.dimension] += 1.0 if (value >> 63) & 1 else -1.0
+
+        norm = math.sqrt(sum(v * v for v in vector))
+        return [v / norm for v in vector] if norm else vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return self.embed_query(text)
+
+
+def build_embedding_provider() -> EmbeddingProvider:
+    """Creates the provider selected by settings.EMBEDDING_PROVIDER."""
+    provider = settings.EMBEDDING_PROVIDER
+    if provider == "openai":
+        return OpenAIEmbeddingProvider(settings.EMBEDDING_MODEL, settings.EMBEDDING_DIMENSION)
+    if provider == "local":
+        return LocalEmbeddingProvider(
+            settings.EMBEDDING_LOCAL_MODEL_PATH,
+            batch_size=settings.EMBEDDING_LOCAL_BATCH_SIZE,
+            max_workers=settings.EMBEDDING_LOCAL_THREADS
+        )
+    if provider == "hashing":
+        return HashingEmbeddingProvider(settings.EMBEDDING_DIMENSION or 384)
+    raise ValueError(f"Unknown EMBEDDING_PROVIDER '{provider}' (expected 'openai', 'local' or 'hashing').")
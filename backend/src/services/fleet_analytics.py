@@ -0,0 +1,218 @@
+"""
+fleet_analytics.py
+------------------
+Fleet-level aggregations over the telemetry archive.
+Every query streams a filtered, column-projected scan (see TelemetryArchive.batches):
+each record batch is reduced with Arrow group-bys or NumPy array math and the partial
+results are merged, so memory depends on the number of groups, not on the readings.
+- site_summary:       readings, elevators, sensor means/maxima and error rate per site.
+- vibration_trends:   least-squares slope of each site's daily mean vibration.
+- error_cooccurrence: error-code pairs reported together on the same reading.
+"""
+
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from src.services.telemetry_archive import TelemetryArchive
+
+
+# Running partial aggregates are merged into one table after this many batches
+_MERGE_EVERY = 64
+
+
+class _PartialGroupBy:
+    """
+    Group-by over a stream of batches. Each batch is aggregated on its own and the
+    partials are combined by re-aggregating them (sums of counts/sums, max of maxima).
+    `aggregations` are (column, batch function, merge function, output name); with
+    none, the result is the distinct key combinations.
+    """
+
+    def __init__(self, keys: List[str], aggregations: List[Tuple[str, str, str, str]]):
+        self.keys = keys
+        self.aggregations = aggregations
+        self._partials: List[pa.Table] = []
+
+    def add(self, table: pa.Table):
+        self._partials.append(self._aggregate(table, merge=False))
+        if len(self._partials) >= _MERGE_EVERY:
+            self._partials = [self.result()]
+
+    def result(self) -> Optional[pa.Table]:
+        if not self._partials:
+            return None
+        if len(self._partials) == 1:
+            return self._partials[0]
+        return self._aggregate(pa.concat_tables(self._partials), merge=True)
+
+    def _aggregate(self, table: pa.Table, merge: bool) -> pa.Table:
+        specs = [(name, merge_fn) if merge else (column, fn) for column, fn, merge_fn, name in self.aggregations]
+        grouped = table.group_by(self.keys).aggregate(specs)
+        columns = {key: grouped[key] for key in self.keys}
+        for (source, function), (_, _, _, name) in zip(specs, self.aggregations):
+            columns[name] = grouped[f"{source}_{function}"]
+        return pa.table(columns)
+
+
+def site_summary(archive: TelemetryArchive, days: int, site: Optional[str] = None,
+                 today: Optional[date] = None) -> List[Dict[str, Any]]:
+    totals = _PartialGroupBy(["site"], [
+        ("elevator_id", "count", "sum", "readings"),
+        ("velocity_m_s", "sum", "sum", "velocity_sum"),
+        ("vibration_level_hz", "sum", "sum", "vibration_sum"),
+        ("vibration_level_hz", "max", "max", "vibration_max"),
+        ("has_error", "sum", "sum", "errors"),
+    ])
+    # Distinct (site, elevator) pairs: bounded by the fleet size
+    elevators = _PartialGroupBy(["site", "elevator_id"], [])
+
+    columns = ["site", "elevator_id", "velocity_m_s", "vibration_level_hz", "error_codes"]
+    for batch in archive.batches(columns, days, site, today=today):
+        if batch.num_rows == 0:
+            continue
+        table = pa.Table.from_batches([batch])
+        has_error = pc.cast(pc.greater(pc.fill_null(pc.list_value_length(table["error_codes"]), 0), 0), pa.int64())
+        totals.add(table.append_column("has_error", has_error))
+        elevators.add(table.select(["site", "elevator_id"]))
+
+    summary = totals.result()
+    if summary is None:
+        return []
+    distinct = elevators.result().group_by("site").aggregate([("elevator_id", "count")])
+    elevator_counts = dict(zip(distinct["site"].to_pylist(), distinct["elevator_id_count"].to_pylist()))
+
+    rows = summary.sort_by("site").to_pylist()
+    return [
+        {
+            "site": row["site"],
+            "readings": row["readings"],
+            "elevators": elevator_counts[row["site"]],
+            "mean_velocity_m_s": round(row["velocity_sum"] / row["readings"], 4),
+            "mean_vibration_hz": round(row["vibration_sum"] / row["readings"], 4),
+            "max_vibration_hz": round(row["vibration_max"], 4),
+            "error_rate": round(row["errors"] / row["readings"], 4),
+        }
+        for row in rows
+    ]
+
+
+def vibration_trends(archive: TelemetryArchive, days: int, min_slope_hz_per_day: float,
+                     site: Optional[str] = None, today: Optional[date] = None) -> List[Dict[str, Any]]:
+    """
+    Sites whose daily mean vibration rises by at least `min_slope_hz_per_day`,
+    steepest first. A site needs readings on two or more days to have a slope.
+    """
+    per_day = _PartialGroupBy(["site", "day"], [
+        ("vibration_level_hz", "sum", "sum", "vibration_sum"),
+        ("vibration_level_hz", "count", "sum", "readings"),
+    ])
+    for batch in archive.batches(["site", "day", "vibration_level_hz"], days, site, today=today):
+        if batch.num_rows:
+            per_day.add(pa.Table.from_batches([batch]))
+
+    daily = per_day.result()
+    if daily is None:
+        return []
+
+    encoded = pc.dictionary_encode(daily["site"]).combine_chunks()
+    sites = encoded.dictionary.to_pylist()
+    index = encoded.indices.to_numpy()
+    x = daily["day"].to_numpy(zero_copy_only=False).astype("datetime64[D]").astype(np.float64)
+    counts = daily["readings"].to_numpy()
+    y = daily["vibration_sum"].to_numpy() / counts
+
+    # Per-site least squares via weighted bincounts (x centred to keep the sums small)
+    x = x - x.min()
+    k = len(sites)
+    n = np.bincount(index, minlength=k).astype(np.float64)
+    sum_x = np.bincount(index, x, k)
+    sum_y = np.bincount(index, y, k)
+    sum_xx = np.bincount(index, x * x, k)
+    sum_xy = np.bincount(index, x * y, k)
+    readings = np.bincount(index, counts, k)
+    weighted_y = np.bincount(index, y * counts, k)
+
+    denominator = n * sum_xx - sum_x ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where(denominator > 0, (n * sum_xy - sum_x * sum_y) / denominator, np.nan)
+
+    rising = np.flatnonzero(~np.isnan(slope) & (slope >= min_slope_hz_per_day))
+    rising = rising[np.argsort(-slope[rising], kind="stable")]
+    return [
+        {
+            "site": sites[i],
+            "slope_hz_per_day": round(float(slope[i]), 4),
+            "days": int(n[i]),
+            "readings": int(readings[i]),
+            "mean_vibration_hz": round(float(weighted_y[i] / readings[i]), 4),
+        }
+        for i in rising
+    ]
+
+
+def error_cooccurrence(archive: TelemetryArchive, days: int, site: Optional[str] = None,
+                       min_count: int = 1, limit: int = 50, today: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Error-code pairs seen on the same reading, most frequent first.
+    Batches are streamed: each one becomes a (readings with >= 2 codes) x (codes)
+    incidence matrix whose Gram matrix is added to the running pair counts.
+    `jaccard` is pair count / readings reporting either code.
+    """
+    vocabulary: Dict[str, int] = {}
+    code_counts = np.zeros(0, dtype=np.int64)
+    pair_counts = np.zeros((0, 0), dtype=np.int64)
+    scanned = 0
+    with_codes = 0
+
+    for batch in archive.batches(["error_codes"], days, site, today=today):
+        scanned += batch.num_rows
+        codes = batch.column(0)
+        flat = pc.list_flatten(codes)
+        if len(flat) == 0:
+            continue
+
+        for code in pc.unique(flat).to_pylist():
+            vocabulary.setdefault(code, len(vocabulary))
+        k = len(vocabulary)
+        if k > len(code_counts):
+            code_counts = np.pad(code_counts, (0, k - len(code_counts)))
+            pair_counts = np.pad(pair_counts, ((0, k - len(pair_counts)), (0, k - len(pair_counts))))
+
+        value_set = pa.array(list(vocabulary), pa.string())
+        code_index = pc.index_in(flat, value_set=value_set).to_numpy()
+        parents = pc.list_parent_indices(codes).to_numpy()
+
+        # One (reading, code) entry per reading even if a code is repeated in its list
+        entries = np.unique(parents.astype(np.int64) * k + code_index)
+        parents, code_index = entries // k, entries % k
+        code_counts += np.bincount(code_index, minlength=k)
+        per_reading = np.bincount(parents)
+        with_codes += int(np.count_nonzero(per_reading))
+
+        multi = per_reading[parents] >= 2
+        if not multi.any():
+            continue
+        rows, row_index = np.unique(parents[multi], return_inverse=True)
+        incidence = np.zeros((len(rows), k), dtype=np.float32)
+        incidence[row_index, code_index[multi]] = 1.0
+        pair_counts += np.rint(incidence.T @ incidence).astype(np.int64)
+
+    names = list(vocabulary)
+    first, second = np.triu_indices(len(names), k=1)
+    counts = pair_counts[first, second] if len(names) > 1 else np.zeros(0, dtype=np.int64)
+    keep = np.flatnonzero(counts >= max(1, min_count))
+    keep = keep[np.argsort(-counts[keep], kind="stable")][:limit]
+
+    pairs = []
+    for i in keep:
+        a, b, together = first[i], second[i], int(counts[i])
+        pairs.append({
+            "codes": sorted([names[a], names[b]]),
+            "count": together,
+            "jaccard": round(together / (code_counts[a] + code_counts[b] - together), 4),
+        })
+    return {"readings": scanned, "readings_with_codes": with_codes, "pairs": pairs}
@@ -0,0 +1,397 @@
+"""
+ingestion.py
+------------
+Document ingestion: turns a directory of PDF/text manuals into ManualChunks and
+syncs them into Qdrant incrementally.
+- Parsing + chunking runs in a process pool (PDF text extraction is CPU-bound).
+- chunk_id is a UUID derived from a SHA-256 of (source_doc, page, content) and is used
+  as the Qdrant point ID, so the same chunk always maps to the same point.
+- A manifest of file sizes/mtimes/hashes lets unchanged files skip parsing entirely.
+- Only chunks missing from the collection are embedded and upserted; points that are
+  no longer produced by the library are deleted.
+Re-ingesting an unchanged library therefore costs one ID scroll and zero embedding calls.
+"""
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from src.core.config import get_settings
+from src.core.schema import ManualChunk
+from src.services.rate_limiter import TokenBucket
+from src.services.vector_service import vector_service
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+SUPPORTED_SUFFIXES = (".pdf", ".txt", ".md")
+
+# Text manuals can mark page breaks with form feeds (as pdftotext does)
+_PAGE_BREAK = "\f"
+
+
+# ---------------------------------------------------------
+# Chunk identity
+# ---------------------------------------------------------
+
+def chunk_id_for(source_doc: str, page_number: int, content: str) -> str:
+    """Deterministic point ID: a UUID built from the SHA-256 of the chunk's identity."""
+    digest = hashlib.sha256(f"{source_doc}\x00{page_number}\x00{content}".encode("utf-8")).digest()
+    return str(uuid.UUID(bytes=digest[:16]))
+
+
+def make_chunk(source_doc: str, page_number: int, content: str,
+               related_error_codes: Sequence[str]) -> ManualChunk:
+    return ManualChunk(
+        chunk_id=chunk_id_for(source_doc, page_number, content),
+        content=content,
+        source_doc=source_doc,
+        page_number=page_number,
+        related_error_codes=list(related_error_codes)
+    )
+
+
+# Small built-in library used when MANUALS_PATH holds no documents (demo/dev seeding)
+SAMPLE_MANUALS = [
+    make_chunk(
+        "KONE_Door_Systems_Maintenance_2024.pdf", 42,
+        "Error E-302 indicates a door obstruction during the closing cycle. "
+        "This is often caused by debris in the bottom track or a misaligned photo-eye sensor. "
+        "Technicians should inspect the sill groove and clean any particulate matter.",
+        ["E-302"]
+    ),
+    make_chunk(
+        "KONE_Ride_Comfort_Standards.pdf", 12,
+        "High vibration levels (> 4.0 Hz) in the main cabin often suggest "
+        "wear on the guide rail rollers. If accompanied by screeching noise, "
+        "verify lubrication levels on the guide shoes immediately to prevent rail damage.",
+        ["W-104", "VIB-HIGH"]
+    ),
+    make_chunk(
+        "KONE_Global_Safety_Manual.pdf", 5,
+        "Safety Protocol for Pit Access: Before entering the elevator pit, "
+        "engage the pit stop switch and verify the car is secured. "
+        "Never enter the pit if water is present.",
+        []
+    ),
+]
+
+
+# ---------------------------------------------------------
+# Parsing (runs in worker processes)
+# ---------------------------------------------------------
+
+@dataclass(frozen=True)
+class ChunkingOptions:
+    chunk_chars: int
+    overlap_chars: int
+    error_code_pattern: str
+
+
+def read_pages(path: str) -> List[str]:
+    """Text of each page (PDF pages, or form-feed separated pages of a text file)."""
+    if path.lower().endswith(".pdf"):
+        try:
+            from pypdf import PdfReader
+        except ImportError as e:
+            raise RuntimeError("Ingesting PDF manuals requires the 'pypdf' package.") from e
+        return [page.extract_text() or "" for page in PdfReader(path).pages]
+
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return f.read().split(_PAGE_BREAK)
+
+
+def split_text(text: str, chunk_chars: int, overlap_chars: int) -> List[str]:
+    """
+    Packs paragraphs into chunks of at most chunk_chars.
+    A paragraph longer than that is cut into overlapping windows.
+    """
+    paragraphs = [" ".join(p.split()) for p in re.split(r"\n\s*\n", text)]
+    chunks, current = [], ""
+    for paragraph in filter(None, paragraphs):
+        if len(paragraph) > chunk_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            step = max(1, chunk_chars - overlap_chars)
+            chunks.extend(paragraph[i:i + chunk_chars] for i in range(0, len(paragraph) - overlap_chars, step))
+        elif current and len(current) + 1 + len(paragraph) > chunk_chars:
+            chunks.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def parse_document(path: str, source_doc: str, options: ChunkingOptions) -> List[ManualChunk]:
+    """Parses one manual into chunks tagged with the error codes they mention."""
+    code_pattern = re.compile(options.error_code_pattern)
+    chunks = []
+    for page_number, page_text in enumerate(read_pages(path), start=1):
+        for content in split_text(page_text, options.chunk_chars, options.overlap_chars):
+            codes = sorted(set(code_pattern.findall(content)))
+            chunks.append(make_chunk(source_doc, page_number, content, codes))
+    return chunks
+
+
+def _parse_job(job: Tuple[str, str, ChunkingOptions]) -> Tuple[str, List[ManualChunk], Optional[str]]:
+    """Process-pool entry point; errors are returned so one bad file does not stop the run."""
+    path, source_doc, options = job
+    try:
+        return source_doc, parse_document(path, source_doc, options), None
+    except Exception as e:
+        return source_doc, [], f"{type(e).__name__}: {e}"
+
+
+def _parse_context():
+    """
+    Start method for the parse pool. Not fork: the server process holds locks, HTTP pools
+    and gRPC channels in other threads, which a forked child could inherit mid-use and
+    deadlock on. The fork server imports this module once, so workers start without
+    re-importing the app.
+    """
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload([__name__])
+    return context
+
+
+# ---------------------------------------------------------
+# Pipeline
+# ---------------------------------------------------------
+
+@dataclass
+class IngestionReport:
+    files: int = 0
+    parsed_files: int = 0
+    reused_files: int = 0
+    failed_files: Dict[str, str] = field(default_factory=dict)
+    chunks: int = 0
+    embedded: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+    upsert_failed: int = 0
+    # Profile search vs exact search (see VectorService.measure_recall); None when skipped
+    recall_check: Optional[Dict[str, Any]] = None
+    elapsed_seconds: float = 0.0
+
+
+class IngestionPipeline:
+    def __init__(self, vector_service, manifest_path: str, workers: int = 4,
+                 options: Optional[ChunkingOptions] = None, limiter: Optional[TokenBucket] = None):
+        self.vector_service = vector_service
+        # Caps embedding throughput so ingestion leaves quota for the request path
+        self.limiter = limiter
+        self.manifest_path = manifest_path
+        self.workers = max(1, workers)
+        self.options = options or ChunkingOptions(
+            settings.INGEST_CHUNK_CHARS, settings.INGEST_CHUNK_OVERLAP_CHARS, settings.INGEST_ERROR_CODE_PATTERN
+        )
+
+    def sync(self, directory: str, progress: Optional[Callable[..., None]] = None) -> IngestionReport:
+        """
+        Ingests `directory`. A missing directory is an error (e.g. an unmounted volume must
+        never look like an empty library). When it exists but holds no documents, the
+        bundled samples are added - only to an empty collection, or when
+        INGEST_SEED_SAMPLES is set - and nothing is ever deleted.
+        """
+        if not os.path.isdir(directory):
+            raise FileNotFoundError(f"Manual directory '{directory}' does not exist; check MANUALS_PATH.")
+        if any(True for _ in _walk(directory)):
+            return self.ingest_directory(directory, progress)
+        if not settings.INGEST_SEED_SAMPLES and self.vector_service.list_point_ids():
+            logger.warning("No manuals found in %s; leaving the existing collection unchanged.", directory)
+            return IngestionReport()
+        logger.info("No manuals found in %s; adding the bundled samples.", directory)
+        return self.ingest_chunks(SAMPLE_MANUALS, progress, prune=False)
+
+    def ingest_directory(self, directory: str, progress: Optional[Callable[..., None]] = None) -> IngestionReport:
+        """
+        Syncs the collection with the manuals under `directory` (the whole library:
+        points not produced by it are deleted).
+        `progress` receives stage=/files=/to_embed= updates plus the embedded=/upserted=/
+        failed= increments from VectorService.upsert_manuals.
+        """
+        progress = progress or _no_progress
+        progress(stage="scanning")
+        started = time.perf_counter()
+        report = IngestionReport()
+        manifest = self._load_manifest()
+        existing = self.vector_service.list_point_ids()
+
+        entries: Dict[str, Dict[str, Any]] = {}
+        to_parse: List[Tuple[str, str, os.stat_result, Optional[str]]] = []
+        for path, source_doc in _walk(directory):
+            report.files += 1
+            stat = os.stat(path)
+            cached = manifest.get(source_doc)
+            digest = None
+            if cached is not None and (cached.get("size"), cached.get("mtime_ns")) != (stat.st_size, stat.st_mtime_ns):
+                # Touched but possibly identical (e.g. re-copied): compare contents
+                digest = _file_sha256(path)
+                if digest != cached.get("sha256"):
+                    cached = None
+            if cached is not None and existing.issuperset(cached["chunk_ids"]):
+                entries[source_doc] = {**cached, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+                report.reused_files += 1
+            else:
+                to_parse.append((path, source_doc, stat, digest))
+
+        progress(stage="parsing", files=report.files, reused_files=report.reused_files)
+        chunks: Dict[str, ManualChunk] = {}
+        for (path, source_doc, stat, digest), (_, parsed, error) in zip(to_parse, self._parse(to_parse)):
+            if error is not None:
+                logger.warning("Failed to parse %s: %s", source_doc, error)
+                report.failed_files[source_doc] = error
+                # Keep whatever the collection already has for this file
+                if source_doc in manifest:
+                    entries[source_doc] = manifest[source_doc]
+                continue
+            report.parsed_files += 1
+            for chunk in parsed:
+                chunks[chunk.chunk_id] = chunk
+            entries[source_doc] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": digest or _file_sha256(path),
+                "chunk_ids": list(dict.fromkeys(chunk.chunk_id for chunk in parsed)),
+            }
+
+        desired = {chunk_id for entry in entries.values() for chunk_id in entry["chunk_ids"]}
+        self._apply(report, [c for c in chunks.values() if c.chunk_id not in existing], existing, desired, progress)
+        self._save_manifest(entries)
+
+        report.elapsed_seconds = round(time.perf_counter() - started, 3)
+        logger.info(
+            "Ingested %d files (%d parsed, %d reused): %d chunks, %d embedded, %d deleted in %.2fs.",
+            report.files, report.parsed_files, report.reused_files, report.chunks,
+            report.embedded, report.deleted, report.elapsed_seconds
+        )
+        return report
+
+    def ingest_chunks(self, manuals: Sequence[ManualChunk], progress: Optional[Callable[..., None]] = None,
+                      prune: bool = True) -> IngestionReport:
+        """
+        Syncs the collection with an in-memory library. With prune=False the chunks are
+        only added: points not in `manuals` (and their manifest entries) are kept.
+        """
+        progress = progress or _no_progress
+        started = time.perf_counter()
+        report = IngestionReport()
+        existing = self.vector_service.list_point_ids()
+        chunks = {chunk.chunk_id: chunk for chunk in manuals}
+        desired = set(chunks) if prune else set(chunks) | existing
+        self._apply(report, [c for c in chunks.values() if c.chunk_id not in existing], existing, desired, progress)
+
+        entries: Dict[str, Dict[str, Any]] = {}
+        for chunk in chunks.values():
+            entries.setdefault(chunk.source_doc, {"chunk_ids": []})["chunk_ids"].append(chunk.chunk_id)
+        self._save_manifest(entries if prune else {**self._load_manifest(), **entries})
+        report.files = len(entries)
+        report.elapsed_seconds = round(time.perf_counter() - started, 3)
+        return report
+
+    def _apply(self, report: IngestionReport, new_chunks: List[ManualChunk], existing: set, desired: set,
+               progress: Callable[..., None]):
+        report.chunks = len(desired)
+        report.unchanged = len(desired & existing)
+        progress(stage="embedding", chunks=report.chunks, unchanged=report.unchanged, to_embed=len(new_chunks))
+        if new_chunks:
+            stats = self.vector_service.upsert_manuals(new_chunks, progress=progress, limiter=self.limiter)
+            report.embedded = stats["upserted"]
+            report.upsert_failed = stats["failed"]
+        stale = sorted(existing - desired)
+        if stale:
+            progress(stage="deleting")
+            report.deleted = self.vector_service.delete_points(stale)
+        if (report.embedded or report.deleted) and settings.INGEST_RECALL_CHECK_QUERIES > 0:
+            progress(stage="recall_check")
+            report.recall_check = self._check_recall()
+
+    def _check_recall(self) -> Optional[Dict[str, Any]]:
+        """
+        Confirms the collection profile still finds what exact search finds. Best effort:
+        a failure is logged, never fails the ingest.
+        """
+        try:
+            result = self.vector_service.measure_recall(settings.INGEST_RECALL_CHECK_QUERIES,
+                                                        settings.INGEST_RECALL_CHECK_K)
+        except Exception as e:
+            logger.warning("Recall check failed: %s", e)
+            return None
+        if result is not None:
+            result["ok"] = result["recall"] >= settings.INGEST_RECALL_MIN
+            log = logger.info if result["ok"] else logger.warning
+            log("Recall@%d of profile '%s' vs exact search: %.3f (%d queries, minimum %.2f).",
+                result["k"], result["profile"], result["recall"], result["queries"], settings.INGEST_RECALL_MIN)
+        return result
+
+    def _parse(self, to_parse) -> Iterator[Tuple[str, List[ManualChunk], Optional[str]]]:
+        jobs = [(path, source_doc, self.options) for path, source_doc, _, _ in to_parse]
+        if len(jobs) <= 1 or self.workers == 1:
+            return map(_parse_job, jobs)
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(jobs)), mp_context=_parse_context()) as pool:
+            # Materialized inside the pool's lifetime; results come back in input order
+            return iter(list(pool.map(_parse_job, jobs, chunksize=4)))
+
+    # ---------------------------------------------------------
+    # Manifest
+    # ---------------------------------------------------------
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                return json.load(f).get("files", {})
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self, entries: Dict[str, Dict[str, Any]]):
+        os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"files": entries}, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def documents(self) -> Dict[str, int]:
+        """Chunk count per document of the last ingestion."""
+        return {source_doc: len(entry["chunk_ids"]) for source_doc, entry in self._load_manifest().items()}
+
+
+def _no_progress(**updates):
+    pass
+
+
+def _walk(directory: str) -> Iterator[Tuple[str, str]]:
+    """(path, source_doc) for every supported file; source_doc is the POSIX path relative to directory."""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(SUPPORTED_SUFFIXES):
+                path = os.path.join(root, name)
+                yield path, os.path.relpath(path, directory).replace(os.sep, "/")
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Process-wide pipeline used by the admin seed endpoint and seed_db.py
+ingestion_pipeline = IngestionPipeline(
+    vector_service=vector_service,
+    manifest_path=settings.INGEST_MANIFEST_PATH,
+    workers=settings.INGEST_WORKERS,
+    limiter=TokenBucket(settings.INGEST_EMBED_TOKENS_PER_SECOND, settings.INGEST_EMBED_BURST_TOKENS)
+)
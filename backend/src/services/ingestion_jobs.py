@@ -0,0 +1,308 @@
+"""
+ingestion_jobs.py
+-----------------
+Tracked, resumable ingestion jobs behind POST /admin/seed.
+- Every job has an ID; GET /admin/jobs/{id} reports its stage, chunks embedded/upserted,
+  embedding rate, ETA and errors.
+- Jobs run one at a time on a dedicated worker thread (parallel ingests would only
+  compete for the same rate-limited embedding budget). At most INGEST_MAX_QUEUED_JOBS
+  can be queued or running; beyond that submit() raises JobQueueFull (HTTP 429).
+- Job state is checkpointed as JSON under INGEST_JOBS_PATH. Because point IDs are
+  content hashes, the collection itself records which chunks are done: a job that
+  was queued or running when the process stopped is re-submitted at startup and
+  only embeds the chunks that never reached Qdrant.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, fields
+from typing import Any, Dict, List, Optional
+
+from src.core.config import get_settings
+from src.services.ingestion import IngestionPipeline, ingestion_pipeline
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+# Progress fields that arrive as increments (the rest are absolute values)
+_COUNTERS = ("embedded", "upserted", "failed")
+
+# Finished jobs kept (in memory and on disk) for GET /admin/jobs
+_MAX_FINISHED_JOBS = 50
+
+
+class JobQueueFull(Exception):
+    """Too many ingestion jobs are already queued or running."""
+
+
+class _Interrupted(Exception):
+    """Raised inside a running job when the manager shuts down."""
+
+
+@dataclass
+class IngestionJob:
+    job_id: str
+    directory: str
+    created_at: float
+    status: str = QUEUED
+    stage: Optional[str] = None
+    attempts: int = 0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    embedding_started_at: Optional[float] = None
+    files: int = 0
+    reused_files: int = 0
+    chunks: int = 0
+    unchanged: int = 0
+    to_embed: int = 0
+    embedded: int = 0
+    upserted: int = 0
+    failed: int = 0
+    deleted: int = 0
+    recall_check: Optional[Dict[str, Any]] = None
+    errors: List[str] = field(default_factory=list)
+
+    def update(self, now: float, **updates):
+        for name, value in updates.items():
+            if name in _COUNTERS:
+                setattr(self, name, getattr(self, name) + value)
+            else:
+                setattr(self, name, value)
+        if updates.get("stage") == "embedding":
+            self.embedding_started_at = now
+
+    def reset_progress(self):
+        """A (re)started attempt recomputes everything from the collection's current state."""
+        for name in ("files", "reused_files", "chunks", "unchanged", "to_embed", "embedded",
+                     "upserted", "failed", "deleted"):
+            setattr(self, name, 0)
+        self.stage = None
+        self.embedding_started_at = None
+        self.recall_check = None
+
+    def rate(self, now: float) -> float:
+        """Chunks embedded per second in the current attempt."""
+        if self.embedding_started_at is None:
+            return 0.0
+        elapsed = (self.finished_at or now) - self.embedding_started_at
+        return self.embedded / elapsed if elapsed > 0 else 0.0
+
+    def eta_seconds(self, now: float) -> Optional[float]:
+        if self.status != RUNNING or self.stage != "embedding":
+            return None
+        rate = self.rate(now)
+        return max(0, self.to_embed - self.embedded) / rate if rate > 0 else None
+
+    def to_dict(self, now: Optional[float] = None) -> Dict[str, Any]:
+        now = now if now is not None else time.time()
+        eta = self.eta_seconds(now)
+        return {
+            **asdict(self),
+            "chunks_per_second": round(self.rate(now), 1),
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+        }
+
+
+_JOB_FIELDS = {f.name for f in fields(IngestionJob)}
+
+
+class IngestionJobManager:
+    def __init__(self, pipeline: IngestionPipeline, checkpoint_dir: str, max_queued: int = 4,
+                 checkpoint_interval: float = 1.0, clock=time.time):
+        self.pipeline = pipeline
+        self.checkpoint_dir = checkpoint_dir
+        self.max_queued = max(1, max_queued)
+        self.checkpoint_interval = checkpoint_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, IngestionJob] = {}
+        self._last_checkpoint: Dict[str, float] = {}
+        self._stopping = threading.Event()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    # ---------------------------------------------------------
+    # Public API
+    # ---------------------------------------------------------
+
+    def submit(self, directory: str) -> IngestionJob:
+        """
+        Queues an ingestion of `directory`. If one for the same directory is already
+        queued or running, that job is returned instead of starting a duplicate.
+        """
+        with self._lock:
+            active = [job for job in self._jobs.values() if job.status in ACTIVE_STATUSES]
+            for job in active:
+                if job.directory == directory:
+                    return job
+            if len(active) >= self.max_queued:
+                raise JobQueueFull(f"{len(active)} ingestion jobs are already queued or running.")
+
+            job = IngestionJob(job_id=uuid.uuid4().hex, directory=directory, created_at=self._clock())
+            self._jobs[job.job_id] = job
+            self._prune_finished()
+        self._checkpoint(job)
+        self._start(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[IngestionJob]:
+        """Most recent first."""
+        return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def resume_interrupted(self) -> List[IngestionJob]:
+        """
+        Loads checkpointed jobs (called at startup) and re-submits the ones that were
+        queued or running when the previous process stopped.
+        """
+        resumed = []
+        for job in self._load_checkpoints():
+            with self._lock:
+                if job.job_id in self._jobs:
+                    continue
+                self._jobs[job.job_id] = job
+            if job.status in ACTIVE_STATUSES:
+                logger.info("Resuming ingestion job %s (%s).", job.job_id, job.directory)
+                job.status = QUEUED
+                self._start(job)
+                resumed.append(job)
+        return resumed
+
+    def shutdown(self):
+        """
+        Stops the worker without waiting for it: the running job halts at its next
+        progress update and, like the jobs still queued, is left queued for resume.
+        """
+        self._stopping.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {"jobs": counts, "limiter": self.pipeline.limiter.stats() if self.pipeline.limiter else None}
+
+    # ---------------------------------------------------------
+    # Worker
+    # ---------------------------------------------------------
+
+    def _start(self, job: IngestionJob):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingestion-job")
+            executor = self._executor
+        executor.submit(self._run, job)
+
+    def _run(self, job: IngestionJob):
+        if self._stopping.is_set():
+            return
+        job.status = RUNNING
+        job.attempts += 1
+        job.started_at = self._clock()
+        job.finished_at = None
+        job.reset_progress()
+        self._checkpoint(job)
+
+        try:
+            report = self.pipeline.sync(job.directory, progress=lambda **updates: self._progress(job, updates))
+        except _Interrupted:
+            job.status = QUEUED
+            job.stage = "interrupted"
+            self._checkpoint(job)
+            return
+        except Exception as e:
+            logger.error("Ingestion job %s failed: %s", job.job_id, e)
+            job.errors.append(f"{type(e).__name__}: {e}")
+            job.status = FAILED
+        else:
+            job.deleted = report.deleted
+            job.files = report.files
+            job.errors.extend(f"{doc}: {error}" for doc, error in report.failed_files.items())
+            if report.upsert_failed:
+                job.errors.append(f"{report.upsert_failed} chunks could not be upserted.")
+            job.recall_check = report.recall_check
+            if report.recall_check and not report.recall_check["ok"]:
+                job.errors.append(
+                    f"Recall@{report.recall_check['k']} of profile '{report.recall_check['profile']}' is "
+                    f"{report.recall_check['recall']} (below {settings.INGEST_RECALL_MIN}); "
+                    "raise oversampling or use a less aggressive profile."
+                )
+            job.status = SUCCEEDED
+        job.stage = "done"
+        job.finished_at = self._clock()
+        self._checkpoint(job)
+
+    def _progress(self, job: IngestionJob, updates: Dict[str, Any]):
+        if self._stopping.is_set():
+            raise _Interrupted()
+        now = self._clock()
+        job.update(now, **updates)
+        if "stage" in updates or now - self._last_checkpoint.get(job.job_id, 0.0) >= self.checkpoint_interval:
+            self._checkpoint(job)
+
+    # ---------------------------------------------------------
+    # Checkpoints
+    # ---------------------------------------------------------
+
+    def _checkpoint(self, job: IngestionJob):
+        self._last_checkpoint[job.job_id] = self._clock()
+        try:
+            os.makedirs(self.checkpoint_dir, exist_ok=True)
+            path = os.path.join(self.checkpoint_dir, f"{job.job_id}.json")
+            with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+                json.dump(asdict(job), f)
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            # Progress is still visible in memory; only resume-after-crash is affected
+            logger.warning("Could not checkpoint ingestion job %s: %s", job.job_id, e)
+
+    def _load_checkpoints(self) -> List[IngestionJob]:
+        try:
+            names = sorted(os.listdir(self.checkpoint_dir))
+        except OSError:
+            return []
+        jobs = []
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.checkpoint_dir, name), encoding="utf-8") as f:
+                    data = json.load(f)
+                jobs.append(IngestionJob(**{key: value for key, value in data.items() if key in _JOB_FIELDS}))
+            except (OSError, ValueError, TypeError) as e:
+                logger.warning("Skipping unreadable ingestion checkpoint %s: %s", name, e)
+        return sorted(jobs, key=lambda job: job.created_at)
+
+    def _prune_finished(self):
+        finished = sorted(
+            (job for job in self._jobs.values() if job.status not in ACTIVE_STATUSES),
+            key=lambda job: job.created_at
+        )
+        for job in finished[:max(0, len(finished) - _MAX_FINISHED_JOBS)]:
+            del self._jobs[job.job_id]
+            self._last_checkpoint.pop(job.job_id, None)
+            try:
+                os.remove(os.path.join(self.checkpoint_dir, f"{job.job_id}.json"))
+            except OSError:
+                pass
+
+
+# Process-wide job manager (resumed from the app lifespan)
+ingestion_jobs = IngestionJobManager(
+    pipeline=ingestion_pipeline,
+    checkpoint_dir=settings.INGEST_JOBS_PATH,
+    max_queued=settings.INGEST_MAX_QUEUED_JOBS
+)
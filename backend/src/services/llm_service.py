@@ -3,26 +3,222 @@ llm_service.py
 --------------
 Wrapper for the OpenAI Chat Model.
 Configured to use 'structured_output' to enforce the Pydantic schema.
+Every call records its prompt/completion token usage.
+A response that does not parse raises DraftParseError carrying the raw tool-call
+arguments, so the graph can hand that draft to the guardrail and the repair node.
 """
 
+import json
+import re
+from typing import Any, Callable, Dict, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_openai import ChatOpenAI
 from src.core.config import get_settings
+from src.core.http_clients import openai_chat_clients
+from src.core.lazy import Lazy
+from src.core.observability import LLM_SECONDS, LLM_TOKENS, observe
 from src.core.schema import DiagnosticResult
+from src.core.tokens import TokenUsage, UsageTotals, count_prompt_tokens, count_tokens
 
 settings = get_settings()
 
+# JSON escape sequences that can appear inside a streamed string value
+_JSON_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+def partial_string_field(text: str, field: str) -> Optional[str]:
+    """
+    Reads a top-level string field out of possibly incomplete JSON.
+    Returns the characters decoded so far (None if the field has not started yet),
+    stopping before a half-received escape sequence.
+    """
+    match = re.search(r'"%s"\s*:\s*"' % re.escape(field), text)
+    if not match:
+        return None
+
+    decoded = []
+    i = match.end()
+    while i < len(text):
+        ch = text[i]
+        if ch == '"':
+            break
+        if ch == "\\":
+            if i + 1 >= len(text):
+                break
+            escape = text[i + 1]
+            if escape == "u":
+                if i + 6 > len(text):
+                    break
+                decoded.append(chr(int(text[i + 2:i + 6], 16)))
+                i += 6
+                continue
+            decoded.append(_JSON_ESCAPES.get(escape, escape))
+            i += 2
+            continue
+        decoded.append(ch)
+        i += 1
+    return "".join(decoded)
+
+def parse_arguments(arguments: str) -> Optional[Dict[str, Any]]:
+    """Tool-call arguments as a dict (None if they are not a JSON object)."""
+    try:
+        draft = json.loads(arguments)
+    except ValueError:
+        return None
+    return draft if isinstance(draft, dict) else None
+
+def _tool_arguments(message) -> str:
+    """Arguments of the first tool call in a chat message ('' if there is none)."""
+    calls = (getattr(message, "additional_kwargs", None) or {}).get("tool_calls") or []
+    return ((calls[0].get("function") or {}).get("arguments") or "") if calls else ""
+
+class DraftParseError(ValueError):
+    """The model's report does not fit DiagnosticResult; `draft` holds what it sent (if JSON)."""
+
+    def __init__(self, error: Any, draft: Optional[Dict[str, Any]]):
+        super().__init__(str(error))
+        self.draft = draft
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """Collects provider-reported token usage from the LLM calls it is attached to."""
+    run_inline = True
+
+    def __init__(self):
+        self.usage = TokenUsage()
+
+    def on_llm_end(self, response, **kwargs: Any):
+        token_usage = (response.llm_output or {}).get("token_usage") or {}
+        if not token_usage:
+            return
+        self.usage.prompt_tokens += token_usage.get("prompt_tokens", 0)
+        self.usage.completion_tokens += token_usage.get("completion_tokens", 0)
+        self.usage.calls += 1
+
 class LLMService:
     def __init__(self):
-        self.llm = ChatOpenAI(
+        # The chat model is built on first use (see build_models), so the service can be
+        # constructed - and its models replaced by stand-ins - without an OPENAI_API_KEY
+        self.llm: Optional[ChatOpenAI] = None
+        self.structured_llm = None
+        self.tool_llm = None
+
+        # Process-wide prompt/completion token counters
+        self.usage_totals = UsageTotals()
+
+    def build_models(self):
+        """Creates the chat model and whichever bound variant is missing (none once built or replaced)."""
+        if self.structured_llm is not None and self.tool_llm is not None:
+            return
+        if self.llm is None:
+            self.llm = self._create_llm()
+        # Bind the Pydantic model to the LLM
+        # This forces the LLM to ONLY speak in 'DiagnosticResult' JSON; the raw message
+        # is kept so a draft that fails to parse can still be repaired
+        if self.structured_llm is None:
+            self.structured_llm = self.llm.with_structured_output(DiagnosticResult, include_raw=True)
+
+        # Same forced tool call, but returning raw message chunks so they can be streamed
+        if self.tool_llm is None:
+            self.tool_llm = self.llm.bind_tools([DiagnosticResult], tool_choice=True)
+
+    @staticmethod
+    def _create_llm() -> ChatOpenAI:
+        if not settings.OPENAI_API_KEY:
+            raise RuntimeError("OPENAI_API_KEY is not set; it is required to call the diagnosis LLM.")
+        # Shares the tuned connection pool with the embedding provider (see http_clients)
+        client, async_client = openai_chat_clients()
+        return ChatOpenAI(
             model=settings.MODEL_NAME,
             temperature=0, # Deterministic for industrial safety
-            api_key=settings.OPENAI_API_KEY
+            api_key=settings.OPENAI_API_KEY,
+            client=client,
+            async_client=async_client
         )
-        # Bind the Pydantic model to the LLM immediately
-        # This forces the LLM to ONLY speak in 'DiagnosticResult' JSON
-        self.structured_llm = self.llm.with_structured_output(DiagnosticResult)
 
     def get_analyzer(self):
+        if self.structured_llm is None:
+            self.build_models()
         return self.structured_llm
 
-llm_service = LLMService()
\ No newline at end of file
+    def diagnose(self, prompt, usage: Optional[TokenUsage] = None) -> DiagnosticResult:
+        """Blocking structured call (used by the sync graph path)."""
+        callback = TokenUsageCallback()
+        with observe(LLM_SECONDS, "llm.diagnose", server_timing="llm", mode="structured"):
+            output = self.get_analyzer().invoke(prompt, config={"callbacks": [callback]})
+        return self._structured_result(output, callback, prompt, usage)
+
+    async def adiagnose(self, prompt, usage: Optional[TokenUsage] = None) -> DiagnosticResult:
+        """Non-blocking structured call (used when the graph runs via ainvoke)."""
+        callback = TokenUsageCallback()
+        with observe(LLM_SECONDS, "llm.diagnose", server_timing="llm", mode="structured"):
+            output = await self.get_analyzer().ainvoke(prompt, config={"callbacks": [callback]})
+        return self._structured_result(output, callback, prompt, usage)
+
+    def _structured_result(self, output: Dict[str, Any], callback: TokenUsageCallback, prompt,
+                           usage: Optional[TokenUsage]) -> DiagnosticResult:
+        """
+        Unpacks an include_raw response into the report, or raises DraftParseError with the
+        raw draft. The tool arguments are validated here: depending on the langchain version
+        'parsed' is the model or only the decoded dict.
+        """
+        parsed = output.get("parsed")
+        arguments = _tool_arguments(output.get("raw"))
+        self._record_usage(callback, prompt,
+                           parsed.model_dump_json() if isinstance(parsed, DiagnosticResult) else arguments, usage)
+        if isinstance(parsed, DiagnosticResult):
+            return parsed
+        try:
+            return DiagnosticResult.model_validate_json(arguments)
+        except ValueError as e:
+            raise DraftParseError(e, parse_arguments(arguments)) from e
+
+    async def astream_diagnose(self, prompt, on_summary_token: Callable[[str], None],
+                               usage: Optional[TokenUsage] = None) -> DiagnosticResult:
+        """
+        Streaming variant of adiagnose.
+        Tool-call argument fragments are accumulated as they arrive; every new piece of
+        'fault_summary' is passed to on_summary_token before the full report is parsed.
+        """
+        if self.tool_llm is None:
+            self.build_models()
+        callback = TokenUsageCallback()
+        arguments = ""
+        emitted = 0
+        with observe(LLM_SECONDS, "llm.stream_diagnose", server_timing="llm", mode="stream"):
+            async for chunk in self.tool_llm.astream(prompt, config={"callbacks": [callback]}):
+                for call in chunk.additional_kwargs.get("tool_calls") or []:
+                    arguments += (call.get("function") or {}).get("arguments") or ""
+
+                summary = partial_string_field(arguments, "fault_summary")
+                if summary and len(summary) > emitted:
+                    on_summary_token(summary[emitted:])
+                    emitted = len(summary)
+
+        self._record_usage(callback, prompt, arguments, usage)
+        try:
+            return DiagnosticResult.model_validate_json(arguments)
+        except ValueError as e:
+            raise DraftParseError(e, parse_arguments(arguments)) from e
+
+    def _record_usage(self, callback: TokenUsageCallback, prompt, completion: str,
+                      usage: Optional[TokenUsage]):
+        """
+        Adds one call's token usage to the process totals (and to `usage`, if given).
+        Streamed responses carry no usage block, so those are counted locally.
+        """
+        call_usage = callback.usage
+        if call_usage.calls == 0:
+            call_usage = TokenUsage(
+                prompt_tokens=count_prompt_tokens(prompt),
+                completion_tokens=count_tokens(completion),
+                calls=1,
+                estimated=True
+            )
+        self.usage_totals.add(call_usage)
+        LLM_TOKENS.labels(kind="prompt").inc(call_usage.prompt_tokens)
+        LLM_TOKENS.labels(kind="completion").inc(call_usage.completion_tokens)
+        if usage is not None:
+            usage.add(call_usage)
+
+# Singleton instance for import (built on first use, normally during warmup)
+llm_service: LLMService = Lazy(LLMService)
\ No newline at end of file
@@ -0,0 +1,59 @@
+"""
+rate_limiter.py
+---------------
+Blocking token bucket used to cap background work (ingestion embedding) so it
+cannot use up the embedding quota the request path depends on.
+Tokens refill continuously at `rate` per second up to `capacity` (the burst size).
+"""
+
+import threading
+import time
+from typing import Any, Dict
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float, clock=time.monotonic, sleep=time.sleep):
+        """rate <= 0 disables limiting (acquire never waits)."""
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = clock()
+
+        self.acquired = 0.0
+        self.waited_seconds = 0.0
+
+    def acquire(self, amount: float) -> float:
+        """
+        Takes `amount` tokens, sleeping until they are available. A request larger than
+        the bucket is capped at its capacity so it can still go through (after a full refill).
+        Callers are served in arrival order. Returns the seconds spent waiting.
+        """
+        if self.rate <= 0:
+            return 0.0
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            self._refill()
+            # Reserve now (the balance may go negative); the deficit is the wait
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.acquired += amount
+            self.waited_seconds += wait
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate_per_second": self.rate,
+            "capacity": self.capacity,
+            "acquired": round(self.acquired),
+            "waited_seconds": round(self.waited_seconds, 3),
+        }
@@ -0,0 +1,189 @@
+"""
+report_repair.py
+----------------
+Local repair of rejected diagnostic reports.
+Most guardrail failures are mechanical (a stray 'action_type' field, a severity sent as
+"8", steps numbered 0/2/2, a severity >= 7 report without a lockout warning) and can be
+fixed without re-sending the whole prompt to the LLM. Only reports that cannot be made
+valid here are escalated to an LLM retry.
+"""
+
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from pydantic import ValidationError
+
+from src.core.config import get_settings
+from src.core.schema import DiagnosticResult, ManualChunk, MaintenanceStep
+
+settings = get_settings()
+
+# Terms the guardrail accepts as an explicit safety warning
+SAFETY_TERMS = ("lock out", "power off", "safety", "danger", "stop")
+
+# Severity at which a safety warning becomes mandatory
+SAFETY_SEVERITY_THRESHOLD = 7
+
+_REPORT_FIELDS = set(DiagnosticResult.model_fields)
+_STEP_FIELDS = set(MaintenanceStep.model_fields)
+_LIST_FIELDS = ("cited_manual_references", "safety_warnings", "recommended_actions")
+
+
+def has_safety_warning(report: DiagnosticResult) -> bool:
+    """True if the report's safety warnings mention one of SAFETY_TERMS."""
+    text = " ".join(report.safety_warnings).lower()
+    return any(term in text for term in SAFETY_TERMS)
+
+
+def needs_safety_warning(report: DiagnosticResult) -> bool:
+    """The guardrail rule: high-severity reports must carry a safety warning."""
+    return report.severity_score >= SAFETY_SEVERITY_THRESHOLD and not has_safety_warning(report)
+
+
+# ------------------------------------------------------------------
+# Repairs
+# ------------------------------------------------------------------
+
+def _coerce_int(value: Any) -> Any:
+    """'8' / 8.0 -> 8; anything else is returned unchanged for Pydantic to reject."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        try:
+            number = float(value.strip())
+        except ValueError:
+            return value
+        return int(number) if number.is_integer() else value
+    return value
+
+
+def _repair_step(step: Any, fixes: List[str]) -> Any:
+    """Normalizes one recommended action (plain strings become instructions)."""
+    if isinstance(step, MaintenanceStep):
+        step = step.model_dump()
+    if isinstance(step, str):
+        fixes.append("coerced_types")
+        return {"instruction": step}
+    if not isinstance(step, dict):
+        return step
+
+    unknown = set(step) - _STEP_FIELDS
+    if unknown:
+        fixes.append("stripped_fields")
+        step = {k: v for k, v in step.items() if k in _STEP_FIELDS}
+
+    tool = step.get("tool_required")
+    if tool is not None and not isinstance(tool, str):
+        fixes.append("coerced_types")
+        step["tool_required"] = str(tool)
+    return step
+
+
+def _safety_warnings_from_manual(docs: Sequence[ManualChunk]) -> List[Tuple[str, str]]:
+    """(warning, citation) pairs taken from retrieved safety-manual chunks."""
+    return [
+        (doc.content, f"{doc.source_doc} (Pg {doc.page_number})")
+        for doc in docs
+        if doc.source_doc in settings.REPAIR_SAFETY_SOURCES
+    ]
+
+
+def repair_report(report: Any, docs: Sequence[ManualChunk],
+                  fetch_safety_docs: Optional[Callable[[], Sequence[ManualChunk]]] = None
+                  ) -> Tuple[Optional[DiagnosticResult], List[str]]:
+    """
+    Attempts to turn a rejected report into one that passes the guardrail.
+    Returns (repaired_report, fixes_applied), or (None, fixes_applied) when the
+    report cannot be repaired locally (missing content, nothing to cite, etc.).
+    The safety manual is rarely among the retrieved docs (its chunks carry no error
+    codes), so `fetch_safety_docs` is called to look it up when a lockout warning is needed.
+    """
+    fixes: List[str] = []
+    if report is None:
+        return None, fixes
+
+    data: Dict[str, Any] = report.model_dump() if isinstance(report, DiagnosticResult) else dict(report)
+
+    # 1. Unknown top-level fields
+    unknown = set(data) - _REPORT_FIELDS
+    if unknown:
+        fixes.append("stripped_fields")
+        data = {k: v for k, v in data.items() if k in _REPORT_FIELDS}
+
+    # 2. Types the model commonly gets wrong
+    if "severity_score" in data:
+        coerced = _coerce_int(data["severity_score"])
+        if coerced is not data["severity_score"]:
+            fixes.append("coerced_types")
+            data["severity_score"] = coerced
+    for name in _LIST_FIELDS:
+        value = data.get(name)
+        if isinstance(value, (str, dict)):
+            fixes.append("coerced_types")
+            data[name] = [value]
+
+    # 3. Action plan: clean each step and number them 1..n in list order
+    steps = data.get("recommended_actions")
+    if isinstance(steps, list):
+        steps = [_repair_step(step, fixes) for step in steps]
+        for order, step in enumerate(steps, start=1):
+            if isinstance(step, dict) and step.get("step_order") != order:
+                if "step_order" in step:
+                    fixes.append("renumbered_steps")
+                step["step_order"] = order
+        data["recommended_actions"] = steps
+
+    try:
+        repaired = DiagnosticResult.model_validate(data)
+    except ValidationError:
+        return None, list(dict.fromkeys(fixes))
+
+    # 4. Mandated safety warning, grounded in the retrieved safety manual
+    if needs_safety_warning(repaired):
+        grounded = _safety_warnings_from_manual(docs)
+        if not grounded and fetch_safety_docs is not None:
+            grounded = _safety_warnings_from_manual(fetch_safety_docs())
+        if not grounded:
+            return None, list(dict.fromkeys(fixes))
+        fixes.append("injected_lockout_warning")
+        repaired.safety_warnings = [
+            f"{settings.REPAIR_LOCKOUT_WARNING} {warning}" for warning, _ in grounded[:1]
+        ] + repaired.safety_warnings
+        repaired.cited_manual_references = list(dict.fromkeys(
+            repaired.cited_manual_references + [citation for _, citation in grounded[:1]]
+        ))
+
+    return repaired, list(dict.fromkeys(fixes))
+
+
+# ------------------------------------------------------------------
+# Counters
+# ------------------------------------------------------------------
+
+@dataclass
+class RepairStats:
+    """Process-level repair vs. LLM-retry counters."""
+    repaired: int = 0
+    escalated: int = 0
+    by_fix: Dict[str, int] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, repaired: bool, fixes: Sequence[str]):
+        with self._lock:
+            if repaired:
+                self.repaired += 1
+            else:
+                self.escalated += 1
+            for fix in fixes:
+                self.by_fix[fix] = self.by_fix.get(fix, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"repaired": self.repaired, "escalated": self.escalated, "by_fix": dict(self.by_fix)}
+
+
+# Singleton instance for import
+repair_stats = RepairStats()
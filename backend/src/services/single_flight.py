@@ -0,0 +1,80 @@
+"""
+single_flight.py
+----------------
+Request coalescing for identical in-flight work.
+The first caller for a key starts the work as its own task; concurrent callers with the
+same key await that task instead of starting another one.
+- An error raised by the work is raised to every caller waiting on it.
+- A cancelled caller only stops waiting; the work is cancelled once no caller is left.
+- Keys are forgotten as soon as the work finishes (results and errors are not cached here).
+"""
+
+import asyncio
+import threading
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+@dataclass
+class _Call:
+    task: asyncio.Task
+    waiters: int = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()   # Guards the counters (read from other threads by /stats)
+
+        self.leaders = 0      # Calls that started the work
+        self.coalesced = 0    # Calls that joined work already in flight
+        self.failures = 0     # Work that raised
+        self.abandoned = 0    # Work cancelled because every caller went away
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Returns (result, shared): shared is True when the result came from
+        work started by another caller.
+        """
+        call = self._calls.get(key)
+        shared = call is not None
+        if call is None:
+            call = _Call(task=asyncio.create_task(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task, key=key, call=call: self._finished(key, call, task))
+        self._count("coalesced" if shared else "leaders")
+
+        call.waiters += 1
+        try:
+            # shield: cancelling this caller must not cancel the work other callers await
+            return await asyncio.shield(call.task), shared
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Nobody is waiting any more; stop the work and let the next caller start afresh
+                self._forget(key, call)
+                call.task.cancel()
+                self._count("abandoned")
+
+    def _finished(self, key: str, call: _Call, task: asyncio.Task):
+        self._forget(key, call)
+        if not task.cancelled() and task.exception() is not None:
+            self._count("failures")
+
+    def _forget(self, key: str, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "failures": self.failures,
+                "abandoned": self.abandoned,
+                "in_flight": len(self._calls)
+            }
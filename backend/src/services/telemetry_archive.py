@@ -0,0 +1,230 @@
+"""
+telemetry_archive.py
+--------------------
+Append-only columnar archive of every TelemetryReading the engine receives.
+Readings are buffered in memory as plain columns and flushed off the request path
+(background task) as zstd-compressed Parquet, hive-partitioned by day and site:
+
+    <ARCHIVE_PATH>/day=2026-01-01/site=ESPOO/part-<uuid>-0.parquet
+
+Fleet queries scan the partitions with pyarrow.dataset: the day/site filters prune
+whole directories, sensor predicates are pushed down to Parquet row-group statistics,
+only the needed columns are read, and aggregations run as Arrow/NumPy kernels
+(no per-reading Python loops). Only flushed readings are visible to queries.
+"""
+
+import asyncio
+import logging
+import re
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from src.core.config import get_settings
+from src.core.schema import TelemetryReading
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Columns stored in the Parquet files (day/site live in the directory names)
+READING_SCHEMA = pa.schema([
+    ("elevator_id", pa.string()),
+    ("timestamp", pa.timestamp("ms", tz="UTC")),
+    ("velocity_m_s", pa.float32()),
+    ("vibration_level_hz", pa.float32()),
+    ("door_cycles_count", pa.int64()),
+    ("error_codes", pa.list_(pa.string())),
+])
+PARTITIONING = ds.partitioning(pa.schema([("day", pa.string()), ("site", pa.string())]), flavor="hive")
+
+UNKNOWN_SITE = "unknown"
+_MS_PER_DAY = 86400000
+_MAX_PARTITIONS_PER_FLUSH = 1 << 20
+
+
+def normalize_site(site: str) -> str:
+    """Upper-cased, path-safe site name (partition values end up in directory names)."""
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", site.strip().upper()) or UNKNOWN_SITE
+
+
+@lru_cache(maxsize=65536)
+def site_of(elevator_id: str) -> str:
+    """Site of an elevator, parsed from its ID with ARCHIVE_SITE_PATTERN (e.g. KONE-ESPOO-01 -> ESPOO)."""
+    match = re.match(settings.ARCHIVE_SITE_PATTERN, elevator_id)
+    return normalize_site(match.group("site")) if match else UNKNOWN_SITE
+
+
+class TelemetryArchive:
+    def __init__(self, directory: str, flush_rows: int = 100000, flush_seconds: float = 60.0,
+                 max_buffered_rows: int = 1000000, clock=time.monotonic):
+        self.directory = directory
+        self.flush_rows = max(1, flush_rows)
+        self.flush_seconds = flush_seconds
+        self.max_buffered_rows = max(self.flush_rows, max_buffered_rows)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._columns = self._empty_columns()
+        self._oldest_buffered: Optional[float] = None
+
+        self.appended = 0
+        self.dropped = 0
+        self.flushed_rows = 0
+        self.files_written = 0
+
+    @staticmethod
+    def _empty_columns() -> Dict[str, list]:
+        return {name: [] for name in READING_SCHEMA.names + ["site"]}
+
+    # ---------------------------------------------------------
+    # Write path
+    # ---------------------------------------------------------
+
+    def append(self, reading: TelemetryReading) -> bool:
+        """
+        Buffers one reading (a few list appends; no I/O).
+        Every reading is kept, in arrival order - late (out-of-order) gateway batches and
+        equal timestamps included. Callers archive each reading once (the telemetry
+        monitor for streamed readings, DiagnosisService for direct diagnoses).
+        Returns False only when the buffer is full because flushing has fallen behind.
+        """
+        timestamp = reading.timestamp.timestamp()
+        with self._lock:
+            if len(self._columns["elevator_id"]) >= self.max_buffered_rows:
+                self.dropped += 1
+                return False
+
+            columns = self._columns
+            columns["elevator_id"].append(reading.elevator_id)
+            columns["timestamp"].append(int(timestamp * 1000))
+            columns["velocity_m_s"].append(reading.velocity_m_s)
+            columns["vibration_level_hz"].append(reading.vibration_level_hz)
+            columns["door_cycles_count"].append(reading.door_cycles_count)
+            columns["error_codes"].append([code.strip().upper() for code in reading.error_codes])
+            columns["site"].append(site_of(reading.elevator_id))
+            if self._oldest_buffered is None:
+                self._oldest_buffered = self._clock()
+            self.appended += 1
+            return True
+
+    def buffered(self) -> int:
+        return len(self._columns["elevator_id"])
+
+    def should_flush(self) -> bool:
+        with self._lock:
+            if not self._columns["elevator_id"]:
+                return False
+            return (
+                len(self._columns["elevator_id"]) >= self.flush_rows
+                or self._clock() - self._oldest_buffered >= self.flush_seconds
+            )
+
+    def flush(self) -> int:
+        """Writes the buffered readings as Parquet files (one per day/site). Returns rows written."""
+        with self._flush_lock:
+            with self._lock:
+                columns, self._columns = self._columns, self._empty_columns()
+                self._oldest_buffered = None
+            if not columns["elevator_id"]:
+                return 0
+
+            table = pa.table({
+                "elevator_id": pa.array(columns["elevator_id"], pa.string()),
+                "timestamp": pa.array(columns["timestamp"], pa.int64()).cast(pa.timestamp("ms", tz="UTC")),
+                "velocity_m_s": pa.array(columns["velocity_m_s"], pa.float32()),
+                "vibration_level_hz": pa.array(columns["vibration_level_hz"], pa.float32()),
+                "door_cycles_count": pa.array(columns["door_cycles_count"], pa.int64()),
+                "error_codes": pa.array(columns["error_codes"], pa.list_(pa.string())),
+                "day": pa.array(_day_strings(np.asarray(columns["timestamp"], dtype=np.int64))),
+                "site": pa.array(columns["site"], pa.string()),
+            })
+
+            written = []
+            try:
+                ds.write_dataset(
+                    table,
+                    self.directory,
+                    format="parquet",
+                    partitioning=PARTITIONING,
+                    basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+                    existing_data_behavior="overwrite_or_ignore",
+                    file_options=ds.ParquetFileFormat().make_write_options(compression="zstd"),
+                    file_visitor=written.append,
+                    # One batch can span many day/site pairs (default cap is 1024)
+                    max_partitions=_MAX_PARTITIONS_PER_FLUSH
+                )
+            except Exception:
+                self.dropped += table.num_rows
+                raise
+            self.flushed_rows += table.num_rows
+            self.files_written += len(written)
+            return table.num_rows
+
+    async def run_flush(self):
+        """Background loop (started from the app lifespan) writing batches off the request path."""
+        while True:
+            await asyncio.sleep(1.0)
+            if self.should_flush():
+                try:
+                    await asyncio.to_thread(self.flush)
+                except Exception as e:
+                    logger.error("Telemetry archive flush failed: %s", e)
+
+    # ---------------------------------------------------------
+    # Read path
+    # ---------------------------------------------------------
+
+    def dataset(self) -> Optional[ds.Dataset]:
+        try:
+            return ds.dataset(self.directory, format="parquet", partitioning=PARTITIONING)
+        except (FileNotFoundError, pa.ArrowInvalid):
+            return None
+
+    def batches(self, columns: List[str], days: int, site: Optional[str] = None,
+                where: Optional[ds.Expression] = None, today: Optional[date] = None) -> Iterator[pa.RecordBatch]:
+        """
+        Streams `columns` for the last `days` days (optionally one site) as record batches,
+        so memory stays bounded however large the range. The day/site filter prunes
+        partition directories before any file is opened.
+        """
+        dataset = self.dataset()
+        if dataset is None:
+            return iter(())
+
+        first_day = ((today or datetime.now(timezone.utc).date()) - timedelta(days=max(1, days) - 1)).isoformat()
+        expression = ds.field("day") >= first_day
+        if site:
+            expression = expression & (ds.field("site") == normalize_site(site))
+        if where is not None:
+            expression = expression & where
+        return dataset.to_batches(columns=columns, filter=expression)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "buffered": self.buffered(),
+            "appended": self.appended,
+            "dropped": self.dropped,
+            "flushed_rows": self.flushed_rows,
+            "files_written": self.files_written,
+        }
+
+
+def _day_strings(epoch_ms: np.ndarray) -> np.ndarray:
+    """UTC calendar day (YYYY-MM-DD) of each epoch-millisecond timestamp, vectorized."""
+    return np.datetime_as_string((epoch_ms // _MS_PER_DAY).astype("datetime64[D]"))
+
+
+# Process-wide archive fed by every ingest/diagnosis entry point
+telemetry_archive = TelemetryArchive(
+    directory=settings.ARCHIVE_PATH,
+    flush_rows=settings.ARCHIVE_FLUSH_ROWS,
+    flush_seconds=settings.ARCHIVE_FLUSH_SECONDS,
+    max_buffered_rows=settings.ARCHIVE_MAX_BUFFERED_ROWS
+)
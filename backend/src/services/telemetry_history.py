@@ -0,0 +1,335 @@
+"""
+telemetry_history.py
+--------------------
+Compact per-elevator telemetry history with incremental trend features.
+Each elevator owns a ring buffer of its most recent readings stored as one NumPy
+structured array (20 bytes per reading: time offset, velocity, vibration, door cycles),
+so 50k elevators x 1k readings stay around 1 GB instead of millions of Pydantic objects.
+Buffers start small and double until they reach HISTORY_CAPACITY.
+
+Features are updated in O(1) on append:
+- EWMA and exponentially weighted variance of vibration and velocity (z-score of the
+  newest reading against the average *before* it),
+- least-squares slope over the buffered window (running sums, evicted rows subtracted),
+- door-cycle rate over the window (counter resets after maintenance are ignored).
+The running sums are recomputed from the buffer every time it wraps, which bounds
+floating-point drift.
+"""
+
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.core.config import get_settings
+from src.core.schema import TelemetryReading
+
+settings = get_settings()
+
+# One buffered reading; "t" is seconds since the oldest buffered reading (re-based on every
+# wrap-around). float64 so readings far apart in time still keep sub-second resolution.
+READING_DTYPE = np.dtype([
+    ("t", np.float64),
+    ("velocity", np.float32),
+    ("vibration", np.float32),
+    ("door_cycles", np.uint32),
+])
+
+_INITIAL_ROWS = 16
+_SECONDS_PER_HOUR = 3600.0
+
+
+@dataclass
+class TrendFeatures:
+    """Rolling features of one elevator, as of its newest reading."""
+    readings: int
+    span_hours: float
+    vibration_ewma: float
+    vibration_slope_per_hour: Optional[float]
+    vibration_zscore: float
+    velocity_ewma: float
+    velocity_slope_per_hour: Optional[float]
+    velocity_zscore: float
+    door_cycles_per_hour: Optional[float]
+
+    def flags(self) -> List[str]:
+        """Discrete trend conditions (used in the prompt and the diagnosis cache key)."""
+        flags = []
+        threshold = settings.HISTORY_ZSCORE_THRESHOLD
+        if abs(self.vibration_zscore) >= threshold:
+            flags.append("vibration_spike" if self.vibration_zscore > 0 else "vibration_drop")
+        if abs(self.velocity_zscore) >= threshold:
+            flags.append("velocity_spike" if self.velocity_zscore > 0 else "velocity_drop")
+        for name, slope, min_change in (
+            ("vibration", self.vibration_slope_per_hour, settings.HISTORY_VIBRATION_TREND_HZ),
+            ("velocity", self.velocity_slope_per_hour, settings.HISTORY_VELOCITY_TREND_M_S),
+        ):
+            # Change of the fitted line across the window, not the raw slope
+            if slope is not None and abs(slope * self.span_hours) >= min_change:
+                flags.append(f"{name}_rising" if slope > 0 else f"{name}_falling")
+        return flags
+
+    def summary(self) -> str:
+        """One compact line per signal for the diagnosis prompt."""
+        def slope(value: Optional[float], unit: str) -> str:
+            return "n/a" if value is None else f"{value:+.3g} {unit}/h"
+
+        door_rate = "n/a" if self.door_cycles_per_hour is None else f"{self.door_cycles_per_hour:.1f}/h"
+        lines = [
+            f"Last {self.readings} readings over {self.span_hours:.1f} h.",
+            f"Vibration: EWMA {self.vibration_ewma:.2f} Hz, slope "
+            f"{slope(self.vibration_slope_per_hour, 'Hz')}, z-score {self.vibration_zscore:+.1f}.",
+            f"Velocity: EWMA {self.velocity_ewma:.2f} m/s, slope "
+            f"{slope(self.velocity_slope_per_hour, 'm/s')}, z-score {self.velocity_zscore:+.1f}.",
+            f"Door cycles: {door_rate}.",
+        ]
+        flags = self.flags()
+        lines.append(f"Flags: {', '.join(flags)}." if flags else "Flags: none (stable).")
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "flags": self.flags()}
+
+
+class _Signal:
+    """EWMA/variance and regression sums of one sensor column."""
+    __slots__ = ("ewma", "ewvar", "zscore", "sum_x", "sum_tx")
+
+    def __init__(self):
+        self.ewma = 0.0
+        self.ewvar = 0.0
+        self.zscore = 0.0
+        self.sum_x = 0.0
+        self.sum_tx = 0.0
+
+    def update_ewma(self, value: float, alpha: float, first: bool):
+        if first:
+            self.ewma, self.ewvar, self.zscore = value, 0.0, 0.0
+            return
+        std = math.sqrt(self.ewvar)
+        self.zscore = (value - self.ewma) / std if std > 1e-9 else 0.0
+        diff = value - self.ewma
+        increment = alpha * diff
+        self.ewma += increment
+        self.ewvar = (1.0 - alpha) * (self.ewvar + diff * increment)
+
+
+class _ElevatorHistory:
+    __slots__ = (
+        "rows", "size", "head", "base_time", "last_time",
+        "sum_t", "sum_tt", "door_increase", "vibration", "velocity"
+    )
+
+    def __init__(self, base_time: float, initial_rows: int):
+        self.rows = np.zeros(initial_rows, dtype=READING_DTYPE)
+        self.size = 0
+        self.head = 0                 # Next row to write once the buffer is full
+        self.base_time = base_time
+        self.last_time = -math.inf    # Exact timestamp of the newest reading
+        self.sum_t = 0.0
+        self.sum_tt = 0.0
+        self.door_increase = 0.0      # Sum of positive door-counter steps inside the window
+        self.vibration = _Signal()
+        self.velocity = _Signal()
+
+    def oldest_index(self) -> int:
+        return self.head if self.size == len(self.rows) else 0
+
+    def newest_index(self) -> int:
+        return (self.head - 1) % len(self.rows) if self.size == len(self.rows) else self.size - 1
+
+    def recompute_sums(self):
+        """
+        Exact window sums from the buffer (run once per wrap-around). Also re-bases the
+        time offsets on the oldest buffered reading, so they and the regression sums stay
+        small however long the elevator has been reporting.
+        """
+        shift = float(self.rows[self.oldest_index()]["t"])
+        if shift:
+            self.rows["t"][:self.size] -= shift
+            self.base_time += shift
+        order = np.roll(np.arange(self.size), -self.oldest_index()) if self.size == len(self.rows) \
+            else np.arange(self.size)
+        window = self.rows[order]
+        t = window["t"].astype(np.float64) / _SECONDS_PER_HOUR
+        self.sum_t, self.sum_tt = float(t.sum()), float((t * t).sum())
+        for signal, column in ((self.vibration, "vibration"), (self.velocity, "velocity")):
+            x = window[column].astype(np.float64)
+            signal.sum_x, signal.sum_tx = float(x.sum()), float((t * x).sum())
+        steps = np.diff(window["door_cycles"].astype(np.int64))
+        self.door_increase = float(steps[steps > 0].sum())
+
+
+class TelemetryHistory:
+    def __init__(self, capacity: int = 1000, max_elevators: int = 50000, ewma_alpha: float = 0.1,
+                 min_readings: int = 5):
+        self.capacity = max(2, capacity)
+        self.max_elevators = max(1, max_elevators)
+        self.ewma_alpha = ewma_alpha
+        self.min_readings = max(2, min_readings)
+        self._elevators: "OrderedDict[str, _ElevatorHistory]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.appended = 0
+        self.skipped = 0        # Late (out-of-order) or repeated readings
+        self.evicted_elevators = 0
+
+    # ---------------------------------------------------------
+    # Append
+    # ---------------------------------------------------------
+
+    def record(self, reading: TelemetryReading) -> Optional[TrendFeatures]:
+        """
+        Appends a reading to its elevator's history and returns the updated features
+        (None until the elevator has HISTORY_MIN_READINGS readings).
+        Readings not newer than the elevator's latest one (late or repeated readings)
+        are skipped: the window must stay in time order. Callers record each reading once.
+        """
+        timestamp = reading.timestamp.timestamp()
+        with self._lock:
+            history = self._elevators.get(reading.elevator_id)
+            if history is None:
+                history = self._elevators[reading.elevator_id] = _ElevatorHistory(
+                    timestamp, min(_INITIAL_ROWS, self.capacity)
+                )
+                if len(self._elevators) > self.max_elevators:
+                    self._elevators.popitem(last=False)
+                    self.evicted_elevators += 1
+            else:
+                self._elevators.move_to_end(reading.elevator_id)
+
+            if timestamp <= history.last_time:
+                self.skipped += 1
+            else:
+                self._append(history, reading, timestamp)
+                self.appended += 1
+            return self._features(history)
+
+    def _append(self, history: _ElevatorHistory, reading: TelemetryReading, timestamp: float):
+        if history.size == len(history.rows) and len(history.rows) < self.capacity:
+            grown = np.zeros(min(self.capacity, len(history.rows) * 2), dtype=READING_DTYPE)
+            grown[:history.size] = history.rows
+            history.rows = grown
+
+        rows = history.rows
+        full = history.size == len(rows)
+        first = history.size == 0
+        previous_door = None if first else int(rows[history.newest_index()]["door_cycles"])
+
+        if full:
+            # Evict the oldest row from the running sums before overwriting it
+            index = history.head
+            evicted = rows[index]
+            t_old = float(evicted["t"]) / _SECONDS_PER_HOUR
+            history.sum_t -= t_old
+            history.sum_tt -= t_old * t_old
+            for signal, column in ((history.vibration, "vibration"), (history.velocity, "velocity")):
+                x_old = float(evicted[column])
+                signal.sum_x -= x_old
+                signal.sum_tx -= t_old * x_old
+            next_door = int(rows[(index + 1) % len(rows)]["door_cycles"])
+            history.door_increase -= max(0, next_door - int(evicted["door_cycles"]))
+            history.head = (index + 1) % len(rows)
+        else:
+            index = history.size
+            history.size += 1
+
+        row = (
+            np.float64(timestamp - history.base_time),
+            np.float32(reading.velocity_m_s),
+            np.float32(reading.vibration_level_hz),
+            np.uint32(max(0, min(reading.door_cycles_count, np.iinfo(np.uint32).max))),
+        )
+        rows[index] = row
+        history.last_time = timestamp
+
+        # Sums use the stored values so eviction subtracts exactly what was added
+        t = float(row[0]) / _SECONDS_PER_HOUR
+        history.sum_t += t
+        history.sum_tt += t * t
+        for signal, value in ((history.vibration, float(row[2])), (history.velocity, float(row[1]))):
+            signal.sum_x += value
+            signal.sum_tx += t * value
+            signal.update_ewma(value, self.ewma_alpha, first)
+        if previous_door is not None:
+            history.door_increase += max(0, int(row[3]) - previous_door)
+
+        if full and history.head == 0:
+            history.recompute_sums()
+
+    # ---------------------------------------------------------
+    # Read
+    # ---------------------------------------------------------
+
+    def features(self, elevator_id: str) -> Optional[TrendFeatures]:
+        with self._lock:
+            history = self._elevators.get(elevator_id)
+            return self._features(history) if history is not None else None
+
+    def _features(self, history: _ElevatorHistory) -> Optional[TrendFeatures]:
+        n = history.size
+        if n < self.min_readings:
+            return None
+
+        rows = history.rows
+        t_first = float(rows[history.oldest_index()]["t"]) / _SECONDS_PER_HOUR
+        t_last = float(rows[history.newest_index()]["t"]) / _SECONDS_PER_HOUR
+        span = t_last - t_first
+
+        denominator = n * history.sum_tt - history.sum_t ** 2
+        def slope(signal: _Signal) -> Optional[float]:
+            if span <= 0 or denominator <= 1e-12:
+                return None
+            return (n * signal.sum_tx - history.sum_t * signal.sum_x) / denominator
+
+        return TrendFeatures(
+            readings=n,
+            span_hours=round(span, 3),
+            vibration_ewma=round(history.vibration.ewma, 4),
+            vibration_slope_per_hour=_round(slope(history.vibration)),
+            vibration_zscore=round(history.vibration.zscore, 2),
+            velocity_ewma=round(history.velocity.ewma, 4),
+            velocity_slope_per_hour=_round(slope(history.velocity)),
+            velocity_zscore=round(history.velocity.zscore, 2),
+            door_cycles_per_hour=round(history.door_increase / span, 2) if span > 0 else None,
+        )
+
+    def window(self, elevator_id: str) -> Optional[np.ndarray]:
+        """Buffered readings of one elevator, oldest first (a copy)."""
+        with self._lock:
+            history = self._elevators.get(elevator_id)
+            if history is None:
+                return None
+            rows = history.rows[:history.size]
+            return np.roll(rows, -history.oldest_index()) if history.size == len(history.rows) else rows.copy()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "elevators": len(self._elevators),
+                "readings": sum(h.size for h in self._elevators.values()),
+                "buffer_bytes": sum(h.rows.nbytes for h in self._elevators.values()),
+                "appended": self.appended,
+                "skipped": self.skipped,
+                "evicted_elevators": self.evicted_elevators,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._elevators.clear()
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 6)
+
+
+# Process-wide history fed by every ingest/diagnosis entry point
+telemetry_history = TelemetryHistory(
+    capacity=settings.HISTORY_CAPACITY,
+    max_elevators=settings.HISTORY_MAX_ELEVATORS,
+    ewma_alpha=settings.HISTORY_EWMA_ALPHA,
+    min_readings=settings.HISTORY_MIN_READINGS
+)
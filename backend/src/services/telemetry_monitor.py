@@ -0,0 +1,238 @@
+"""
+telemetry_monitor.py
+--------------------
+Streaming ingest: consumes readings from a TelemetrySource, keeps a rolling window
+per elevator and runs the diagnostic graph only when something changes:
+- vibration or velocity crosses its threshold (rising edge), or
+- an error code appears that is not in the elevator's recent window.
+Diagnoses are debounced per elevator: at most one run per TELEMETRY_DEBOUNCE_SECONDS,
+with the latest reading diagnosed once the interval expires (trailing edge).
+Windows are kept for at most max_elevators elevators; the least recently seen is dropped.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Deque, Dict, Optional, Set
+
+from src.core.config import get_settings
+from src.core.schema import DiagnosticResult, TelemetryReading
+from src.services.diagnosis_service import diagnosis_service
+from src.services.telemetry_archive import TelemetryArchive, telemetry_archive
+from src.services.telemetry_history import TelemetryHistory, telemetry_history
+from src.services.telemetry_sources import TelemetrySource, build_telemetry_source
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+DiagnoseFn = Callable[[TelemetryReading], Awaitable[DiagnosticResult]]
+
+
+@dataclass
+class ElevatorWindow:
+    """Rolling state for one elevator."""
+    readings: Deque[TelemetryReading]
+    last_diagnosis_at: Optional[float] = None
+    pending: Optional[TelemetryReading] = None      # Latest reading waiting out the debounce
+    pending_reason: Optional[str] = None
+    deferred: Optional[asyncio.Task] = None
+    last_trigger: Optional[str] = None
+    last_result: Optional[DiagnosticResult] = None
+    last_error: Optional[str] = None
+
+    def recent_codes(self) -> Set[str]:
+        return {code for reading in self.readings for code in reading.error_codes}
+
+
+@dataclass
+class MonitorStats:
+    readings: int = 0
+    triggers: int = 0
+    diagnoses: int = 0
+    debounced: int = 0
+    failures: int = 0
+    evicted_elevators: int = 0
+    by_reason: Dict[str, int] = field(default_factory=dict)
+
+
+class TelemetryMonitor:
+    def __init__(self, diagnose: DiagnoseFn, source: Optional[TelemetrySource] = None,
+                 window_size: int = 60, debounce_seconds: float = 300.0,
+                 vibration_threshold_hz: float = 4.0, velocity_threshold_m_s: float = 2.5,
+                 max_concurrent_diagnoses: int = 4, clock: Callable[[], float] = time.monotonic,
+                 history: Optional[TelemetryHistory] = None, archive: Optional[TelemetryArchive] = None,
+                 max_elevators: int = 50000):
+        self.diagnose = diagnose
+        self.source = source
+        self.window_size = window_size
+        self.max_elevators = max(1, max_elevators)
+        self.debounce_seconds = debounce_seconds
+        self.vibration_threshold_hz = vibration_threshold_hz
+        self.velocity_threshold_m_s = velocity_threshold_m_s
+        self._clock = clock
+        # Long-horizon history for trend features (the window above only drives triggers)
+        self.history = history
+        # Every reading is archived, not only the ones that trigger a diagnosis
+        self.archive = archive
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrent_diagnoses))
+
+        self.windows: "OrderedDict[str, ElevatorWindow]" = OrderedDict()
+        self.stats = MonitorStats()
+        self._consumer: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+
+    # ---------------------------------------------------------
+    # Lifecycle
+    # ---------------------------------------------------------
+
+    def start(self):
+        """Starts consuming the configured source (no-op without one)."""
+        if self.source is not None and self._consumer is None:
+            self._consumer = asyncio.create_task(self._consume())
+
+    async def stop(self):
+        if self.source is not None:
+            await self.source.close()
+        tasks = [t for t in [self._consumer, *self._running] if t is not None]
+        tasks += [w.deferred for w in self.windows.values() if w.deferred is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._consumer = None
+
+    async def _consume(self):
+        try:
+            async for reading in self.source:
+                await self.ingest(reading)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Telemetry source stopped: %s", e)
+
+    # ---------------------------------------------------------
+    # Ingest
+    # ---------------------------------------------------------
+
+    async def ingest(self, reading: TelemetryReading) -> Optional[str]:
+        """
+        Records a reading and schedules a diagnosis if it is a trigger.
+        Returns the trigger reason (None if the reading was just recorded).
+        """
+        self.stats.readings += 1
+        window = self.windows.get(reading.elevator_id)
+        if window is None:
+            window = self.windows[reading.elevator_id] = ElevatorWindow(
+                readings=deque(maxlen=self.window_size)
+            )
+            if len(self.windows) > self.max_elevators:
+                self._evict_oldest()
+        else:
+            self.windows.move_to_end(reading.elevator_id)
+
+        reason = self._trigger_reason(window, reading)
+        window.readings.append(reading)
+        if self.history is not None:
+            self.history.record(reading)
+        if self.archive is not None:
+            self.archive.append(reading)
+
+        if reason is not None:
+            self.stats.triggers += 1
+            self.stats.by_reason[reason] = self.stats.by_reason.get(reason, 0) + 1
+            self._schedule(window, reading, reason)
+        return reason
+
+    def _evict_oldest(self):
+        """Drops the least recently seen elevator's window (and its pending trailing diagnosis)."""
+        elevator_id, window = self.windows.popitem(last=False)
+        if window.deferred is not None and not window.deferred.done():
+            window.deferred.cancel()
+        self.stats.evicted_elevators += 1
+        logger.debug("Dropped telemetry window of %s", elevator_id)
+
+    def _trigger_reason(self, window: ElevatorWindow, reading: TelemetryReading) -> Optional[str]:
+        """Checks a reading against the elevator's window (before it is appended)."""
+        previous = window.readings[-1] if window.readings else None
+
+        new_codes = set(reading.error_codes) - window.recent_codes()
+        if new_codes:
+            return "new_error_code"
+        if reading.vibration_level_hz >= self.vibration_threshold_hz and (
+            previous is None or previous.vibration_level_hz < self.vibration_threshold_hz
+        ):
+            return "vibration_threshold"
+        if reading.velocity_m_s >= self.velocity_threshold_m_s and (
+            previous is None or previous.velocity_m_s < self.velocity_threshold_m_s
+        ):
+            return "velocity_threshold"
+        return None
+
+    def _schedule(self, window: ElevatorWindow, reading: TelemetryReading, reason: str):
+        """Runs the diagnosis now, or defers it to the end of the debounce interval."""
+        now = self._clock()
+        if window.last_diagnosis_at is None or now - window.last_diagnosis_at >= self.debounce_seconds:
+            window.last_diagnosis_at = now
+            self._spawn(self._run_diagnosis(window, reading, reason))
+            return
+
+        # Inside the debounce interval: keep only the latest reading, fire once later
+        self.stats.debounced += 1
+        window.pending = reading
+        window.pending_reason = reason
+        if window.deferred is None or window.deferred.done():
+            delay = self.debounce_seconds - (now - window.last_diagnosis_at)
+            window.deferred = asyncio.create_task(self._run_deferred(window, delay))
+
+    async def _run_deferred(self, window: ElevatorWindow, delay: float):
+        await asyncio.sleep(delay)
+        reading, reason = window.pending, window.pending_reason
+        window.pending = window.pending_reason = None
+        if reading is not None:
+            window.last_diagnosis_at = self._clock()
+            await self._run_diagnosis(window, reading, reason)
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run_diagnosis(self, window: ElevatorWindow, reading: TelemetryReading, reason: str):
+        async with self._semaphore:
+            try:
+                window.last_result = await self.diagnose(reading)
+                window.last_trigger = reason
+                window.last_error = None
+                self.stats.diagnoses += 1
+            except Exception as e:
+                logger.warning("Streaming diagnosis failed for %s: %s", reading.elevator_id, e)
+                window.last_error = str(e)
+                self.stats.failures += 1
+
+    async def drain(self):
+        """Waits for in-flight diagnoses (used by tests and shutdown paths)."""
+        while self._running:
+            await asyncio.gather(*list(self._running), return_exceptions=True)
+
+
+async def _diagnose_with_service(reading: TelemetryReading) -> DiagnosticResult:
+    """Diagnoses through DiagnosisService so streaming triggers share the result cache."""
+    # The monitor has already recorded the reading (see ingest)
+    report, _ = await diagnosis_service.diagnose(reading, recorded=True)
+    return report
+
+
+# Singleton instance for import
+telemetry_monitor = TelemetryMonitor(
+    diagnose=_diagnose_with_service,
+    source=build_telemetry_source(),
+    window_size=settings.TELEMETRY_WINDOW_SIZE,
+    debounce_seconds=settings.TELEMETRY_DEBOUNCE_SECONDS,
+    vibration_threshold_hz=settings.TELEMETRY_VIBRATION_THRESHOLD_HZ,
+    velocity_threshold_m_s=settings.TELEMETRY_VELOCITY_THRESHOLD_M_S,
+    max_concurrent_diagnoses=settings.TELEMETRY_MAX_CONCURRENT_DIAGNOSES,
+    history=telemetry_history if settings.HISTORY_ENABLED else None,
+    archive=telemetry_archive if settings.ARCHIVE_ENABLED else None,
+    max_elevators=settings.TELEMETRY_MAX_ELEVATORS
+)
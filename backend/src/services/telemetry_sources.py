@@ -0,0 +1,115 @@
+"""
+telemetry_sources.py
+--------------------
+Pluggable sources of TelemetryReadings for the streaming ingest subsystem.
+- QueueTelemetrySource: in-process asyncio queue for embedded producers (nothing in the
+  app publishes to it; HTTP ingest calls the monitor directly).
+- MQTTTelemetrySource: subscribes to an MQTT broker (the production path for IoT gateways);
+  a refused or lost connection is retried with capped exponential backoff.
+"""
+
+import asyncio
+import logging
+from typing import AsyncIterator, Optional
+
+from pydantic import ValidationError
+
+from src.core.config import get_settings
+from src.core.schema import TelemetryReading
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Sentinel that ends iteration of a QueueTelemetrySource
+_STOP = object()
+
+
+class TelemetrySource:
+    """
+    Base class for telemetry sources.
+    Subclasses yield validated readings from __aiter__ until closed.
+    """
+
+    def __aiter__(self) -> AsyncIterator[TelemetryReading]:
+        raise NotImplementedError
+
+    async def close(self):
+        """Stops iteration (no-op by default)."""
+
+
+class QueueTelemetrySource(TelemetrySource):
+    def __init__(self, maxsize: int = 0):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    async def publish(self, reading: TelemetryReading):
+        """Enqueues a reading (waits if the queue is bounded and full)."""
+        await self.queue.put(reading)
+
+    async def __aiter__(self) -> AsyncIterator[TelemetryReading]:
+        while True:
+            item = await self.queue.get()
+            if item is _STOP:
+                return
+            yield item
+
+    async def close(self):
+        await self.queue.put(_STOP)
+
+
+class MQTTTelemetrySource(TelemetrySource):
+    """
+    Consumes JSON TelemetryReadings from an MQTT topic.
+    Requires the optional 'aiomqtt' package; malformed messages are skipped.
+    The broker may not be up yet (compose start order) or may restart, so connection
+    errors never end iteration: the client reconnects after reconnect_min_seconds,
+    doubling up to reconnect_max_seconds, and the delay resets once messages flow again.
+    """
+
+    def __init__(self, host: str, port: int, topic: str,
+                 reconnect_min_seconds: float = 1.0, reconnect_max_seconds: float = 30.0):
+        self.host = host
+        self.port = port
+        self.topic = topic
+        self.reconnect_min_seconds = reconnect_min_seconds
+        self.reconnect_max_seconds = reconnect_max_seconds
+        self.reconnects = 0
+
+    async def __aiter__(self) -> AsyncIterator[TelemetryReading]:
+        try:
+            import aiomqtt
+        except ImportError as e:
+            raise RuntimeError("TELEMETRY_SOURCE='mqtt' requires the 'aiomqtt' package.") from e
+
+        delay = self.reconnect_min_seconds
+        while True:
+            try:
+                async with aiomqtt.Client(hostname=self.host, port=self.port) as client:
+                    await client.subscribe(self.topic)
+                    logger.info("Subscribed to %s on %s:%d", self.topic, self.host, self.port)
+                    async for message in client.messages:
+                        delay = self.reconnect_min_seconds
+                        try:
+                            yield TelemetryReading.model_validate_json(message.payload)
+                        except ValidationError as e:
+                            logger.warning("Skipping malformed telemetry on %s: %s", message.topic, e)
+            except aiomqtt.MqttError as e:
+                logger.warning("MQTT connection to %s:%d lost (%s); reconnecting in %.1fs",
+                               self.host, self.port, e, delay)
+            await asyncio.sleep(delay)
+            delay = min(self.reconnect_max_seconds, delay * 2)
+            self.reconnects += 1
+
+
+def build_telemetry_source() -> Optional[TelemetrySource]:
+    """Creates the source selected by settings.TELEMETRY_SOURCE ('queue', 'mqtt' or 'none')."""
+    if settings.TELEMETRY_SOURCE == "mqtt":
+        return MQTTTelemetrySource(
+            host=settings.TELEMETRY_MQTT_HOST,
+            port=settings.TELEMETRY_MQTT_PORT,
+            topic=settings.TELEMETRY_MQTT_TOPIC,
+            reconnect_min_seconds=settings.TELEMETRY_MQTT_RECONNECT_MIN_SECONDS,
+            reconnect_max_seconds=settings.TELEMETRY_MQTT_RECONNECT_MAX_SECONDS
+        )
+    if settings.TELEMETRY_SOURCE == "queue":
+        return QueueTelemetrySource(maxsize=settings.TELEMETRY_QUEUE_SIZE)
+    return None
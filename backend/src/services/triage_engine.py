@@ -0,0 +1,182 @@
+"""
+triage_engine.py
+----------------
+Deterministic pre-triage for known faults.
+Rules are loaded from a JSON config and matched on error codes + sensor thresholds.
+A confident match yields a complete DiagnosticResult (cited from the retrieved manuals)
+without an LLM call. Evaluation is vectorized with NumPy so that thousands of
+readings are triaged in one pass.
+"""
+
+import json
+import logging
+import operator
+import os
+from typing import Dict, List, Literal, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from src.core.config import get_settings
+from src.core.schema import DiagnosticResult, ManualChunk, MaintenanceStep, TelemetryReading
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Sensor columns a rule condition may reference (column order of the feature matrix)
+SENSOR_FIELDS = ("velocity_m_s", "vibration_level_hz", "door_cycles_count")
+
+_OPERATORS = {
+    "<": operator.lt, "<=": operator.le, ">": operator.gt,
+    ">=": operator.ge, "==": operator.eq, "!=": operator.ne,
+}
+
+
+# ------------------------------------------------------------------
+# RULE MODELS
+# ------------------------------------------------------------------
+
+class RuleCondition(BaseModel):
+    field: Literal["velocity_m_s", "vibration_level_hz", "door_cycles_count"]
+    op: Literal["<", "<=", ">", ">=", "==", "!="]
+    value: float
+
+class RuleResult(BaseModel):
+    """The report a rule produces (citations are filled in from retrieved manuals)."""
+    fault_summary: str
+    root_cause_hypothesis: str
+    severity_score: int = Field(..., ge=1, le=10)
+    recommended_actions: List[MaintenanceStep]
+    safety_warnings: List[str]
+
+class TriageRule(BaseModel):
+    id: str
+    description: str = ""
+    error_codes_any: List[str] = Field(default=[], description="Matches if the reading reports any of these")
+    allow_no_codes: bool = Field(default=False, description="Also matches readings with no error codes")
+    conditions: List[RuleCondition] = []
+    confidence: float = Field(..., ge=0.0, le=1.0)
+    citation_error_codes: List[str] = Field(default=[], description="Cite retrieved chunks tagged with these")
+    citation_sources: List[str] = Field(default=[], description="Cite retrieved chunks from these documents")
+    result: RuleResult
+
+class RuleMatch(BaseModel):
+    rule_id: str
+    confidence: float
+
+
+# ------------------------------------------------------------------
+# ENGINE
+# ------------------------------------------------------------------
+
+class TriageEngine:
+    def __init__(self, rules: Sequence[TriageRule], min_confidence: float = 0.9):
+        self.rules = list(rules)
+        self.min_confidence = min_confidence
+        self._by_id: Dict[str, TriageRule] = {rule.id: rule for rule in self.rules}
+
+        # Code vocabulary over all rules; rule_codes[r, k] marks codes rule r accepts
+        self.codes = sorted({code for rule in self.rules for code in rule.error_codes_any})
+        self._code_index = {code: k for k, code in enumerate(self.codes)}
+        self._rule_codes = np.zeros((len(self.rules), len(self.codes)), dtype=bool)
+        for r, rule in enumerate(self.rules):
+            for code in rule.error_codes_any:
+                self._rule_codes[r, self._code_index[code]] = True
+
+        self._confidence = np.array([rule.confidence for rule in self.rules], dtype=np.float64)
+
+    @classmethod
+    def from_file(cls, path: str, min_confidence: float = 0.9) -> "TriageEngine":
+        """Loads rules from a JSON file ({"rules": [...]}); a missing file disables triage."""
+        if not os.path.exists(path):
+            logger.warning("Triage rules not found at %s; every reading goes to the LLM.", path)
+            return cls([], min_confidence)
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls([TriageRule(**rule) for rule in data.get("rules", [])], min_confidence)
+
+    def match_batch(self, readings: Sequence[TelemetryReading]) -> List[Optional[RuleMatch]]:
+        """
+        Vectorized rule evaluation.
+        For each reading returns the most confident matching rule, or None when no rule
+        matches with at least `min_confidence` or the rule does not explain every
+        error code the reading reports (those need the LLM).
+        """
+        n = len(readings)
+        if n == 0 or not self.rules:
+            return [None] * n
+
+        # Feature matrix (n x sensors) and code incidence matrix (n x vocabulary)
+        sensors = np.array(
+            [[getattr(r, name) for name in SENSOR_FIELDS] for r in readings], dtype=np.float64
+        )
+        incidence = np.zeros((n, len(self.codes)), dtype=bool)
+        code_counts = np.zeros(n, dtype=np.int64)
+        for i, reading in enumerate(readings):
+            unique = set(reading.error_codes)
+            code_counts[i] = len(unique)
+            for code in unique:
+                k = self._code_index.get(code)
+                if k is not None:
+                    incidence[i, k] = True
+
+        # matches[i, r]: reading i satisfies rule r
+        matches = np.empty((n, len(self.rules)), dtype=bool)
+        has_codes = code_counts > 0
+        for r, rule in enumerate(self.rules):
+            if rule.error_codes_any:
+                mask = (incidence & self._rule_codes[r]).any(axis=1)
+            else:
+                mask = np.zeros(n, dtype=bool)
+            if rule.allow_no_codes or not rule.error_codes_any:
+                mask |= ~has_codes
+            for cond in rule.conditions:
+                column = sensors[:, SENSOR_FIELDS.index(cond.field)]
+                mask &= _OPERATORS[cond.op](column, cond.value)
+            matches[:, r] = mask
+
+        # Best rule per reading = highest confidence among matches
+        scores = np.where(matches, self._confidence, -1.0)
+        best = scores.argmax(axis=1)
+        best_scores = scores[np.arange(n), best]
+
+        # The chosen rule must account for every code on the reading
+        covered = (incidence & self._rule_codes[best]).sum(axis=1)
+        confident = (best_scores >= self.min_confidence) & (covered == code_counts)
+
+        return [
+            RuleMatch(rule_id=self.rules[best[i]].id, confidence=float(best_scores[i])) if confident[i] else None
+            for i in range(n)
+        ]
+
+    def build_report(self, match: RuleMatch, docs: Sequence[ManualChunk]) -> Optional[DiagnosticResult]:
+        """
+        Turns a rule match into a DiagnosticResult citing the retrieved manuals.
+        Returns None when none of the retrieved chunks supports the rule.
+        """
+        rule = self._by_id[match.rule_id]
+        citations = [
+            f"{doc.source_doc} (Pg {doc.page_number})"
+            for doc in docs
+            if set(doc.related_error_codes) & set(rule.citation_error_codes)
+            or doc.source_doc in rule.citation_sources
+        ]
+        if not citations:
+            return None
+
+        return DiagnosticResult(
+            **rule.result.model_dump(),
+            cited_manual_references=list(dict.fromkeys(citations))
+        )
+
+    def triage(self, telemetry: TelemetryReading, docs: Sequence[ManualChunk]) -> Optional[Tuple[str, DiagnosticResult]]:
+        """Single-reading entry point: (rule_id, report) or None if the LLM is needed."""
+        match = self.match_batch([telemetry])[0]
+        if match is None:
+            return None
+        report = self.build_report(match, docs)
+        return (match.rule_id, report) if report is not None else None
+
+
+# Singleton instance for import
+triage_engine = TriageEngine.from_file(settings.TRIAGE_RULES_PATH, settings.TRIAGE_MIN_CONFIDENCE)
@@ -0,0 +1,268 @@
+"""
+vector_mirror.py
+----------------
+Optional in-process mirror of the manual collection for hot-path dense search.
+The corpus is small next to the request volume, so the vectors are kept as one
+contiguous, L2-normalized NumPy matrix (float32 or float16) saved as .npy and
+memory-mapped read-only: every uvicorn worker maps the same file and shares the pages.
+Top-k is a single matrix product (cosine == dot product on normalized rows).
+
+Refresh is incremental: points carry an 'indexed_at' timestamp, so only points newer
+than the mirrored watermark are scrolled. A point-count mismatch (deletions) triggers a
+full rebuild. When the mirror is missing or older than its staleness bound, search
+returns None and the caller falls back to Qdrant.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+from qdrant_client.http import models
+
+# Payload field set at upsert time (epoch seconds) that drives incremental refresh
+INDEXED_AT_FIELD = "indexed_at"
+
+_META_FILE = "mirror.json"
+_SCROLL_PAGE = 512
+
+
+class _Corpus(NamedTuple):
+    """One mirrored generation; swapped in as a whole so readers never mix generations."""
+    matrix: np.ndarray
+    ids: List[str]
+    payloads: List[Dict[str, Any]]
+
+
+class VectorMirror:
+    def __init__(self, directory: str, dtype: str = "float32", max_staleness_seconds: float = 120.0,
+                 clock: Callable[[], float] = time.time):
+        if dtype not in ("float32", "float16"):
+            raise ValueError("VECTOR_MIRROR_DTYPE must be 'float32' or 'float16'.")
+        self.directory = directory
+        self.dtype = np.dtype(dtype)
+        self.max_staleness_seconds = max_staleness_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self._corpus: Optional[_Corpus] = None   # None: nothing mirrored (or an empty collection)
+        self.generation: Optional[str] = None
+        self.watermark = 0.0              # Newest indexed_at mirrored
+        self.refreshed_at: Optional[float] = None
+
+        self.searches = 0
+        self.fallbacks = 0
+        self.refreshes = 0
+        self.full_rebuilds = 0
+
+    # ---------------------------------------------------------
+    # Search
+    # ---------------------------------------------------------
+
+    def is_fresh(self) -> bool:
+        return (
+            self._corpus is not None
+            and self.refreshed_at is not None
+            and self._clock() - self.refreshed_at <= self.max_staleness_seconds
+        )
+
+    def search_batch(self, query_vectors: Sequence[Sequence[float]],
+                     limit: int) -> Optional[List[List[models.ScoredPoint]]]:
+        """
+        Top-`limit` hits per query, shaped like QdrantClient.search_batch results.
+        Returns None when the mirror cannot answer (missing, stale, dimension mismatch).
+        """
+        # Read the generation once: a concurrent refresh swaps in a new one
+        corpus = self._corpus
+        if corpus is None or not self.is_fresh():
+            self.fallbacks += 1
+            return None
+
+        matrix, ids, payloads = corpus
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        if queries.ndim != 2 or queries.shape[1] != matrix.shape[1]:
+            self.fallbacks += 1
+            return None
+        self.searches += 1
+
+        n = matrix.shape[0]
+        k = min(limit, n)
+        if k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1.0, norms)
+        scores = np.asarray(matrix @ queries.T.astype(self.dtype), dtype=np.float32).T   # (queries, points)
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in enumerate(top):
+            ordered = candidates[np.argsort(-scores[row, candidates], kind="stable")]
+            results.append([
+                models.ScoredPoint(id=ids[j], version=0, score=float(scores[row, j]), payload=payloads[j])
+                for j in ordered
+            ])
+        return results
+
+    # ---------------------------------------------------------
+    # Refresh
+    # ---------------------------------------------------------
+
+    def refresh(self, client, collection_name: str) -> str:
+        """
+        Brings the mirror up to date with the collection.
+        Returns 'unchanged', 'incremental' or 'rebuilt'.
+        """
+        with self._lock:
+            self._load_if_newer()
+            expected = client.count(collection_name=collection_name, exact=True).count
+
+            corpus = self._corpus
+            if corpus is None:
+                return self._rebuild(client, collection_name)
+
+            changed = self._scroll(client, collection_name, newer_than=self.watermark)
+            if not changed and len(corpus.ids) == expected:
+                self.refreshed_at = self._clock()
+                return "unchanged"
+
+            rows = {point_id: i for i, point_id in enumerate(corpus.ids)}
+            vectors = np.array(corpus.matrix, dtype=np.float32)   # Copy out of the read-only map
+            ids, payloads = list(corpus.ids), list(corpus.payloads)
+            appended = []
+            for record in changed:
+                point_id = str(record.id)
+                if point_id in rows:
+                    vectors[rows[point_id]] = record.vector
+                    payloads[rows[point_id]] = record.payload
+                else:
+                    ids.append(point_id)
+                    payloads.append(record.payload)
+                    appended.append(record.vector)
+
+            if len(ids) != expected:
+                # Points were deleted since the last refresh
+                return self._rebuild(client, collection_name)
+
+            if appended:
+                vectors = np.vstack([vectors, np.asarray(appended, dtype=np.float32)])
+            self._write(vectors, ids, payloads, max([self.watermark] + [_indexed_at(r) for r in changed]))
+            self.refreshes += 1
+            return "incremental"
+
+    def _rebuild(self, client, collection_name: str) -> str:
+        records = self._scroll(client, collection_name)
+        if not records:
+            # Nothing to mirror; searches go to Qdrant. A previously mirrored corpus is
+            # replaced by an empty generation so the other workers drop it too.
+            if self._corpus is not None:
+                self._write(np.zeros((0, 0), dtype=np.float32), [], [], 0.0)
+                self.full_rebuilds += 1
+            self.refreshed_at = self._clock()
+            return "rebuilt"
+
+        vectors = np.asarray([r.vector for r in records], dtype=np.float32)
+        self._write(
+            vectors,
+            [str(r.id) for r in records],
+            [r.payload for r in records],
+            max(_indexed_at(r) for r in records)
+        )
+        self.full_rebuilds += 1
+        return "rebuilt"
+
+    def _scroll(self, client, collection_name: str, newer_than: Optional[float] = None) -> list:
+        scroll_filter = None
+        if newer_than is not None:
+            scroll_filter = models.Filter(must=[
+                models.FieldCondition(key=INDEXED_AT_FIELD, range=models.Range(gt=newer_than))
+            ])
+
+        records, offset = [], None
+        while True:
+            page, offset = client.scroll(
+                collection_name=collection_name,
+                scroll_filter=scroll_filter,
+                limit=_SCROLL_PAGE,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True
+            )
+            records.extend(page)
+            if offset is None:
+                return records
+
+    # ---------------------------------------------------------
+    # Storage (shared between workers)
+    # ---------------------------------------------------------
+
+    def _write(self, vectors: np.ndarray, ids: List[str], payloads: List[Dict[str, Any]], watermark: float):
+        """
+        Writes a new generation and swaps the metadata atomically, then maps it.
+        An empty generation (no ids) has metadata only.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        generation = uuid.uuid4().hex
+        if ids:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            normalized = (vectors / np.where(norms == 0, 1.0, norms)).astype(self.dtype)
+            np.save(os.path.join(self.directory, f"{generation}.npy"), normalized)
+
+        meta_path = os.path.join(self.directory, _META_FILE)
+        tmp_path = f"{meta_path}.{generation}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"generation": generation, "watermark": watermark, "ids": ids, "payloads": payloads}, f)
+        os.replace(tmp_path, meta_path)
+
+        previous = self.generation
+        self._load()
+        if previous and previous != generation:
+            # Workers still mapping the old file keep its pages until they reload
+            try:
+                os.remove(os.path.join(self.directory, f"{previous}.npy"))
+            except OSError:
+                pass    # Also the case for an empty generation (no .npy)
+
+    def _load_if_newer(self):
+        """Picks up a generation another worker already wrote (no scroll needed)."""
+        meta_path = os.path.join(self.directory, _META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                generation = json.load(f).get("generation")
+            if generation != self.generation:
+                self._load()
+
+    def _load(self):
+        with open(os.path.join(self.directory, _META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        corpus = None
+        if meta["ids"]:
+            matrix = np.load(os.path.join(self.directory, f"{meta['generation']}.npy"), mmap_mode="r")
+            if matrix.dtype != self.dtype:
+                matrix = matrix.astype(self.dtype)
+            corpus = _Corpus(matrix, meta["ids"], meta["payloads"])
+
+        # One assignment swaps matrix, ids and payloads together
+        self._corpus = corpus
+        self.generation = meta["generation"]
+        self.watermark = meta["watermark"]
+        self.refreshed_at = self._clock()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "points": 0 if self._corpus is None else len(self._corpus.ids),
+            "dtype": self.dtype.name,
+            "fresh": self.is_fresh(),
+            "searches": self.searches,
+            "fallbacks": self.fallbacks,
+            "refreshes": self.refreshes,
+            "full_rebuilds": self.full_rebuilds,
+        }
+
+
+def _indexed_at(record) -> float:
+    value = (record.payload or {}).get(INDEXED_AT_FIELD)
+    return float(value) if isinstance(value, (int, float)) else 0.0
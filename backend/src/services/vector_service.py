@@ -2,117 +2,733 @@
 vector_service.py
 -----------------
 Manages interactions with the Qdrant Vector Database.
-Responsible for initializing collections, embedding text (using OpenAI),
+Responsible for initializing collections, embedding text (via the configured provider),
 and performing similarity search to retrieve relevant technical manuals.
 """
 
+import asyncio
+import functools
+import logging
+import time
 import uuid
-from typing import List
-from qdrant_client import QdrantClient
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.http import models
-from langchain_openai import OpenAIEmbeddings
 from langchain_core.documents import Document
 
 from src.core.config import get_settings
+from src.core.http_clients import qdrant_client_args
+from src.core.lazy import Lazy
+from src.core.observability import EMBEDDING_SECONDS, QDRANT_SECONDS, observe
 from src.core.schema import ManualChunk
+from src.core.tokens import CHARS_PER_TOKEN
+from src.services.collection_profiles import (
+    EXACT_SEARCH_PARAMS, active_profile, hnsw_config, quantization_config, search_params, vectors_config
+)
+from src.services.collection_summary import CollectionSummary, PointFacets
+from src.services.embedding_cache import EmbeddingCache, normalize_query
+from src.services.embedding_providers import build_embedding_provider
+from src.services.rate_limiter import TokenBucket
+from src.services.vector_mirror import INDEXED_AT_FIELD, VectorMirror
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Payload field holding the error codes a chunk is tagged with
+ERROR_CODE_FIELD = "related_error_codes"
+
+# Points per page when listing the collection's IDs
+SCROLL_PAGE_SIZE = 1024
+
+# Score given to chunks found by exact tag match (cosine similarity tops out at 1.0)
+EXACT_MATCH_SCORE = 1.0
 
 class VectorService:
     def __init__(self):
         """
-        Initialize Qdrant client and OpenAI Embeddings.
+        Initialize Qdrant client and the embedding provider.
         We connect to the 'qdrant' host defined in docker-compose.
         """
-        self.client = QdrantClient(host=settings.QDRANT_HOST, port=settings.QDRANT_PORT)
+        self.client = QdrantClient(**qdrant_client_args())
+        # Async twin used by the request path so searches never block the event loop
+        self.async_client = AsyncQdrantClient(**qdrant_client_args())
         self.collection_name = "kone_manuals"
         
-        # Initialize Embeddings
-        # Uses OPENAI_API_KEY from settings automatically
-        self.embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+        # Initialize Embeddings (OpenAI, local CPU model or hashing; see EMBEDDING_PROVIDER)
+        self.embeddings = build_embedding_provider()
+        self.vector_size = self.embeddings.dimension
+
+        # Storage profile (quantization, on-disk originals, HNSW) and its matching search params
+        self.profile = active_profile()
+        self.search_params = search_params(self.profile)
+
+        # Error codes repeat constantly, so query vectors are cached (memory + disk).
+        # Keyed by provider name so switching providers never serves foreign vectors.
+        self.query_cache = EmbeddingCache(
+            model_name=self.embeddings.name,
+            max_entries=settings.EMBEDDING_CACHE_SIZE,
+            db_path=settings.EMBEDDING_CACHE_PATH or None
+        )
+
+        # Per-document / error-code counts for the admin listing (kept current by upserts/deletes)
+        self.summary = CollectionSummary(ttl_seconds=settings.KB_SUMMARY_TTL_SECONDS)
+
+        # Optional in-process copy of the collection for dense search (None = always Qdrant)
+        self.mirror = VectorMirror(
+            directory=settings.VECTOR_MIRROR_PATH,
+            dtype=settings.VECTOR_MIRROR_DTYPE,
+            max_staleness_seconds=settings.VECTOR_MIRROR_MAX_STALENESS_SECONDS
+        ) if settings.VECTOR_MIRROR_ENABLED else None
 
     def ensure_collection_exists(self):
         """
         Checks if the vector collection exists; if not, creates it.
-        The vector size for 'text-embedding-3-small' is 1536.
+        The vector size comes from the embedding provider; storage and indexing from the
+        collection profile (QDRANT_COLLECTION_PROFILE).
         """
         collections = self.client.get_collections()
         exists = any(c.name == self.collection_name for c in collections.collections)
 
         if not exists:
-            print(f"Creating collection: {self.collection_name}")
+            logger.info("Creating collection: %s (profile '%s')", self.collection_name, self.profile.name)
             self.client.create_collection(
                 collection_name=self.collection_name,
-                vectors_config=models.VectorParams(
-                    size=1536,  # Dimension for text-embedding-3-small
-                    distance=models.Distance.COSINE
-                )
+                vectors_config=vectors_config(self.profile, self.vector_size),
+                hnsw_config=hnsw_config(self.profile),
+                quantization_config=quantization_config(self.profile)
             )
         else:
-            print(f"Collection {self.collection_name} already exists.")
+            logger.info("Collection %s already exists.", self.collection_name)
+            self._check_vector_size()
+            self._check_profile()
+
+        self._ensure_error_code_index()
+
+    def _check_vector_size(self):
+        """Fails fast if the collection was built with a different embedding size."""
+        vectors = self.client.get_collection(self.collection_name).config.params.vectors
+        size = getattr(vectors, "size", None)
+        if isinstance(size, int) and size != self.vector_size:
+            raise ValueError(
+                f"Collection '{self.collection_name}' stores {size}-dim vectors but "
+                f"{self.embeddings.name} produces {self.vector_size}; re-create the collection and re-seed."
+            )
+
+    def _check_profile(self):
+        """
+        Warns when the existing collection was created with a different quantization
+        (storage settings are fixed at creation; re-create the collection to switch).
+        """
+        quantization = self.client.get_collection(self.collection_name).config.quantization_config
+        stored = "none"
+        if isinstance(quantization, models.ScalarQuantization):
+            stored = "scalar"
+        elif isinstance(quantization, models.BinaryQuantization):
+            stored = "binary"
+        elif quantization is not None:
+            stored = type(quantization).__name__
+        if stored != self.profile.quantization:
+            logger.warning(
+                "Collection '%s' uses %s quantization but profile '%s' expects %s; "
+                "re-create the collection and re-seed to apply the profile.",
+                self.collection_name, stored, self.profile.name, self.profile.quantization
+            )
+
+    def _ensure_error_code_index(self):
+        """
+        Creates the keyword payload index on 'related_error_codes' (used by the
+        exact error-code fast path). Safe to call on collections created before it existed.
+        """
+        info = self.client.get_collection(self.collection_name)
+        if ERROR_CODE_FIELD not in (info.payload_schema or {}):
+            logger.info("Creating payload index: %s", ERROR_CODE_FIELD)
+            self.client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name=ERROR_CODE_FIELD,
+                field_schema=models.PayloadSchemaType.KEYWORD
+            )
 
-    def upsert_manuals(self, manuals: List[ManualChunk]):
+    def upsert_manuals(self, manuals: List[ManualChunk], progress: Optional[Callable[..., None]] = None,
+                       limiter: Optional[TokenBucket] = None) -> Dict[str, Any]:
         """
         Ingests parsed manual chunks into Qdrant.
-        1. Converts text to vectors.
-        2. Uploads to Qdrant with metadata (page number, source).
+        1. Converts text to vectors in batches (several batches in flight at once).
+        2. Uploads to Qdrant in bounded chunks with metadata (page number, source),
+           retrying each chunk independently so one failed request does not lose the rest.
+        `progress` is called with embedded=/upserted=/failed= counts as batches complete;
+        `limiter` (estimated tokens) throttles the embedding calls.
+        Returns ingestion statistics, including throughput in chunks/s.
         """
+        report = progress or (lambda **counts: None)
         self.ensure_collection_exists()
-        
-        points = []
-        for chunk in manuals:
-            # Generate embedding
-            vector = self.embeddings.embed_query(chunk.content)
-            
-            # Create payload for retrieval later
-            payload = {
-                "content": chunk.content,
-                "source_doc": chunk.source_doc,
-                "page_number": chunk.page_number,
-                "related_error_codes": chunk.related_error_codes
-            }
-            
-            # Create Qdrant Point
-            points.append(models.PointStruct(
-                id=str(uuid.uuid4()),
-                vector=vector,
-                payload=payload
-            ))
-
-        # Batch upload
-        self.client.upsert(
+        started = time.perf_counter()
+
+        batch_size = max(1, settings.EMBEDDING_BATCH_SIZE)
+        batches = [manuals[i:i + batch_size] for i in range(0, len(manuals), batch_size)]
+
+        pending: List[models.PointStruct] = []
+        upserted = 0
+        failed = 0
+
+        # Embedding is network-bound, so a small thread pool keeps several
+        # embed_documents calls in flight. Results come back in input order.
+        concurrency = max(1, settings.EMBEDDING_MAX_CONCURRENCY)
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            embed = functools.partial(self._embed_batch, limiter=limiter)
+            for batch, vectors in zip(batches, _bounded_map(pool, embed, batches, 2 * concurrency)):
+                report(embedded=len(batch))
+                pending.extend(self._build_point(chunk, vector) for chunk, vector in zip(batch, vectors))
+
+                # Flush full upsert chunks as soon as they are ready
+                while len(pending) >= settings.UPSERT_BATCH_SIZE:
+                    ok = self._upsert_with_retry(pending[:settings.UPSERT_BATCH_SIZE])
+                    upserted += ok
+                    failed += settings.UPSERT_BATCH_SIZE - ok
+                    report(upserted=ok, failed=settings.UPSERT_BATCH_SIZE - ok)
+                    pending = pending[settings.UPSERT_BATCH_SIZE:]
+
+        if pending:
+            ok = self._upsert_with_retry(pending)
+            upserted += ok
+            failed += len(pending) - ok
+            report(upserted=ok, failed=len(pending) - ok)
+
+        self.refresh_mirror()
+
+        elapsed = time.perf_counter() - started
+        throughput = upserted / elapsed if elapsed > 0 else 0.0
+        logger.info(
+            "Successfully upserted %d manual chunks (%d failed) in %.2fs (%.1f chunks/s).",
+            upserted, failed, elapsed, throughput
+        )
+        return {
+            "total": len(manuals),
+            "upserted": upserted,
+            "failed": failed,
+            "elapsed_seconds": round(elapsed, 3),
+            "chunks_per_second": round(throughput, 1),
+        }
+
+    def _embed_batch(self, batch: List[ManualChunk], limiter: Optional[TokenBucket] = None) -> List[List[float]]:
+        """Embeds a batch of chunks with a single embed_documents call."""
+        if limiter is not None:
+            # Length-based estimate: exact counts would cost a tokenizer pass per chunk
+            limiter.acquire(sum(len(chunk.content) // CHARS_PER_TOKEN + 1 for chunk in batch))
+        with observe(EMBEDDING_SECONDS, "embedding.documents", operation="documents"):
+            return self.embeddings.embed_documents([chunk.content for chunk in batch])
+
+    def _build_point(self, chunk: ManualChunk, vector: List[float]) -> models.PointStruct:
+        """Creates a Qdrant point with the payload used for retrieval later."""
+        payload = {
+            "content": chunk.content,
+            "source_doc": chunk.source_doc,
+            "page_number": chunk.page_number,
+            "related_error_codes": chunk.related_error_codes,
+            # Lets the vector mirror pick up new/changed points incrementally
+            INDEXED_AT_FIELD: time.time()
+        }
+        return models.PointStruct(
+            id=point_id(chunk.chunk_id),
+            vector=vector,
+            payload=payload
+        )
+
+    def list_point_ids(self) -> Set[str]:
+        """IDs of every point in the collection (paged scroll, no payloads or vectors)."""
+        self.ensure_collection_exists()
+        ids: Set[str] = set()
+        offset = None
+        with observe(QDRANT_SECONDS, "qdrant.scroll_ids", operation="scroll_ids", backend="qdrant"):
+            while True:
+                records, offset = self.client.scroll(
+                    collection_name=self.collection_name,
+                    limit=SCROLL_PAGE_SIZE,
+                    offset=offset,
+                    with_payload=False,
+                    with_vectors=False
+                )
+                ids.update(str(record.id) for record in records)
+                if offset is None:
+                    return ids
+
+    def delete_points(self, ids: List[str]) -> int:
+        """Deletes points by ID (e.g. chunks of a manual that changed or was removed)."""
+        for i in range(0, len(ids), settings.UPSERT_BATCH_SIZE):
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=models.PointIdsList(points=ids[i:i + settings.UPSERT_BATCH_SIZE])
+            )
+            self.summary.apply_delete(ids[i:i + settings.UPSERT_BATCH_SIZE])
+        self.refresh_mirror()
+        return len(ids)
+
+    def measure_recall(self, queries: int, k: int) -> Optional[Dict[str, Any]]:
+        """
+        Recall@k of the profile's search (HNSW, quantized + rescored) against exact
+        full-precision search, using up to `queries` stored vectors as the queries.
+        None for an empty collection.
+        """
+        records, _ = self.client.scroll(
             collection_name=self.collection_name,
-            points=points
+            limit=queries,
+            with_payload=False,
+            with_vectors=True
         )
-        print(f"Successfully upserted {len(points)} manual chunks.")
+        vectors = [record.vector for record in records if record.vector]
+        if not vectors:
+            return None
+
+        def run(params: Optional[models.SearchParams]):
+            return self.client.search_batch(
+                collection_name=self.collection_name,
+                requests=[models.SearchRequest(vector=vector, limit=k, params=params) for vector in vectors]
+            )
+
+        with observe(QDRANT_SECONDS, "qdrant.recall_check", operation="recall_check", backend="qdrant"):
+            approximate = run(self.search_params)
+            exact = run(EXACT_SEARCH_PARAMS)
+        found = sum(len({hit.id for hit in a} & {hit.id for hit in e}) for a, e in zip(approximate, exact))
+        expected = sum(len(e) for e in exact)
+        return {
+            "profile": self.profile.name,
+            "queries": len(vectors),
+            "k": k,
+            "recall": round(found / expected, 4) if expected else 1.0,
+        }
+
+    def _upsert_with_retry(self, points: List[models.PointStruct]) -> int:
+        """
+        Uploads one bounded chunk of points, retrying with exponential backoff.
+        Returns the number of points written (0 if every attempt failed).
+        """
+        attempts = max(1, settings.UPSERT_MAX_RETRIES)
+        for attempt in range(1, attempts + 1):
+            try:
+                self.client.upsert(
+                    collection_name=self.collection_name,
+                    points=points
+                )
+                self.summary.apply_upsert(
+                    (str(p.id), p.payload["source_doc"], p.payload[ERROR_CODE_FIELD]) for p in points
+                )
+                return len(points)
+            except Exception as e:
+                logger.warning("Upsert of %d points failed (attempt %d/%d): %s", len(points), attempt, attempts, e)
+                if attempt < attempts:
+                    time.sleep(settings.UPSERT_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+        # A timed-out request may still have been applied; recount on the next read
+        self.summary.invalidate()
+        return 0
+
+    def embed_query(self, query: str) -> List[float]:
+        """
+        Embeds a search query, serving repeat queries from the embedding cache.
+        """
+        return self.query_cache.get_or_embed(query, self._embed_query_uncached)
+
+    def _embed_query_uncached(self, text: str) -> List[float]:
+        with observe(EMBEDDING_SECONDS, "embedding.query", server_timing="embed", operation="query"):
+            return self.embeddings.embed_query(text)
 
     def search_similar(self, query: str, limit: int = 3) -> List[ManualChunk]:
         """
         Performs a semantic search for the query (e.g., an error code or description).
         Returns a list of ManualChunk objects.
         """
-        # 1. Embed the query
-        query_vector = self.embeddings.embed_query(query)
+        # 1. Embed the query (cached)
+        query_vector = self.embed_query(query)
 
-        # 2. Search Qdrant
-        search_result = self.client.search(
-            collection_name=self.collection_name,
-            query_vector=query_vector,
-            limit=limit
-        )
+        # 2. Search the in-process mirror, or Qdrant if it cannot answer
+        mirrored = self._mirror_search([query_vector], limit)
+        if mirrored is not None:
+            search_result = mirrored[0]
+        else:
+            with observe(QDRANT_SECONDS, "qdrant.search", server_timing="qdrant",
+                         operation="search", backend="qdrant"):
+                search_result = self.client.search(
+                    collection_name=self.collection_name,
+                    query_vector=query_vector,
+                    limit=limit,
+                    search_params=self.search_params
+                )
 
         # 3. Map back to Pydantic models
-        results = []
-        for hit in search_result:
-            results.append(ManualChunk(
-                chunk_id=str(hit.id),
-                content=hit.payload["content"],
-                source_doc=hit.payload["source_doc"],
-                page_number=hit.payload["page_number"],
-                related_error_codes=hit.payload.get("related_error_codes", [])
-            ))
-            
-        return results
-
-# Singleton instance for import
-vector_service = VectorService()
\ No newline at end of file
+        return [self._to_chunk(hit) for hit in search_result]
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """
+        Embeds several queries at once.
+        Cached vectors are reused; all misses go out in a single embed_documents call.
+        """
+        vectors: List[Optional[List[float]]] = [self.query_cache.get(q) for q in queries]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+
+        if missing:
+            with observe(EMBEDDING_SECONDS, "embedding.queries", server_timing="embed", operation="queries"):
+                fresh = self.embeddings.embed_documents([normalize_query(queries[i]) for i in missing])
+            for i, vector in zip(missing, fresh):
+                self.query_cache.put(queries[i], vector)
+                vectors[i] = vector
+
+        return vectors
+
+    def search_batch(self, queries: List[str], limit_per_query: int = 2,
+                     limit: Optional[int] = None) -> List[ManualChunk]:
+        """
+        Multi-query retrieval in one round trip per backend.
+        1. Embeds all queries together.
+        2. Runs every query through a single Qdrant batch search request.
+        3. Merges hits, keeping the best score per chunk, ranked by score and cut to `limit`.
+        """
+        # Repeated queries would only produce duplicate hits
+        unique_queries = list(dict.fromkeys(normalize_query(q) for q in queries if q.strip()))
+        if not unique_queries:
+            return []
+
+        vectors = self.embed_queries(unique_queries)
+
+        batch_result = self._mirror_search(vectors, limit_per_query)
+        if batch_result is None:
+            with observe(QDRANT_SECONDS, "qdrant.search_batch", server_timing="qdrant",
+                         operation="search_batch", backend="qdrant"):
+                batch_result = self.client.search_batch(
+                    collection_name=self.collection_name,
+                    requests=[
+                        models.SearchRequest(
+                            vector=vector, limit=limit_per_query, with_payload=True, params=self.search_params
+                        )
+                        for vector in vectors
+                    ]
+                )
+
+        return self._merge_hits(batch_result, limit)
+
+    def search_by_error_codes(self, codes: List[str], limit: int) -> List[ManualChunk]:
+        """
+        Fetches chunks explicitly tagged with any of the codes.
+        Uses a filtered scroll over the keyword index: no embedding, no vectors transferred.
+        """
+        codes = [normalize_query(c) for c in codes if c.strip()]
+        if not codes:
+            return []
+
+        with observe(QDRANT_SECONDS, "qdrant.scroll", server_timing="qdrant",
+                     operation="scroll", backend="qdrant"):
+            records, _ = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=self._error_code_filter(codes),
+                limit=limit,
+                with_payload=True,
+                with_vectors=False
+            )
+        return [self._to_chunk(record, score=EXACT_MATCH_SCORE) for record in records]
+
+    def fetch_by_source(self, source_docs: List[str], limit: int) -> List[ManualChunk]:
+        """Fetches chunks of specific documents (e.g. the safety manual) by payload filter."""
+        if not source_docs:
+            return []
+        with observe(QDRANT_SECONDS, "qdrant.scroll_source", server_timing="qdrant",
+                     operation="scroll_source", backend="qdrant"):
+            records, _ = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=models.Filter(must=[
+                    models.FieldCondition(key="source_doc", match=models.MatchAny(any=list(source_docs)))
+                ]),
+                limit=limit,
+                with_payload=True,
+                with_vectors=False
+            )
+        return [self._to_chunk(record) for record in records]
+
+    def retrieve(self, queries: List[str], limit_per_query: int = 2,
+                 limit: Optional[int] = None) -> List[ManualChunk]:
+        """
+        Retrieval entry point used by the graph; behaviour follows settings.RETRIEVAL_MODE:
+        - 'dense': semantic search only (search_batch).
+        - 'exact_first': tagged chunks first; dense search only for codes with too few tagged hits.
+        - 'hybrid': tagged chunks plus dense search for every code.
+        """
+        if settings.RETRIEVAL_MODE == "dense":
+            return self.search_batch(queries, limit_per_query=limit_per_query, limit=limit)
+
+        tagged = self.search_by_error_codes(queries, limit=self._tagged_fetch_limit(queries, limit_per_query))
+        dense_queries = self._dense_fallback_queries(queries, tagged)
+        dense = self.search_batch(dense_queries, limit_per_query=limit_per_query) if dense_queries else []
+
+        return self._rank_unique(tagged + dense, limit)
+
+    # ---------------------------------------------------------
+    # Async API (used when the graph runs via ainvoke)
+    # ---------------------------------------------------------
+
+    async def aembed_query(self, query: str) -> List[float]:
+        """Async counterpart of embed_query."""
+        vector = self.query_cache.get(query)
+        if vector is None:
+            with observe(EMBEDDING_SECONDS, "embedding.query", server_timing="embed", operation="query"):
+                vector = await self.embeddings.aembed_query(normalize_query(query))
+            self.query_cache.put(query, vector)
+        return vector
+
+    async def aembed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Async counterpart of embed_queries (cache lookups are local and stay synchronous)."""
+        vectors: List[Optional[List[float]]] = [self.query_cache.get(q) for q in queries]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+
+        if missing:
+            with observe(EMBEDDING_SECONDS, "embedding.queries", server_timing="embed", operation="queries"):
+                fresh = await self.embeddings.aembed_documents([normalize_query(queries[i]) for i in missing])
+            for i, vector in zip(missing, fresh):
+                self.query_cache.put(queries[i], vector)
+                vectors[i] = vector
+
+        return vectors
+
+    async def asearch_similar(self, query: str, limit: int = 3) -> List[ManualChunk]:
+        """Async counterpart of search_similar."""
+        query_vector = await self.aembed_query(query)
+        mirrored = self._mirror_search([query_vector], limit)
+        if mirrored is not None:
+            search_result = mirrored[0]
+        else:
+            with observe(QDRANT_SECONDS, "qdrant.search", server_timing="qdrant",
+                         operation="search", backend="qdrant"):
+                search_result = await self.async_client.search(
+                    collection_name=self.collection_name,
+                    query_vector=query_vector,
+                    limit=limit,
+                    search_params=self.search_params
+                )
+        return [self._to_chunk(hit) for hit in search_result]
+
+    async def asearch_batch(self, queries: List[str], limit_per_query: int = 2,
+                            limit: Optional[int] = None) -> List[ManualChunk]:
+        """Async counterpart of search_batch."""
+        unique_queries = list(dict.fromkeys(normalize_query(q) for q in queries if q.strip()))
+        if not unique_queries:
+            return []
+
+        vectors = await self.aembed_queries(unique_queries)
+
+        batch_result = self._mirror_search(vectors, limit_per_query)
+        if batch_result is None:
+            with observe(QDRANT_SECONDS, "qdrant.search_batch", server_timing="qdrant",
+                         operation="search_batch", backend="qdrant"):
+                batch_result = await self.async_client.search_batch(
+                    collection_name=self.collection_name,
+                    requests=[
+                        models.SearchRequest(
+                            vector=vector, limit=limit_per_query, with_payload=True, params=self.search_params
+                        )
+                        for vector in vectors
+                    ]
+                )
+
+        return self._merge_hits(batch_result, limit)
+
+    async def asearch_by_error_codes(self, codes: List[str], limit: int) -> List[ManualChunk]:
+        """Async counterpart of search_by_error_codes."""
+        codes = [normalize_query(c) for c in codes if c.strip()]
+        if not codes:
+            return []
+
+        with observe(QDRANT_SECONDS, "qdrant.scroll", server_timing="qdrant",
+                     operation="scroll", backend="qdrant"):
+            records, _ = await self.async_client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=self._error_code_filter(codes),
+                limit=limit,
+                with_payload=True,
+                with_vectors=False
+            )
+        return [self._to_chunk(record, score=EXACT_MATCH_SCORE) for record in records]
+
+    async def aretrieve(self, queries: List[str], limit_per_query: int = 2,
+                        limit: Optional[int] = None) -> List[ManualChunk]:
+        """Async counterpart of retrieve."""
+        if settings.RETRIEVAL_MODE == "dense":
+            return await self.asearch_batch(queries, limit_per_query=limit_per_query, limit=limit)
+
+        tagged = await self.asearch_by_error_codes(queries, limit=self._tagged_fetch_limit(queries, limit_per_query))
+        dense_queries = self._dense_fallback_queries(queries, tagged)
+        dense = await self.asearch_batch(dense_queries, limit_per_query=limit_per_query) if dense_queries else []
+
+        return self._rank_unique(tagged + dense, limit)
+
+    # ---------------------------------------------------------
+    # Listing (admin)
+    # ---------------------------------------------------------
+
+    def list_chunks(self, limit: int, cursor: Optional[str] = None, source_doc: Optional[str] = None,
+                    include_content: bool = False) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of the collection in point-ID order, plus the cursor of the next page
+        (None on the last one). Only the listed payload fields are transferred, never vectors.
+        """
+        if not self.client.collection_exists(self.collection_name):
+            return [], None
+
+        fields = ["source_doc", "page_number", ERROR_CODE_FIELD] + (["content"] if include_content else [])
+        scroll_filter = models.Filter(must=[
+            models.FieldCondition(key="source_doc", match=models.MatchValue(value=source_doc))
+        ]) if source_doc else None
+        with observe(QDRANT_SECONDS, "qdrant.scroll_page", operation="scroll_page", backend="qdrant"):
+            records, next_offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=scroll_filter,
+                limit=limit,
+                # Integer point IDs round-trip through the cursor as strings
+                offset=int(cursor) if cursor and cursor.isdigit() else cursor,
+                with_payload=fields,
+                with_vectors=False
+            )
+        chunks = [
+            {"chunk_id": str(record.id), **{field: record.payload.get(field) for field in fields}}
+            for record in records
+        ]
+        return chunks, str(next_offset) if next_offset is not None else None
+
+    def collection_summary(self) -> Dict[str, Any]:
+        """Chunk counts per source document and per error code (cached; see CollectionSummary)."""
+        return self.summary.get(self._scroll_facets)
+
+    def _scroll_facets(self) -> Iterator[PointFacets]:
+        """Full scroll reading just source_doc and the error-code tags of every point."""
+        if not self.client.collection_exists(self.collection_name):
+            return
+        offset = None
+        while True:
+            with observe(QDRANT_SECONDS, "qdrant.scroll_facets", operation="scroll_facets", backend="qdrant"):
+                records, offset = self.client.scroll(
+                    collection_name=self.collection_name,
+                    limit=SCROLL_PAGE_SIZE,
+                    offset=offset,
+                    with_payload=["source_doc", ERROR_CODE_FIELD],
+                    with_vectors=False
+                )
+            for record in records:
+                yield str(record.id), record.payload.get("source_doc", ""), record.payload.get(ERROR_CODE_FIELD) or ()
+            if offset is None:
+                return
+
+    # ---------------------------------------------------------
+    # In-process mirror
+    # ---------------------------------------------------------
+
+    def refresh_mirror(self) -> Optional[str]:
+        """Syncs the vector mirror with Qdrant (no-op when the mirror is disabled)."""
+        if self.mirror is None:
+            return None
+        try:
+            return self.mirror.refresh(self.client, self.collection_name)
+        except Exception as e:
+            # The mirror just goes stale; searches fall back to Qdrant
+            logger.warning("Vector mirror refresh failed: %s", e)
+            return None
+
+    async def run_mirror_refresh(self):
+        """Background loop (started from the app lifespan) keeping the mirror fresh."""
+        while self.mirror is not None:
+            await asyncio.to_thread(self.refresh_mirror)
+            await asyncio.sleep(settings.VECTOR_MIRROR_REFRESH_SECONDS)
+
+    def _mirror_search(self, vectors: List[List[float]], limit: int):
+        """Mirror hits shaped like a Qdrant batch result, or None to use Qdrant."""
+        if self.mirror is None:
+            return None
+        with observe(QDRANT_SECONDS, "mirror.search_batch", server_timing="mirror",
+                     operation="search_batch", backend="mirror"):
+            return self.mirror.search_batch(vectors, limit)
+
+    # ---------------------------------------------------------
+    # Helpers
+    # ---------------------------------------------------------
+
+    @staticmethod
+    def _error_code_filter(codes: List[str]) -> models.Filter:
+        return models.Filter(must=[
+            models.FieldCondition(key=ERROR_CODE_FIELD, match=models.MatchAny(any=codes))
+        ])
+
+    @staticmethod
+    def _tagged_fetch_limit(queries: List[str], limit_per_query: int) -> int:
+        return max(1, limit_per_query * len(queries))
+
+    @staticmethod
+    def _dense_fallback_queries(queries: List[str], tagged: List[ManualChunk]) -> List[str]:
+        """
+        Queries that still need a semantic search.
+        In 'hybrid' mode that is every query; in 'exact_first' mode only the ones
+        with fewer than RETRIEVAL_MIN_TAGGED_HITS exactly-tagged chunks.
+        """
+        if settings.RETRIEVAL_MODE == "hybrid":
+            return queries
+
+        tag_counts: Dict[str, int] = {}
+        for chunk in tagged:
+            for code in chunk.related_error_codes:
+                tag_counts[code] = tag_counts.get(code, 0) + 1
+
+        return [
+            q for q in queries
+            if tag_counts.get(normalize_query(q), 0) < settings.RETRIEVAL_MIN_TAGGED_HITS
+        ]
+
+    def _merge_hits(self, batch_result, limit: Optional[int]) -> List[ManualChunk]:
+        """Deduplicates hits across queries by chunk_id, keeping the highest score."""
+        return self._rank_unique([self._to_chunk(hit) for hits in batch_result for hit in hits], limit)
+
+    @staticmethod
+    def _rank_unique(chunks: List[ManualChunk], limit: Optional[int]) -> List[ManualChunk]:
+        """Keeps the best-scoring copy of each chunk, ranked by score and cut to `limit`."""
+        best: Dict[str, ManualChunk] = {}
+        for chunk in chunks:
+            current = best.get(chunk.chunk_id)
+            if current is None or (chunk.score or 0.0) > (current.score or 0.0):
+                best[chunk.chunk_id] = chunk
+
+        ranked = sorted(best.values(), key=lambda c: c.score or 0.0, reverse=True)
+        return ranked[:limit] if limit is not None else ranked
+
+    @staticmethod
+    def _to_chunk(hit, score: Optional[float] = None) -> ManualChunk:
+        """Maps a Qdrant hit (or scrolled record) back to the ManualChunk domain model."""
+        return ManualChunk(
+            chunk_id=str(hit.id),
+            content=hit.payload["content"],
+            source_doc=hit.payload["source_doc"],
+            page_number=hit.payload["page_number"],
+            related_error_codes=hit.payload.get(ERROR_CODE_FIELD, []),
+            score=score if score is not None else getattr(hit, "score", None)
+        )
+
+def _bounded_map(pool: ThreadPoolExecutor, fn: Callable, items: List, window: int) -> Iterator:
+    """
+    Ordered pool.map that keeps at most `window` calls submitted (pool.map submits
+    everything up front). Vectors are held only a few batches ahead of the upserts,
+    and a consumer that stops early leaves little work behind.
+    """
+    futures = deque()
+    for item in items:
+        futures.append(pool.submit(fn, item))
+        if len(futures) >= window:
+            yield futures.popleft().result()
+    while futures:
+        yield futures.popleft().result()
+
+
+def point_id(chunk_id: str) -> str:
+    """
+    Qdrant point ID of a chunk: the chunk_id itself when it is a UUID (content-hash IDs
+    from the ingestion pipeline), otherwise a UUID derived from it. Either way,
+    re-upserting the same chunk overwrites its point instead of adding a duplicate.
+    """
+    try:
+        return str(uuid.UUID(chunk_id))
+    except ValueError:
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"flowguard:chunk:{chunk_id}"))
+
+# Singleton instance for import (built on first use, normally during warmup)
+vector_service: VectorService = Lazy(VectorService)
\ No newline at end of file
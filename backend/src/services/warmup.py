@@ -0,0 +1,126 @@
+"""
+warmup.py
+---------
+Startup warmup and the readiness state behind GET /ready.
+Service singletons are built lazily (see src/core/lazy.py), so importing the app is
+cheap and /health answers immediately. The lifespan runs warm_up() in the background;
+/ready returns 503 until it has:
+1. built the vector/LLM services (including the chat model) and compiled the graph,
+2. connected to Qdrant (sync and async clients) and ensured the collection exists,
+3. loaded the tokenizer and embedded the hot error codes (every triage rule code plus
+   WARMUP_ERROR_CODES) into the query cache.
+Steps 1-2 are required and retried every WARMUP_RETRY_SECONDS (e.g. while Qdrant is
+still starting). Step 3 is best effort: a failure is logged and reported, but an
+embedding-provider hiccup does not keep every worker out of the pool.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from src.agents.graph import app_graph
+from src.core.config import get_settings
+from src.core.lazy import resolve
+from src.core.tokens import count_tokens
+from src.services.llm_service import llm_service
+from src.services.triage_engine import triage_engine
+from src.services.vector_service import vector_service
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._ready = asyncio.Event()
+        self.started_at = clock()
+        self.ready_after_seconds = None
+        self.steps: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def mark_ready(self):
+        if not self.ready:
+            self.ready_after_seconds = round(self._clock() - self.started_at, 3)
+            self._ready.set()
+
+    async def wait(self):
+        await self._ready.wait()
+
+    def record(self, name: str, seconds: float, error: Optional[str] = None, **details):
+        self.steps[name] = {"seconds": round(seconds, 3), "ok": error is None, "error": error, **details}
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "ready_after_seconds": self.ready_after_seconds,
+            "steps": self.steps,
+        }
+
+
+# ---------------------------------------------------------
+# Steps
+# ---------------------------------------------------------
+
+def build_services():
+    resolve(vector_service)
+    # The chat model is otherwise created on the first diagnosis (this is where a missing key shows up)
+    llm_service.build_models()
+    resolve(app_graph)
+
+
+async def connect_qdrant():
+    await asyncio.to_thread(vector_service.ensure_collection_exists)
+    # Opens the async client's connection pool before the first request needs it
+    await vector_service.async_client.get_collections()
+
+
+def hot_error_codes() -> List[str]:
+    return list(dict.fromkeys(triage_engine.codes + list(settings.WARMUP_ERROR_CODES)))
+
+
+def embed_hot_codes() -> Dict[str, int]:
+    codes = hot_error_codes()
+    if codes:
+        vector_service.embed_queries(codes)
+    return {"codes": len(codes)}
+
+
+async def _run_step(readiness: Readiness, name: str, step: Callable, required: bool):
+    while True:
+        started = time.perf_counter()
+        try:
+            result = step()
+            if asyncio.iscoroutine(result):
+                result = await result
+        except Exception as e:
+            readiness.record(name, time.perf_counter() - started, error=f"{type(e).__name__}: {e}")
+            if not required:
+                logger.warning("Warmup step '%s' failed (continuing): %s", name, e)
+                return
+            logger.warning("Warmup step '%s' failed; retrying in %.0fs: %s", name, settings.WARMUP_RETRY_SECONDS, e)
+            await asyncio.sleep(settings.WARMUP_RETRY_SECONDS)
+            continue
+        details = result if isinstance(result, dict) else {}
+        readiness.record(name, time.perf_counter() - started, **details)
+        return
+
+
+async def warm_up(readiness: Readiness):
+    """Runs the warmup steps, then flips readiness (immediately when WARMUP_ENABLED is off)."""
+    if settings.WARMUP_ENABLED:
+        # Blocking constructors (model loading, client setup) stay off the event loop
+        await _run_step(readiness, "services", lambda: asyncio.to_thread(build_services), required=True)
+        await _run_step(readiness, "qdrant", connect_qdrant, required=True)
+        await _run_step(readiness, "tokenizer", lambda: asyncio.to_thread(count_tokens, "warmup"), required=False)
+        await _run_step(readiness, "hot_error_codes", lambda: asyncio.to_thread(embed_hot_codes), required=False)
+    readiness.mark_ready()
+    logger.info("Ready after %.2fs.", readiness.ready_after_seconds)
+
+
+# Process-wide readiness flag (GET /ready)
+readiness = Readiness()
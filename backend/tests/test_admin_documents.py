@@ -0,0 +1,92 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+from qdrant_client import QdrantClient
+
+from src.main import app
+from src.services.ingestion import make_chunk
+from src.services.vector_service import VectorService, settings
+
+def chunks(n, source_doc="Door.pdf", codes=("E-302",)):
+    return [make_chunk(source_doc, i, f"{source_doc} page {i}", list(codes)) for i in range(n)]
+
+class CountingClient(QdrantClient):
+    """In-memory Qdrant that counts scroll requests."""
+    scrolls = 0
+    def scroll(self, *args, **kwargs):
+        CountingClient.scrolls += 1
+        return super().scroll(*args, **kwargs)
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_PROVIDER", "hashing")
+    monkeypatch.setattr(settings, "EMBEDDING_DIMENSION", 32)
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_PATH", "")
+    monkeypatch.setattr(settings, "VECTOR_MIRROR_ENABLED", False)
+    service = VectorService()
+    service.client = CountingClient(":memory:")
+    service.upsert_manuals(chunks(7) + chunks(3, "Ride.pdf", ("W-104", "E-302")))
+    return service
+
+# ---------------------------------------------------------
+# TEST 1: Cursor Pagination
+# ---------------------------------------------------------
+
+def test_pages_cover_the_collection_once(service):
+    seen, cursor = [], None
+    while True:
+        page, cursor = service.list_chunks(limit=4, cursor=cursor)
+        seen.extend(page)
+        if cursor is None:
+            break
+
+    assert len(seen) == 10 and len({c["chunk_id"] for c in seen}) == 10
+    assert "content" not in seen[0] and set(seen[0]) == {"chunk_id", "source_doc", "page_number", "related_error_codes"}
+
+def test_listing_filters_by_document(service):
+    page, cursor = service.list_chunks(limit=50, source_doc="Ride.pdf", include_content=True)
+    assert cursor is None and len(page) == 3
+    assert page[0]["content"].startswith("Ride.pdf page")
+
+# ---------------------------------------------------------
+# TEST 2: Cached Facets
+# ---------------------------------------------------------
+
+def test_summary_counts_documents_and_error_codes(service):
+    summary = service.collection_summary()
+    assert summary["chunks"] == 10
+    assert summary["documents"] == [{"source_doc": "Door.pdf", "chunks": 7}, {"source_doc": "Ride.pdf", "chunks": 3}]
+    assert summary["error_codes"] == [{"code": "E-302", "chunks": 10}, {"code": "W-104", "chunks": 3}]
+
+def test_summary_is_maintained_without_rescanning(service):
+    service.collection_summary()
+    scrolls = CountingClient.scrolls
+
+    service.upsert_manuals(chunks(2, "Safety.pdf", ()))
+    service.upsert_manuals(chunks(1))   # Re-upsert of an existing chunk is not double counted
+    service.delete_points([chunks(3, "Ride.pdf")[0].chunk_id])
+    summary = service.collection_summary()
+
+    assert CountingClient.scrolls == scrolls
+    assert summary["chunks"] == 11
+    assert {d["source_doc"]: d["chunks"] for d in summary["documents"]} == {"Door.pdf": 7, "Ride.pdf": 2, "Safety.pdf": 2}
+    assert summary == service.summary.get(service._scroll_facets)
+
+def test_failed_upsert_invalidates_summary(service, monkeypatch):
+    service.collection_summary()
+    monkeypatch.setattr(settings, "UPSERT_MAX_RETRIES", 1)
+    monkeypatch.setattr(service.client, "upsert", lambda **kwargs: (_ for _ in ()).throw(RuntimeError("timeout")))
+
+    service.upsert_manuals(chunks(1, "Other.pdf"))
+    assert service.summary.stats()["cached"] is False
+
+@pytest.mark.asyncio
+async def test_documents_endpoint(service, monkeypatch):
+    monkeypatch.setattr("src.routers.admin.vector_service", service)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        first = (await ac.get("/api/v1/admin/documents", params={"limit": 6})).json()
+        second = (await ac.get("/api/v1/admin/documents", params={"limit": 6, "cursor": first["next_cursor"]})).json()
+        invalid = await ac.get("/api/v1/admin/documents", params={"cursor": "not-a-point"})
+
+    assert first["count"] == 10 and len(first["chunks"]) == 6
+    assert len(second["chunks"]) == 4 and second["next_cursor"] is None
+    assert invalid.status_code == 400
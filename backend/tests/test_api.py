@@ -5,10 +5,16 @@ Integration tests for the FastAPI endpoints.
 Simulates real HTTP requests to ensure the Agent is correctly exposed.
 """
 
+import asyncio
+import json
+import time
 import pytest
+from unittest.mock import AsyncMock, patch
 from httpx import AsyncClient, ASGITransport
 from src.main import app
-from src.core.schema import TelemetryReading
+from src.core.schema import TelemetryReading, DiagnosticResult, ManualChunk
+from src.services.diagnosis_service import diagnosis_service
+from src.services.diagnosis_cache import telemetry_fingerprint
 
 # We use the ASGI transport to test the app without spinning up a real server
 @pytest.mark.asyncio
@@ -55,4 +61,175 @@ async def test_diagnose_endpoint():
     summary_lower = data["fault_summary"].lower()
     assert "door" in summary_lower or "obstruction" in summary_lower
 
-    print("\n\n✅ Integration Test Passed: Agent successfully diagnosed 'Door Obstruction' via API.")
\ No newline at end of file
+    print("\n\n✅ Integration Test Passed: Agent successfully diagnosed 'Door Obstruction' via API.")
+
+# ---------------------------------------------------------
+# Diagnosis Cache (graph mocked, no network)
+# ---------------------------------------------------------
+
+def make_report(severity=3):
+    return DiagnosticResult(
+        fault_summary="Door obstruction",
+        root_cause_hypothesis="Debris in sill groove",
+        severity_score=severity,
+        cited_manual_references=["KONE_Door_Systems_Maintenance_2024.pdf (Pg 42)"],
+        recommended_actions=[{"step_order": 1, "instruction": "Clean sill groove"}],
+        safety_warnings=["Lock out power"]
+    )
+
+CACHE_PAYLOAD = {
+    "elevator_id": "TEST-CACHE-001",
+    "velocity_m_s": 0.0,
+    "door_cycles_count": 12000,
+    "vibration_level_hz": 0.1,
+    "error_codes": ["E-302"]
+}
+
+@pytest.fixture
+def clean_cache():
+    diagnosis_service.cache.clear()
+    yield
+    diagnosis_service.cache.clear()
+
+@pytest.mark.asyncio
+@patch("src.services.diagnosis_service.app_graph")
+async def test_diagnose_repeat_fault_served_from_cache(mock_graph, clean_cache):
+    mock_graph.ainvoke = AsyncMock(return_value={"diagnostic_report": make_report(), "validation_error": None})
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        first = await ac.post("/api/v1/diagnose", json=CACHE_PAYLOAD)
+        # Same fault on another elevator in the same bank
+        second = await ac.post("/api/v1/diagnose", json={**CACHE_PAYLOAD, "elevator_id": "TEST-CACHE-002"})
+
+    assert first.headers["X-Diagnosis-Cache"] == "MISS"
+    assert second.headers["X-Diagnosis-Cache"] == "HIT"
+    assert second.json() == first.json()
+    mock_graph.ainvoke.assert_awaited_once()
+
+@pytest.mark.asyncio
+@patch("src.services.diagnosis_service.app_graph")
+async def test_diagnose_unvalidated_report_not_cached(mock_graph, clean_cache):
+    mock_graph.ainvoke = AsyncMock(return_value={
+        "diagnostic_report": make_report(), "validation_error": "Guardrail failed"
+    })
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        await ac.post("/api/v1/diagnose", json=CACHE_PAYLOAD)
+        second = await ac.post("/api/v1/diagnose", json=CACHE_PAYLOAD)
+
+    assert second.headers["X-Diagnosis-Cache"] == "MISS"
+    assert mock_graph.ainvoke.await_count == 2
+
+# ---------------------------------------------------------
+# Batch Diagnosis
+# ---------------------------------------------------------
+
+@pytest.mark.asyncio
+@patch("src.services.diagnosis_service.app_graph")
+async def test_batch_dedupes_and_isolates_bad_items(mock_graph, clean_cache):
+    """
+    Scenario: 3 readings share a fault, 1 is malformed, 1 is a different fault that crashes.
+    Expectation: 2 graph runs, per-item results in input order, the batch itself succeeds.
+    """
+    async def fake_ainvoke(state):
+        if state["telemetry"].error_codes == ["X-999"]:
+            raise RuntimeError("LLM unavailable")
+        return {"diagnostic_report": make_report(), "validation_error": None}
+    mock_graph.ainvoke = AsyncMock(side_effect=fake_ainvoke)
+
+    batch = [
+        {**CACHE_PAYLOAD, "elevator_id": "A"},
+        {**CACHE_PAYLOAD, "elevator_id": "B"},
+        {"elevator_id": "BROKEN", "velocity_m_s": "fast"},
+        {**CACHE_PAYLOAD, "elevator_id": "C", "error_codes": ["X-999"]},
+        {**CACHE_PAYLOAD, "elevator_id": "D"},
+    ]
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/api/v1/diagnose/batch", json=batch)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert mock_graph.ainvoke.await_count == 2
+    assert data["unique_faults"] == 2
+    assert [r["elevator_id"] for r in data["results"]] == ["A", "B", "BROKEN", "C", "D"]
+    assert [r["status"] for r in data["results"]] == ["ok", "ok", "error", "error", "ok"]
+    assert [r["deduplicated"] for r in data["results"]] == [False, True, False, False, True]
+    assert "velocity_m_s" in data["results"][2]["error"]
+    assert data["results"][3]["error"] == "LLM unavailable"
+    assert (data["succeeded"], data["failed"]) == (3, 2)
+
+@pytest.mark.asyncio
+@patch("src.services.diagnosis_service.app_graph")
+async def test_batch_runs_unique_faults_concurrently(mock_graph, clean_cache):
+    """Wall time should track the slowest item, not the sum of all items."""
+    async def slow_ainvoke(state):
+        await asyncio.sleep(0.2)
+        return {"diagnostic_report": make_report(), "validation_error": None}
+    mock_graph.ainvoke = AsyncMock(side_effect=slow_ainvoke)
+
+    batch = [{**CACHE_PAYLOAD, "error_codes": [f"E-{i}"]} for i in range(5)]
+    started = time.perf_counter()
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/api/v1/diagnose/batch", json=batch)
+    elapsed = time.perf_counter() - started
+
+    assert response.json()["succeeded"] == 5
+    assert elapsed < 0.6
+
+# ---------------------------------------------------------
+# Streaming Diagnosis (SSE)
+# ---------------------------------------------------------
+
+def parse_sse(text):
+    """Splits an SSE body into (event, data) pairs."""
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+@pytest.mark.asyncio
+@patch("src.agents.nodes.llm_service")
+@patch("src.agents.nodes.vector_service")
+async def test_stream_emits_sources_tokens_retries_and_report(mock_vector_service, mock_llm_service, clean_cache):
+    """
+    Scenario: First draft misses the lock-out warning, second draft passes.
+    Expectation: retrieved -> tokens -> retry -> tokens -> report, in that order.
+    """
+    mock_vector_service.aretrieve = AsyncMock(return_value=[
+        ManualChunk(chunk_id="42", content="Sill groove", source_doc="Door.pdf", page_number=42, score=1.0)
+    ])
+    drafts = [make_report(severity=9).model_copy(update={"safety_warnings": ["Wear gloves"]}),
+              make_report(severity=9)]
+
+    async def fake_stream(prompt, on_token, usage=None):
+        on_token("Door ")
+        on_token("obstruction")
+        return drafts.pop(0)
+    mock_llm_service.astream_diagnose = AsyncMock(side_effect=fake_stream)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/api/v1/diagnose/stream", json=CACHE_PAYLOAD)
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    names = [name for name, _ in events]
+    assert names == ["retrieved", "token", "token", "retry", "token", "token", "report"]
+    assert events[0][1]["sources"][0]["source_doc"] == "Door.pdf"
+    assert events[3][1]["retry_count"] == 1 and events[3][1]["will_retry"] is True
+    assert events[-1][1]["validated"] is True
+    assert events[-1][1]["report"]["fault_summary"] == "Door obstruction"
+    mock_llm_service.adiagnose.assert_not_called()
+
+@pytest.mark.asyncio
+@patch("src.services.diagnosis_service.app_graph")
+async def test_stream_serves_cached_report_immediately(mock_graph, clean_cache):
+    diagnosis_service.cache.put(telemetry_fingerprint(TelemetryReading(**CACHE_PAYLOAD)), make_report())
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/api/v1/diagnose/stream", json=CACHE_PAYLOAD)
+
+    events = parse_sse(response.text)
+    assert [name for name, _ in events] == ["report"]
+    assert events[0][1]["cached"] is True
+    mock_graph.astream.assert_not_called()
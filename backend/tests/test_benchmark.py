@@ -0,0 +1,53 @@
+import asyncio
+import pytest
+from src.core.timing import TimingRecorder, percentile, summarize
+from src.scripts import benchmark
+
+# ---------------------------------------------------------
+# TEST 1: Latency Statistics
+# ---------------------------------------------------------
+
+def test_percentiles_interpolate():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == pytest.approx(50.5)
+    assert percentile(values, 99) == pytest.approx(99.01)
+    assert summarize([]) == {"count": 0}
+    assert summarize([0.010, 0.020])["p50_ms"] == pytest.approx(15.0)
+
+def test_timing_recorder_keeps_bounded_samples():
+    recorder = TimingRecorder(max_samples=3)
+    for seconds in [1.0, 2.0, 3.0, 4.0]:
+        recorder.record("diagnose", seconds)
+
+    assert recorder.summary()["diagnose"]["count"] == 3
+    assert recorder.totals()["diagnose"] == {"count": 4, "seconds": 10.0}
+
+# ---------------------------------------------------------
+# TEST 2: Offline Harness Smoke Run
+# ---------------------------------------------------------
+
+def test_benchmark_runs_offline(monkeypatch):
+    options = benchmark.parse_args([
+        "--requests", "12", "--concurrency", "4", "--unique-faults", "3", "--warmup", "0",
+        "--llm-latency-ms", "1", "--llm-jitter-ms", "0", "--retry-rate", "0", "--embedding-dimension", "32"
+    ])
+    fake = benchmark.install_stand_ins(options, patch=monkeypatch.setattr)
+
+    result = asyncio.run(benchmark.run_benchmark(options, fake))
+    res = result["results"]
+
+    assert res["status_codes"] == {"200": 12}
+    assert res["latency"]["count"] == 12
+    assert res["requests_per_second"] > 0
+    # At most one LLM call per distinct fault (repeats hit the cache or coalesce)
+    assert res["llm_calls"] <= 3
+    assert {"retrieve", "triage", "validate"} <= set(res["nodes"])
+
+def test_compare_reports_percent_change():
+    def doc(rps, p95):
+        return {"results": {"requests_per_second": rps, "llm_calls": 10,
+                            "latency": {"p50_ms": 10.0, "p95_ms": p95, "p99_ms": 40.0}}}
+
+    deltas = benchmark.compare(doc(110.0, 30.0), doc(100.0, 20.0))
+    assert deltas["requests_per_second"]["change_pct"] == 10.0
+    assert deltas["p95_ms"]["change_pct"] == 50.0
@@ -0,0 +1,106 @@
+import time
+import pytest
+from unittest.mock import MagicMock
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from src.services.collection_profiles import (
+    get_profile, hnsw_config, quantization_config, search_params, vectors_config
+)
+from src.services.ingestion import SAMPLE_MANUALS, IngestionPipeline, IngestionReport
+from src.services.ingestion_jobs import SUCCEEDED, IngestionJobManager
+from src.services.vector_service import VectorService, settings
+
+@pytest.fixture
+def offline(monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_PROVIDER", "hashing")
+    monkeypatch.setattr(settings, "EMBEDDING_DIMENSION", 64)
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_PATH", "")
+    monkeypatch.setattr(settings, "VECTOR_MIRROR_ENABLED", False)
+
+# ---------------------------------------------------------
+# TEST 1: Profiles and Qdrant Parameters
+# ---------------------------------------------------------
+
+def test_full_profile_is_the_plain_baseline():
+    profile = get_profile("full")
+
+    assert not profile.quantized and quantization_config(profile) is None
+    assert search_params(profile) is None
+    assert vectors_config(profile, 256).on_disk is False
+
+def test_scalar_profile_quantizes_and_rescores():
+    profile = get_profile("scalar", oversampling=4.0, search_hnsw_ef=None)
+    config = quantization_config(profile)
+    params = search_params(profile)
+
+    assert isinstance(config, models.ScalarQuantization) and config.scalar.always_ram
+    assert vectors_config(profile, 256).on_disk is True
+    assert params.quantization.rescore is True and params.quantization.oversampling == 4.0
+
+def test_overrides_and_validation():
+    profile = get_profile("binary", hnsw_m=32, search_hnsw_ef=128, on_disk=False)
+
+    assert isinstance(quantization_config(profile), models.BinaryQuantization)
+    assert hnsw_config(profile).m == 32 and search_params(profile).hnsw_ef == 128
+    assert profile.on_disk is False
+    with pytest.raises(ValueError, match="Unknown collection profile"):
+        get_profile("pq")
+
+# ---------------------------------------------------------
+# TEST 2: VectorService Integration
+# ---------------------------------------------------------
+
+def test_collection_is_created_and_searched_with_the_profile(offline, monkeypatch):
+    monkeypatch.setattr(settings, "QDRANT_COLLECTION_PROFILE", "scalar")
+    service = VectorService()
+    service.client = MagicMock()
+    service.client.get_collections.return_value.collections = []
+
+    service.ensure_collection_exists()
+    created = service.client.create_collection.call_args.kwargs
+    assert created["vectors_config"].size == 64 and created["vectors_config"].on_disk is True
+    assert isinstance(created["quantization_config"], models.ScalarQuantization)
+
+    service.search_similar("E-302")
+    assert service.client.search.call_args.kwargs["search_params"].quantization.rescore is True
+    service.search_batch(["E-302", "door"])
+    requests = service.client.search_batch.call_args.kwargs["requests"]
+    assert all(request.params is service.search_params for request in requests)
+
+def test_ingest_reports_recall_against_exact_search(offline, tmp_path):
+    service = VectorService()
+    service.client = QdrantClient(":memory:")
+    pipeline = IngestionPipeline(service, str(tmp_path / "manifest.json"), workers=1)
+
+    report = pipeline.ingest_chunks(SAMPLE_MANUALS)
+    assert report.recall_check["recall"] == 1.0 and report.recall_check["ok"]
+    assert report.recall_check["queries"] == len(SAMPLE_MANUALS)
+
+    # Nothing changed, so nothing to re-check
+    assert pipeline.ingest_chunks(SAMPLE_MANUALS).recall_check is None
+
+def test_low_recall_is_flagged(offline, tmp_path, monkeypatch):
+    service = VectorService()
+    service.client = QdrantClient(":memory:")
+    monkeypatch.setattr(service, "measure_recall",
+                        lambda queries, k: {"profile": "binary", "queries": queries, "k": k, "recall": 0.8})
+    pipeline = IngestionPipeline(service, str(tmp_path / "manifest.json"), workers=1)
+
+    report = pipeline.ingest_chunks(SAMPLE_MANUALS)
+    assert report.recall_check["ok"] is False
+
+def test_low_recall_is_a_job_error_but_the_job_succeeds(tmp_path):
+    pipeline = MagicMock(limiter=None)
+    pipeline.sync.return_value = IngestionReport(
+        files=1, recall_check={"profile": "binary", "queries": 20, "k": 10, "recall": 0.8, "ok": False}
+    )
+    manager = IngestionJobManager(pipeline, str(tmp_path / "jobs"))
+    job = manager.submit("manuals")
+    deadline = time.monotonic() + 10.0
+    while job.status != SUCCEEDED:
+        assert time.monotonic() < deadline, f"job stuck in {job.status}"
+        time.sleep(0.01)
+
+    assert job.recall_check["recall"] == 0.8
+    assert len(job.errors) == 1 and "Recall@10 of profile 'binary'" in job.errors[0]
@@ -0,0 +1,63 @@
+import pytest
+from src.services.diagnosis_cache import DiagnosisCache, telemetry_fingerprint
+from src.core.schema import DiagnosticResult, TelemetryReading
+
+def make_reading(**overrides):
+    data = {
+        "elevator_id": "KONE-ESPOO-01",
+        "velocity_m_s": 1.2,
+        "door_cycles_count": 15000,
+        "vibration_level_hz": 4.2,
+        "error_codes": ["E-302", "W-104"]
+    }
+    data.update(overrides)
+    return TelemetryReading(**data)
+
+def make_result():
+    return DiagnosticResult(
+        fault_summary="Door obstruction",
+        root_cause_hypothesis="Debris",
+        severity_score=3,
+        cited_manual_references=[],
+        recommended_actions=[],
+        safety_warnings=[]
+    )
+
+# ---------------------------------------------------------
+# TEST 1: Fingerprint
+# ---------------------------------------------------------
+
+def test_fingerprint_ignores_identity_and_code_order():
+    """Same fault on a different elevator, later, with codes reordered -> same key."""
+    a = make_reading()
+    b = make_reading(elevator_id="KONE-TAMPERE-07", error_codes=["w-104", "E-302"],
+                     vibration_level_hz=4.4, velocity_m_s=1.1)
+    assert telemetry_fingerprint(a) == telemetry_fingerprint(b)
+
+def test_fingerprint_separates_bands_and_codes():
+    base = telemetry_fingerprint(make_reading())
+    assert telemetry_fingerprint(make_reading(vibration_level_hz=6.0)) != base
+    assert telemetry_fingerprint(make_reading(error_codes=["E-302"])) != base
+
+# ---------------------------------------------------------
+# TEST 2: TTL + Size Bound
+# ---------------------------------------------------------
+
+def test_cache_entries_expire_after_ttl():
+    now = [0.0]
+    cache = DiagnosisCache(ttl_seconds=10, max_entries=10, clock=lambda: now[0])
+    cache.put("k", make_result())
+
+    now[0] = 5.0
+    assert cache.get("k").fault_summary == "Door obstruction"
+    now[0] = 11.0
+    assert cache.get("k") is None
+    assert cache.stats()["expirations"] == 1
+
+def test_cache_evicts_oldest_when_full():
+    cache = DiagnosisCache(ttl_seconds=60, max_entries=2)
+    for key in ["a", "b", "c"]:
+        cache.put(key, make_result())
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,58 @@
+import pytest
+from unittest.mock import MagicMock
+from src.services.embedding_cache import EmbeddingCache
+
+# ---------------------------------------------------------
+# TEST 1: In-Process LRU Tier
+# ---------------------------------------------------------
+
+def test_cache_hits_after_first_embed():
+    """
+    Scenario: The same error code is embedded twice (with different whitespace).
+    Expectation: The embedder is called once; the second lookup is a hit.
+    """
+    cache = EmbeddingCache(model_name="m", max_entries=10)
+    embed = MagicMock(return_value=[0.5, 0.25])
+
+    assert cache.get_or_embed("E-302", embed) == [0.5, 0.25]
+    assert cache.get_or_embed("  E-302 ", embed) == [0.5, 0.25]
+
+    embed.assert_called_once_with("E-302")
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_cache_evicts_least_recently_used():
+    cache = EmbeddingCache(model_name="m", max_entries=2)
+    cache.put("A", [1.0])
+    cache.put("B", [2.0])
+    cache.get("A")          # A is now most recently used
+    cache.put("C", [3.0])   # Evicts B
+
+    assert cache.get("B") is None
+    assert cache.get("A") == [1.0]
+    assert cache.stats()["evictions"] == 1
+
+# ---------------------------------------------------------
+# TEST 2: Persistent SQLite Tier
+# ---------------------------------------------------------
+
+def test_cache_survives_restart(tmp_path):
+    """
+    Scenario: A new cache instance (simulating a restart) opens the same file.
+    Expectation: The vector is served from disk without calling the embedder.
+    """
+    db_path = str(tmp_path / "cache" / "embeddings.sqlite3")
+    EmbeddingCache(model_name="m", db_path=db_path).put("W-104", [0.5, -1.0])
+
+    restarted = EmbeddingCache(model_name="m", db_path=db_path)
+    embed = MagicMock()
+
+    assert restarted.get_or_embed("W-104", embed) == [0.5, -1.0]
+    embed.assert_not_called()
+    assert restarted.stats()["disk_hits"] == 1
+
+def test_cache_is_keyed_by_model(tmp_path):
+    db_path = str(tmp_path / "embeddings.sqlite3")
+    EmbeddingCache(model_name="model-a", db_path=db_path).put("E-302", [1.0])
+
+    assert EmbeddingCache(model_name="model-b", db_path=db_path).get("E-302") is None
@@ -0,0 +1,124 @@
+import math
+import sys
+import types
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+from src.core.schema import ManualChunk
+from src.services.embedding_providers import (
+    HashingEmbeddingProvider, LocalEmbeddingProvider, OpenAIEmbeddingProvider, build_embedding_provider
+)
+from src.core.http_clients import openai_clients
+from src.services.vector_service import VectorService, settings
+
+# ---------------------------------------------------------
+# TEST 1: Hashing Embedder (offline, deterministic)
+# ---------------------------------------------------------
+
+def cosine(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    provider = HashingEmbeddingProvider(dimension=64)
+    first = provider.embed_query("Error E-302 door obstruction")
+
+    assert first == HashingEmbeddingProvider(dimension=64).embed_query("Error E-302 door obstruction")
+    assert len(first) == 64
+    assert math.isclose(math.sqrt(sum(v * v for v in first)), 1.0)
+    assert provider.embed_query("") == [0.0] * 64
+
+def test_hashing_embedder_keeps_related_texts_close():
+    provider = HashingEmbeddingProvider(dimension=384)
+    query, door, ride = provider.embed_documents([
+        "E-302",
+        "Error E-302 indicates a door obstruction during the closing cycle.",
+        "High vibration suggests guide rail roller wear.",
+    ])
+    assert cosine(query, door) > cosine(query, ride)
+
+# ---------------------------------------------------------
+# TEST 2: Provider Selection
+# ---------------------------------------------------------
+
+def test_build_provider_from_settings(monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_PROVIDER", "hashing")
+    monkeypatch.setattr(settings, "EMBEDDING_DIMENSION", 128)
+    provider = build_embedding_provider()
+    assert isinstance(provider, HashingEmbeddingProvider) and provider.dimension == 128
+
+    monkeypatch.setattr(settings, "EMBEDDING_PROVIDER", "bogus")
+    with pytest.raises(ValueError):
+        build_embedding_provider()
+
+def test_openai_provider_dimension(monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "sk-test")
+    openai_clients.cache_clear()
+    assert OpenAIEmbeddingProvider("text-embedding-3-small").dimension == 1536
+    shortened = OpenAIEmbeddingProvider("text-embedding-3-large", dimension=256)
+    assert shortened.dimension == 256 and shortened.client.dimensions == 256
+    assert shortened.name == "text-embedding-3-large@256"
+    openai_clients.cache_clear()
+
+def test_openai_provider_needs_the_key_only_to_embed(monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", None)
+    provider = OpenAIEmbeddingProvider("text-embedding-3-small")
+
+    assert provider.dimension == 1536
+    with pytest.raises(RuntimeError, match="OPENAI_API_KEY"):
+        provider.embed_query("E-302")
+
+@pytest.mark.asyncio
+async def test_local_provider_batches_on_a_thread_pool(monkeypatch):
+    calls = []
+
+    class FakeSentenceTransformer:
+        def __init__(self, path, device):
+            assert device == "cpu"
+        def get_sentence_embedding_dimension(self):
+            return 4
+        def encode(self, texts, batch_size, normalize_embeddings, show_progress_bar):
+            calls.append((list(texts), batch_size))
+            return np.ones((len(texts), 4)) / 2
+
+    monkeypatch.setitem(sys.modules, "sentence_transformers",
+                        types.SimpleNamespace(SentenceTransformer=FakeSentenceTransformer))
+
+    provider = LocalEmbeddingProvider("models/mini", batch_size=16)
+    vectors = await provider.aembed_documents(["E-302", "W-104"])
+
+    assert provider.dimension == 4 and provider.name == "local:models/mini"
+    assert vectors == [[0.5] * 4, [0.5] * 4]
+    assert calls == [(["E-302", "W-104"], 16)]
+
+# ---------------------------------------------------------
+# TEST 3: Offline Retrieval End-to-End
+# ---------------------------------------------------------
+
+def test_vector_service_sizes_collection_from_provider(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "EMBEDDING_PROVIDER", "hashing")
+    monkeypatch.setattr(settings, "EMBEDDING_DIMENSION", 96)
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_PATH", "")
+    service = VectorService()
+    service.client = QdrantClient(":memory:")
+
+    service.upsert_manuals([
+        ManualChunk(chunk_id="1", content="Error E-302 indicates a door obstruction.",
+                    source_doc="Door.pdf", page_number=42, related_error_codes=["E-302"]),
+        ManualChunk(chunk_id="2", content="High vibration suggests guide rail roller wear.",
+                    source_doc="Ride.pdf", page_number=12, related_error_codes=["W-104"]),
+    ])
+
+    info = service.client.get_collection(service.collection_name)
+    assert info.config.params.vectors.size == 96
+    assert service.search_similar("E-302 door", limit=1)[0].source_doc == "Door.pdf"
+
+def test_vector_size_mismatch_fails_fast(monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_PROVIDER", "hashing")
+    monkeypatch.setattr(settings, "EMBEDDING_DIMENSION", 96)
+    service = VectorService()
+    service.client = QdrantClient(":memory:")
+    service.ensure_collection_exists()
+
+    service.vector_size = 128
+    with pytest.raises(ValueError, match="96-dim"):
+        service.ensure_collection_exists()
@@ -0,0 +1,110 @@
+import os
+import pyarrow as pa
+import pytest
+from datetime import date, datetime, timedelta, timezone
+from httpx import AsyncClient, ASGITransport
+
+from src.core.schema import TelemetryReading
+from src.main import app
+from src.services import fleet_analytics
+from src.services.telemetry_archive import TelemetryArchive, site_of
+
+TODAY = date(2026, 3, 10)
+
+def reading(elevator_id, day_offset, vibration=1.0, codes=None, minute=0):
+    timestamp = datetime(2026, 3, 10, 12, minute, tzinfo=timezone.utc) - timedelta(days=day_offset)
+    return TelemetryReading(
+        elevator_id=elevator_id, timestamp=timestamp, velocity_m_s=1.0,
+        door_cycles_count=1000, vibration_level_hz=vibration, error_codes=codes or []
+    )
+
+def read(archive, columns, days, site=None):
+    return pa.Table.from_batches(list(archive.batches(columns, days, site, today=TODAY)))
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = TelemetryArchive(str(tmp_path / "archive"), flush_rows=1000)
+    # ESPOO vibration climbs 0.5 Hz/day, TAMPERE stays flat
+    for day in range(5):
+        for minute, elevator in enumerate(["KONE-ESPOO-01", "KONE-ESPOO-02"]):
+            archive.append(reading(elevator, 4 - day, vibration=2.0 + 0.5 * day, minute=minute,
+                                   codes=["E-302", "W-104"] if day % 2 == 0 else ["E-302"]))
+        archive.append(reading("KONE-TAMPERE-07", 4 - day, vibration=2.0, codes=["E-101"]))
+    archive.flush()
+    return archive
+
+# ---------------------------------------------------------
+# TEST 1: Archive Layout
+# ---------------------------------------------------------
+
+def test_site_is_parsed_from_elevator_id():
+    assert site_of("KONE-ESPOO-01") == "ESPOO"
+    assert site_of("KONE-NEW-YORK-12") == "NEW-YORK"
+    assert site_of("standalone") == "unknown"
+
+def test_flush_writes_day_and_site_partitions(archive):
+    partitions = sorted(os.listdir(archive.directory))
+    assert partitions[0] == "day=2026-03-06" and len(partitions) == 5
+    assert sorted(os.listdir(os.path.join(archive.directory, partitions[0]))) == ["site=ESPOO", "site=TAMPERE"]
+    assert archive.stats()["flushed_rows"] == 15 and archive.buffered() == 0
+
+def test_late_and_equal_timestamps_are_archived(tmp_path):
+    archive = TelemetryArchive(str(tmp_path / "archive"))
+    assert archive.append(reading("KONE-ESPOO-01", 0)) is True
+    assert archive.append(reading("KONE-ESPOO-01", 0)) is True    # Same timestamp
+    assert archive.append(reading("KONE-ESPOO-01", 1)) is True    # Late gateway batch
+    archive.flush()
+    assert read(archive, ["elevator_id"], days=3).num_rows == 3
+
+def test_batches_prune_by_day_and_site(archive):
+    table = read(archive, ["elevator_id", "day"], days=2, site="espoo")
+    assert table.num_rows == 4
+    assert set(table.column("day").to_pylist()) == {"2026-03-09", "2026-03-10"}
+
+# ---------------------------------------------------------
+# TEST 2: Analytics
+# ---------------------------------------------------------
+
+def test_site_summary(archive):
+    summary = {row["site"]: row for row in fleet_analytics.site_summary(archive, days=7, today=TODAY)}
+    assert summary["ESPOO"]["readings"] == 10 and summary["ESPOO"]["elevators"] == 2
+    assert summary["TAMPERE"]["mean_vibration_hz"] == pytest.approx(2.0)
+    assert summary["TAMPERE"]["error_rate"] == 1.0
+
+def test_only_rising_sites_are_reported(archive):
+    trends = fleet_analytics.vibration_trends(archive, days=7, min_slope_hz_per_day=0.1, today=TODAY)
+    assert [row["site"] for row in trends] == ["ESPOO"]
+    assert trends[0]["slope_hz_per_day"] == pytest.approx(0.5)
+    assert trends[0]["days"] == 5
+
+def test_aggregates_merge_across_record_batches(archive, monkeypatch):
+    expected = (fleet_analytics.site_summary(archive, days=7, today=TODAY),
+                fleet_analytics.vibration_trends(archive, days=7, min_slope_hz_per_day=0.1, today=TODAY))
+    whole = archive.batches
+    # One reading per batch: every aggregate is built only from merged partials
+    monkeypatch.setattr(archive, "batches", lambda *args, **kwargs: (
+        batch.slice(i, 1) for batch in whole(*args, **kwargs) for i in range(batch.num_rows)
+    ))
+    monkeypatch.setattr(fleet_analytics, "_MERGE_EVERY", 4)
+
+    assert fleet_analytics.site_summary(archive, days=7, today=TODAY) == expected[0]
+    assert fleet_analytics.vibration_trends(archive, days=7, min_slope_hz_per_day=0.1, today=TODAY) == expected[1]
+
+def test_error_cooccurrence_counts_pairs_per_reading(archive):
+    result = fleet_analytics.error_cooccurrence(archive, days=7, today=TODAY)
+    assert result["readings"] == 15 and result["readings_with_codes"] == 15
+    assert result["pairs"] == [{"codes": ["E-302", "W-104"], "count": 6, "jaccard": 0.6}]
+
+def test_empty_archive_returns_empty_results(tmp_path):
+    archive = TelemetryArchive(str(tmp_path / "missing"))
+    assert fleet_analytics.site_summary(archive, days=7) == []
+    assert fleet_analytics.error_cooccurrence(archive, days=7)["pairs"] == []
+
+@pytest.mark.asyncio
+async def test_fleet_endpoint(archive, monkeypatch):
+    monkeypatch.setattr("src.routers.fleet.telemetry_archive", archive)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/api/v1/fleet/error-cooccurrence", params={"days": 366})
+
+    assert response.status_code == 200
+    assert response.json()["pairs"][0]["codes"] == ["E-302", "W-104"]
@@ -0,0 +1,65 @@
+import pytest
+from qdrant_client import AsyncQdrantClient, QdrantClient
+
+from src.core import http_clients
+from src.core.http_clients import (
+    openai_chat_clients, openai_clients, openai_embedding_clients, qdrant_client_args
+)
+
+@pytest.fixture
+def fresh_clients(monkeypatch):
+    """A clean openai_clients() cache with a test key (restored afterwards)."""
+    monkeypatch.setattr(http_clients.settings, "OPENAI_API_KEY", "sk-test")
+    openai_clients.cache_clear()
+    yield
+    openai_clients.cache_clear()
+
+# ---------------------------------------------------------
+# TEST 1: Shared OpenAI Client
+# ---------------------------------------------------------
+
+def test_chat_and_embeddings_share_one_connection_pool(fresh_clients):
+    chat_sync, chat_async = openai_chat_clients()
+    embed_sync, embed_async = openai_embedding_clients()
+
+    assert chat_sync._client._client is embed_sync._client._client
+    assert chat_async._client._client is embed_async._client._client
+
+def test_each_workload_keeps_its_own_timeout(fresh_clients, monkeypatch):
+    monkeypatch.setattr(http_clients.settings, "OPENAI_CHAT_TIMEOUT_SECONDS", 60.0)
+    monkeypatch.setattr(http_clients.settings, "OPENAI_EMBEDDING_TIMEOUT_SECONDS", 15.0)
+    chat_sync, _ = openai_chat_clients()
+    embed_sync, _ = openai_embedding_clients()
+
+    assert chat_sync._client.timeout.read == 60.0
+    assert embed_sync._client.timeout.read == 15.0
+    assert embed_sync._client.timeout.connect == http_clients.settings.HTTP_CONNECT_TIMEOUT_SECONDS
+
+def test_missing_key_raises(monkeypatch):
+    monkeypatch.setattr(http_clients.settings, "OPENAI_API_KEY", None)
+    openai_clients.cache_clear()
+    with pytest.raises(RuntimeError, match="OPENAI_API_KEY"):
+        openai_clients()
+
+# ---------------------------------------------------------
+# TEST 2: Qdrant Client Arguments
+# ---------------------------------------------------------
+
+def test_qdrant_rest_args_build_both_clients(monkeypatch):
+    monkeypatch.setattr(http_clients.settings, "QDRANT_PREFER_GRPC", False)
+    monkeypatch.setattr(http_clients.settings, "QDRANT_MAX_KEEPALIVE_CONNECTIONS", 7)
+    args = qdrant_client_args()
+
+    assert args["prefer_grpc"] is False and "grpc_options" not in args
+    assert args["limits"].max_keepalive_connections == 7
+    # Constructing the clients does not connect, so no server is needed
+    QdrantClient(**args)
+    AsyncQdrantClient(**args)
+
+def test_qdrant_grpc_args_enable_keepalive(monkeypatch):
+    monkeypatch.setattr(http_clients.settings, "QDRANT_PREFER_GRPC", True)
+    monkeypatch.setattr(http_clients.settings, "HTTP_KEEPALIVE_EXPIRY_SECONDS", 20.0)
+    args = qdrant_client_args()
+
+    assert args["prefer_grpc"] is True and args["grpc_port"] == http_clients.settings.QDRANT_GRPC_PORT
+    assert args["grpc_options"]["grpc.keepalive_time_ms"] == 20000
@@ -0,0 +1,171 @@
+import os
+import pytest
+from qdrant_client import QdrantClient
+
+from src.services.ingestion import (
+    SAMPLE_MANUALS, ChunkingOptions, IngestionPipeline, chunk_id_for, parse_document, split_text
+)
+from src.services.vector_service import VectorService, point_id, settings
+
+OPTIONS = ChunkingOptions(chunk_chars=200, overlap_chars=20, error_code_pattern=r"\b[A-Z]{1,3}-\d{3}\b")
+
+DOOR_MANUAL = (
+    "Error E-302 indicates a door obstruction during the closing cycle.\n\n"
+    "Inspect the sill groove and clean any particulate matter.\f"
+    "Warning W-104 means the guide rail rollers are worn. Verify lubrication."
+)
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_PROVIDER", "hashing")
+    monkeypatch.setattr(settings, "EMBEDDING_DIMENSION", 64)
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_PATH", "")
+    monkeypatch.setattr(settings, "VECTOR_MIRROR_ENABLED", False)
+    service = VectorService()
+    service.client = QdrantClient(":memory:")
+
+    embedded = []
+    embed_documents = service.embeddings.embed_documents
+    def counting_embed(texts):
+        embedded.extend(texts)
+        return embed_documents(texts)
+    monkeypatch.setattr(service.embeddings, "embed_documents", counting_embed)
+    service.embedded = embedded
+    return service
+
+@pytest.fixture
+def library(tmp_path):
+    directory = tmp_path / "manuals"
+    (directory / "doors").mkdir(parents=True)
+    (directory / "doors" / "door_systems.txt").write_text(DOOR_MANUAL)
+    (directory / "safety.md").write_text("Engage the pit stop switch before entering the pit.")
+    (directory / "notes.docx").write_text("not a supported format")
+    return directory
+
+def make_pipeline(service, tmp_path):
+    return IngestionPipeline(service, str(tmp_path / "manifest.json"), workers=2, options=OPTIONS)
+
+# ---------------------------------------------------------
+# TEST 1: Parsing and Chunk Identity
+# ---------------------------------------------------------
+
+def test_parse_splits_pages_and_tags_error_codes(library):
+    chunks = parse_document(str(library / "doors" / "door_systems.txt"), "doors/door_systems.txt", OPTIONS)
+
+    assert [(c.page_number, c.related_error_codes) for c in chunks] == [(1, ["E-302"]), (2, ["W-104"])]
+    assert chunks[0].chunk_id == chunk_id_for("doors/door_systems.txt", 1, chunks[0].content)
+
+def test_long_paragraphs_are_windowed_with_overlap():
+    pieces = split_text("x" * 450, chunk_chars=200, overlap_chars=20)
+    assert [len(p) for p in pieces] == [200, 200, 90]
+
+def test_parse_pool_does_not_fork_the_server(library, tmp_path, monkeypatch):
+    from src.services import ingestion
+    contexts = []
+    real_pool = ingestion.ProcessPoolExecutor
+    def recording_pool(*args, **kwargs):
+        contexts.append(kwargs["mp_context"].get_start_method())
+        return real_pool(*args, **kwargs)
+    monkeypatch.setattr(ingestion, "ProcessPoolExecutor", recording_pool)
+
+    pipeline = IngestionPipeline(None, str(tmp_path / "manifest.json"), workers=2, options=OPTIONS)
+    to_parse = [(str(library / "doors" / "door_systems.txt"), "doors/door_systems.txt", None, None),
+                (str(library / "safety.md"), "safety.md", None, None)]
+    parsed = list(pipeline._parse(to_parse))
+
+    assert contexts == ["forkserver"]
+    assert [(source_doc, len(chunks), error) for source_doc, chunks, error in parsed] == [
+        ("doors/door_systems.txt", 2, None), ("safety.md", 1, None)
+    ]
+
+def test_chunk_ids_are_valid_point_ids():
+    assert point_id(SAMPLE_MANUALS[0].chunk_id) == SAMPLE_MANUALS[0].chunk_id
+    # Legacy non-UUID IDs map to a stable UUID instead of a random one
+    assert point_id("1") == point_id("1") != point_id("2")
+
+# ---------------------------------------------------------
+# TEST 2: Incremental Re-Index
+# ---------------------------------------------------------
+
+def test_unchanged_library_is_not_re_embedded(service, library, tmp_path):
+    pipeline = make_pipeline(service, tmp_path)
+    first = pipeline.ingest_directory(str(library))
+    assert (first.files, first.parsed_files, first.chunks, first.embedded) == (2, 2, 3, 3)
+
+    service.embedded.clear()
+    second = pipeline.ingest_directory(str(library))
+    assert service.embedded == []
+    assert (second.reused_files, second.parsed_files, second.unchanged, second.deleted) == (2, 0, 3, 0)
+    assert pipeline.documents() == {"doors/door_systems.txt": 2, "safety.md": 1}
+
+def test_changed_file_embeds_only_new_chunks_and_deletes_stale(service, library, tmp_path):
+    pipeline = make_pipeline(service, tmp_path)
+    pipeline.ingest_directory(str(library))
+    service.embedded.clear()
+
+    # Page 2 changes; page 1 keeps its content (and therefore its point)
+    (library / "doors" / "door_systems.txt").write_text(DOOR_MANUAL.replace("Verify lubrication.", "Replace rollers."))
+    report = pipeline.ingest_directory(str(library))
+
+    assert (report.parsed_files, report.embedded, report.unchanged, report.deleted) == (1, 1, 2, 1)
+    assert service.embedded == ["Warning W-104 means the guide rail rollers are worn. Replace rollers."]
+    assert len(service.list_point_ids()) == 3
+
+def test_removed_file_points_are_deleted(service, library, tmp_path):
+    pipeline = make_pipeline(service, tmp_path)
+    pipeline.ingest_directory(str(library))
+    os.remove(library / "safety.md")
+
+    report = pipeline.ingest_directory(str(library))
+    assert report.deleted == 1 and report.embedded == 0
+    assert len(service.list_point_ids()) == 2
+
+def test_touched_but_identical_file_is_not_re_parsed(service, library, tmp_path):
+    pipeline = make_pipeline(service, tmp_path)
+    pipeline.ingest_directory(str(library))
+    path = library / "safety.md"
+    os.utime(path, ns=(0, 0))
+
+    report = pipeline.ingest_directory(str(library))
+    assert report.parsed_files == 0 and report.embedded == 0
+
+def test_empty_directory_seeds_samples_into_an_empty_collection(service, tmp_path):
+    pipeline = make_pipeline(service, tmp_path)
+    (tmp_path / "empty").mkdir()
+    report = pipeline.sync(str(tmp_path / "empty"))
+
+    assert report.embedded == len(SAMPLE_MANUALS)
+    assert pipeline.sync(str(tmp_path / "empty")).embedded == 0
+    assert "KONE_Global_Safety_Manual.pdf" in pipeline.documents()
+
+def test_fetch_by_source_finds_untagged_safety_manual(service, tmp_path):
+    make_pipeline(service, tmp_path).ingest_chunks(SAMPLE_MANUALS)
+    chunks = service.fetch_by_source(["KONE_Global_Safety_Manual.pdf"], limit=1)
+
+    assert [chunk.source_doc for chunk in chunks] == ["KONE_Global_Safety_Manual.pdf"]
+    assert service.fetch_by_source([], limit=1) == []
+
+def test_missing_directory_fails_without_touching_the_collection(service, library, tmp_path):
+    pipeline = make_pipeline(service, tmp_path)
+    pipeline.ingest_directory(str(library))
+    before = service.list_point_ids()
+
+    with pytest.raises(FileNotFoundError, match="does not exist"):
+        pipeline.sync(str(tmp_path / "unmounted"))
+    assert service.list_point_ids() == before
+
+def test_empty_directory_never_deletes_the_real_library(service, library, tmp_path, monkeypatch):
+    pipeline = make_pipeline(service, tmp_path)
+    pipeline.ingest_directory(str(library))
+    before = service.list_point_ids()
+    (tmp_path / "empty").mkdir()
+
+    report = pipeline.sync(str(tmp_path / "empty"))
+    assert report.embedded == 0 and report.deleted == 0 and service.list_point_ids() == before
+
+    # Explicitly requested samples are added next to the library, still without deleting
+    monkeypatch.setattr(settings, "INGEST_SEED_SAMPLES", True)
+    report = pipeline.sync(str(tmp_path / "empty"))
+    assert report.embedded == len(SAMPLE_MANUALS) and report.deleted == 0
+    assert before < service.list_point_ids()
+    assert {"safety.md", "KONE_Global_Safety_Manual.pdf"} <= set(pipeline.documents())
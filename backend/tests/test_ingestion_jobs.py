@@ -0,0 +1,196 @@
+import json
+import os
+import threading
+import time
+import pytest
+from httpx import AsyncClient, ASGITransport
+from qdrant_client import QdrantClient
+
+from src.main import app
+from src.services.ingestion import ChunkingOptions, IngestionPipeline, IngestionReport, make_chunk
+from src.services.ingestion_jobs import (
+    QUEUED, RUNNING, SUCCEEDED, IngestionJob, IngestionJobManager, JobQueueFull
+)
+from src.services.rate_limiter import TokenBucket
+from src.services.vector_service import VectorService, settings
+
+OPTIONS = ChunkingOptions(chunk_chars=200, overlap_chars=20, error_code_pattern=r"\b[A-Z]{1,3}-\d{3}\b")
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+    def __call__(self):
+        return self.now
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+class BlockingPipeline:
+    """Pipeline stand-in whose sync() reports progress, then waits to be released."""
+    limiter = None
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+    def sync(self, directory, progress):
+        progress(stage="embedding", to_embed=10)
+        self.started.set()
+        while not self.release.wait(0.01):
+            progress(embedded=0)
+        return IngestionReport(files=1)
+
+def wait_for(job, statuses=(SUCCEEDED,), timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while job.status not in statuses:
+        assert time.monotonic() < deadline, f"job stuck in {job.status}"
+        time.sleep(0.01)
+    return job
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_PROVIDER", "hashing")
+    monkeypatch.setattr(settings, "EMBEDDING_DIMENSION", 32)
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_PATH", "")
+    monkeypatch.setattr(settings, "VECTOR_MIRROR_ENABLED", False)
+    service = VectorService()
+    service.client = QdrantClient(":memory:")
+    return service
+
+@pytest.fixture
+def library(tmp_path):
+    directory = tmp_path / "manuals"
+    directory.mkdir()
+    (directory / "doors.txt").write_text("Error E-302 indicates a door obstruction.\fClean the sill groove.")
+    return directory
+
+# ---------------------------------------------------------
+# TEST 1: Token Bucket
+# ---------------------------------------------------------
+
+def test_token_bucket_allows_burst_then_paces():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=100, capacity=200, clock=clock, sleep=clock.sleep)
+
+    assert bucket.acquire(200) == 0.0
+    assert bucket.acquire(50) == pytest.approx(0.5)
+    clock.now += 1.0
+    assert bucket.acquire(100) == 0.0
+    # Larger than the bucket: capped at capacity instead of waiting forever
+    assert bucket.acquire(10000) == pytest.approx(2.0)
+
+def test_unlimited_bucket_never_waits():
+    assert TokenBucket(rate=0, capacity=1).acquire(10 ** 9) == 0.0
+
+def test_embedding_calls_draw_from_the_limiter(service, monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_BATCH_SIZE", 1)
+    monkeypatch.setattr(settings, "EMBEDDING_MAX_CONCURRENCY", 1)
+    clock = FakeClock()
+    limiter = TokenBucket(rate=11, capacity=22, clock=clock, sleep=clock.sleep)
+    service.upsert_manuals([make_chunk("Door.pdf", i, "x" * 40, []) for i in range(3)], limiter=limiter)
+
+    # 11 estimated tokens per chunk (40 chars / 4 + 1): two fit the burst, the third waits 1s
+    assert limiter.stats()["acquired"] == 33
+    assert clock.slept == [pytest.approx(1.0)]
+
+# ---------------------------------------------------------
+# TEST 2: Job Progress
+# ---------------------------------------------------------
+
+def test_job_reports_progress_rate_and_eta():
+    job = IngestionJob(job_id="j", directory="manuals", created_at=0.0, status=RUNNING)
+    job.update(10.0, stage="embedding", to_embed=100)
+    job.update(12.0, embedded=40)
+    job.update(12.0, embedded=10, upserted=50)
+
+    report = job.to_dict(now=15.0)
+    assert (report["embedded"], report["upserted"]) == (50, 50)
+    assert report["chunks_per_second"] == 10.0
+    assert report["eta_seconds"] == 5.0
+
+def test_job_runs_pipeline_and_checkpoints(service, library, tmp_path):
+    pipeline = IngestionPipeline(service, str(tmp_path / "manifest.json"), workers=1, options=OPTIONS)
+    manager = IngestionJobManager(pipeline, str(tmp_path / "jobs"))
+    job = wait_for(manager.submit(str(library)))
+
+    assert (job.to_embed, job.embedded, job.upserted, job.errors) == (2, 2, 2, [])
+    # The final checkpoint is written just after the in-memory status flips
+    deadline = time.monotonic() + 10.0
+    while True:
+        with open(tmp_path / "jobs" / f"{job.job_id}.json") as f:
+            if json.load(f)["stage"] == "done":
+                break
+        assert time.monotonic() < deadline, "final checkpoint not written"
+        time.sleep(0.01)
+    with open(tmp_path / "jobs" / f"{job.job_id}.json") as f:
+        assert json.load(f)["status"] == SUCCEEDED
+
+def test_duplicate_submit_returns_active_job_and_queue_is_bounded(tmp_path):
+    pipeline = BlockingPipeline()
+    manager = IngestionJobManager(pipeline, str(tmp_path / "jobs"), max_queued=2)
+    first = manager.submit("a")
+    assert manager.submit("a") is first
+    manager.submit("b")
+    with pytest.raises(JobQueueFull):
+        manager.submit("c")
+
+    pipeline.release.set()
+    wait_for(first)
+
+# ---------------------------------------------------------
+# TEST 3: Resume
+# ---------------------------------------------------------
+
+def test_shutdown_leaves_running_job_queued_for_resume(tmp_path):
+    pipeline = BlockingPipeline()
+    manager = IngestionJobManager(pipeline, str(tmp_path / "jobs"))
+    job = manager.submit("manuals")
+    pipeline.started.wait(5)
+
+    manager.shutdown()
+    wait_for(job, statuses=(QUEUED,))
+    with open(tmp_path / "jobs" / f"{job.job_id}.json") as f:
+        assert json.load(f)["stage"] == "interrupted"
+
+def test_interrupted_job_resumes_and_embeds_only_missing_chunks(service, library, tmp_path):
+    # A crashed run got doors.txt into Qdrant before lifts.txt was processed
+    pipeline = IngestionPipeline(service, str(tmp_path / "manifest.json"), workers=1, options=OPTIONS)
+    pipeline.ingest_directory(str(library))
+    (library / "lifts.txt").write_text("Warning W-104 means worn guide rail rollers.")
+
+    checkpoints = tmp_path / "jobs"
+    os.makedirs(checkpoints)
+    crashed = IngestionJob(job_id="crashed", directory=str(library), created_at=1.0, status=RUNNING, attempts=1)
+    with open(checkpoints / "crashed.json", "w") as f:
+        json.dump(crashed.to_dict(), f)   # Extra derived fields are ignored on load
+
+    manager = IngestionJobManager(pipeline, str(checkpoints))
+    (job,) = manager.resume_interrupted()
+    wait_for(job)
+
+    assert job.attempts == 2
+    assert (job.unchanged, job.to_embed, job.embedded) == (2, 1, 1)
+
+# ---------------------------------------------------------
+# TEST 4: Endpoints
+# ---------------------------------------------------------
+
+@pytest.mark.asyncio
+async def test_seed_returns_job_id_and_progress_is_queryable(tmp_path, monkeypatch):
+    pipeline = BlockingPipeline()
+    manager = IngestionJobManager(pipeline, str(tmp_path / "jobs"))
+    monkeypatch.setattr("src.routers.admin.ingestion_jobs", manager)
+    monkeypatch.setattr(settings, "MANUALS_PATH", str(tmp_path / "unmounted"))
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        unmounted = await ac.post("/api/v1/admin/seed")
+        monkeypatch.setattr(settings, "MANUALS_PATH", str(tmp_path))
+        seeded = (await ac.post("/api/v1/admin/seed")).json()
+        pipeline.started.wait(5)
+        progress = (await ac.get(f"/api/v1/admin/jobs/{seeded['job_id']}")).json()
+        missing = await ac.get("/api/v1/admin/jobs/unknown")
+
+    pipeline.release.set()
+    assert unmounted.status_code == 400
+    assert progress["status"] == RUNNING and progress["to_embed"] == 10
+    assert missing.status_code == 404
+    wait_for(manager.get(seeded["job_id"]))
@@ -0,0 +1,85 @@
+import pytest
+from langchain_core.messages import AIMessageChunk
+from src.services.llm_service import LLMService, partial_string_field
+
+# ---------------------------------------------------------
+# TEST 1: Partial JSON Field Extraction
+# ---------------------------------------------------------
+
+def test_partial_string_field_reads_incomplete_json():
+    assert partial_string_field('{"fault_sum', "fault_summary") is None
+    assert partial_string_field('{"fault_summary": "Door ob', "fault_summary") == "Door ob"
+    assert partial_string_field('{"fault_summary": "A \\"B\\" C", "x": 1', "fault_summary") == 'A "B" C'
+    # A half-received escape is held back until it is complete
+    assert partial_string_field('{"fault_summary": "Line\\', "fault_summary") == "Line"
+
+# ---------------------------------------------------------
+# TEST 2: Token Streaming from Tool-Call Fragments
+# ---------------------------------------------------------
+
+class FakeToolLLM:
+    """Yields tool-call argument fragments the way ChatOpenAI streams them."""
+    def __init__(self, fragments):
+        self.fragments = fragments
+
+    async def astream(self, prompt, config=None):
+        for fragment in self.fragments:
+            yield AIMessageChunk(content="", additional_kwargs={
+                "tool_calls": [{"index": 0, "function": {"arguments": fragment}}]
+            })
+
+@pytest.mark.asyncio
+async def test_astream_diagnose_emits_summary_deltas():
+    service = LLMService()
+    service.tool_llm = FakeToolLLM([
+        '{"fault_summary": "Door ', 'obstruction', ' detected", "root_cause_hypothesis": "Debris", ',
+        '"severity_score": 4, "cited_manual_references": [], ',
+        '"recommended_actions": [], "safety_warnings": []}'
+    ])
+    tokens = []
+
+    report = await service.astream_diagnose("prompt", tokens.append)
+
+    assert tokens == ["Door ", "obstruction", " detected"]
+    assert report.fault_summary == "Door obstruction detected"
+    assert report.severity_score == 4
+
+def test_chat_model_is_built_on_first_call(monkeypatch):
+    monkeypatch.setattr("src.services.llm_service.settings.OPENAI_API_KEY", None)
+    service = LLMService()   # Constructing needs no key
+    assert service.llm is None
+
+    with pytest.raises(RuntimeError, match="OPENAI_API_KEY"):
+        service.diagnose("prompt")
+
+# ---------------------------------------------------------
+# TEST 3: Token Usage Accounting
+# ---------------------------------------------------------
+from langchain_core.outputs import ChatGeneration, LLMResult
+from langchain_core.messages import AIMessage
+from src.core.tokens import TokenUsage
+from src.services.llm_service import TokenUsageCallback
+
+def test_usage_callback_reads_provider_token_counts():
+    callback = TokenUsageCallback()
+    callback.on_llm_end(LLMResult(
+        generations=[[ChatGeneration(message=AIMessage(content=""))]],
+        llm_output={"token_usage": {"prompt_tokens": 700, "completion_tokens": 120}}
+    ))
+    assert (callback.usage.prompt_tokens, callback.usage.completion_tokens, callback.usage.calls) == (700, 120, 1)
+
+@pytest.mark.asyncio
+async def test_streamed_call_usage_is_estimated_and_accumulated():
+    service = LLMService()
+    service.tool_llm = FakeToolLLM([
+        '{"fault_summary": "Door", "root_cause_hypothesis": "Debris", "severity_score": 4, ',
+        '"cited_manual_references": [], "recommended_actions": [], "safety_warnings": []}'
+    ])
+    usage = TokenUsage()
+
+    await service.astream_diagnose("x" * 400, lambda delta: None, usage=usage)
+    await service.astream_diagnose("x" * 400, lambda delta: None, usage=usage)
+
+    assert usage.calls == 2 and usage.estimated
+    assert usage.prompt_tokens > 0 and usage.completion_tokens > 0
+    assert service.usage_totals.stats()["total_tokens"] == usage.total_tokens
@@ -80,10 +80,10 @@ from unittest.mock import MagicMock, patch
 @patch("src.agents.nodes.vector_service")
 def test_retrieve_node_uses_error_codes(mock_vector_service):
     """
-    Test that the retrieve node actually queries Qdrant with the error codes.
+    Test that the retrieve node queries Qdrant with ALL error codes in one batch call.
     """
     # Setup Mock
-    mock_vector_service.search_similar.return_value = [
+    mock_vector_service.retrieve.return_value = [
         ManualChunk(chunk_id="1", content="Test", source_doc="Doc", page_number=1, related_error_codes=[])
     ]
 
@@ -99,7 +99,45 @@ def test_retrieve_node_uses_error_codes(mock_vector_service):
 
     # Verify Logic
     assert len(result["retrieved_docs"]) == 1
-    # Verify it called search for BOTH error codes
-    assert mock_vector_service.search_similar.call_count == 2
-    mock_vector_service.search_similar.assert_any_call("E-302", limit=2)
-    mock_vector_service.search_similar.assert_any_call("E-501", limit=2)
+    # Verify it searched for BOTH error codes in a single round trip
+    mock_vector_service.retrieve.assert_called_once()
+    assert mock_vector_service.retrieve.call_args.args[0] == ["E-302", "E-501"]
+    mock_vector_service.search_similar.assert_not_called()
+
+# ---------------------------------------------------------
+# TEST 4: Async Graph Path (ainvoke never touches blocking clients)
+# ---------------------------------------------------------
+from unittest.mock import AsyncMock
+from src.agents.graph import app_graph
+
+@pytest.mark.asyncio
+@patch("src.agents.nodes.llm_service")
+@patch("src.agents.nodes.vector_service")
+async def test_ainvoke_uses_async_services(mock_vector_service, mock_llm_service):
+    """
+    Scenario: The graph is run with ainvoke (as the API does).
+    Expectation: Only the async retrieval and LLM methods are awaited.
+    """
+    mock_vector_service.aretrieve = AsyncMock(return_value=[
+        ManualChunk(chunk_id="1", content="Door sill", source_doc="Doc", page_number=1)
+    ])
+    mock_llm_service.adiagnose = AsyncMock(return_value=DiagnosticResult(
+        fault_summary="Door obstruction",
+        root_cause_hypothesis="Debris in sill",
+        severity_score=3,
+        cited_manual_references=["Doc (Pg 1)"],
+        recommended_actions=[],
+        safety_warnings=[]
+    ))
+
+    telemetry = TelemetryReading(
+        elevator_id="ID", velocity_m_s=0, door_cycles_count=0, vibration_level_hz=0,
+        error_codes=["E-302"]
+    )
+    result = await app_graph.ainvoke({"telemetry": telemetry, "retry_count": 0, "validation_error": None})
+
+    assert result["diagnostic_report"].fault_summary == "Door obstruction"
+    mock_vector_service.aretrieve.assert_awaited_once()
+    mock_llm_service.adiagnose.assert_awaited_once()
+    mock_vector_service.retrieve.assert_not_called()
+    mock_llm_service.diagnose.assert_not_called()
@@ -0,0 +1,107 @@
+"""
+test_observability.py
+---------------------
+Tests for Prometheus metrics, the Server-Timing header and the per-node instrumentation.
+No network: the graph nodes' backends are mocked.
+"""
+
+import pytest
+from unittest.mock import AsyncMock, patch
+from httpx import AsyncClient, ASGITransport
+from prometheus_client import REGISTRY
+
+from src.main import app
+from src.agents.nodes import validate_node
+from src.core.observability import format_server_timing, observe, server_timings, GRAPH_NODE_SECONDS
+from src.core.schema import DiagnosticResult, ManualChunk
+from src.services.diagnosis_service import diagnosis_service
+
+PAYLOAD = {
+    "elevator_id": "TEST-OBS-001",
+    "velocity_m_s": 0.0,
+    "door_cycles_count": 12000,
+    "vibration_level_hz": 0.1,
+    "error_codes": ["E-302"]
+}
+
+def metric(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+def make_report(severity=3, warnings=("Lock out power",)):
+    return DiagnosticResult(
+        fault_summary="Door obstruction",
+        root_cause_hypothesis="Debris in sill groove",
+        severity_score=severity,
+        cited_manual_references=["Door.pdf (Pg 42)"],
+        recommended_actions=[{"step_order": 1, "instruction": "Clean sill groove"}],
+        safety_warnings=list(warnings)
+    )
+
+@pytest.fixture
+def clean_cache():
+    diagnosis_service.cache.clear()
+    yield
+    diagnosis_service.cache.clear()
+
+# ---------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------
+
+def test_format_server_timing():
+    assert format_server_timing({"retrieve": 0.0012, "llm": 1.5}) == "retrieve;dur=1.2, llm;dur=1500.0"
+
+def test_observe_records_histogram_and_server_timing():
+    before = metric("flowguard_graph_node_seconds_count", node="unit")
+    timings = {}
+    token = server_timings.set(timings)
+    try:
+        with observe(GRAPH_NODE_SECONDS, "graph.unit", server_timing="unit", node="unit"):
+            pass
+    finally:
+        server_timings.reset(token)
+
+    assert metric("flowguard_graph_node_seconds_count", node="unit") == before + 1
+    assert "unit" in timings
+
+def test_guardrail_counter_increments():
+    before = metric("flowguard_guardrail_triggers_total", reason="missing_safety_warning")
+    result = validate_node({"diagnostic_report": make_report(severity=9, warnings=["Wear gloves"]), "retry_count": 0})
+
+    assert result["validation_error"]
+    assert metric("flowguard_guardrail_triggers_total", reason="missing_safety_warning") == before + 1
+
+# ---------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_exposes_prometheus_text():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        await ac.get("/health")
+        response = await ac.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'flowguard_http_request_seconds_count{method="GET",route="/health",status="200"}' in response.text
+    assert "flowguard_graph_node_seconds" in response.text
+
+@pytest.mark.asyncio
+@patch("src.agents.nodes.llm_service")
+@patch("src.agents.nodes.vector_service")
+async def test_diagnose_sets_server_timing_per_node(mock_vector_service, mock_llm_service, clean_cache):
+    mock_vector_service.aretrieve = AsyncMock(return_value=[
+        ManualChunk(chunk_id="42", content="Sill groove", source_doc="Door.pdf", page_number=42, score=1.0)
+    ])
+    mock_llm_service.adiagnose = AsyncMock(return_value=make_report())
+    misses = metric("flowguard_cache_lookups_total", cache="diagnosis", result="miss")
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/api/v1/diagnose", json=PAYLOAD)
+
+    assert response.status_code == 200
+    stages = {part.split(";")[0] for part in response.headers["Server-Timing"].split(", ")}
+    assert {"retrieve", "diagnose", "validate", "total"} <= stages
+    assert metric("flowguard_cache_lookups_total", cache="diagnosis", result="miss") == misses + 1
+    assert metric(
+        "flowguard_http_request_seconds_count", method="POST", route="/api/v1/diagnose", status="200"
+    ) >= 1
@@ -0,0 +1,56 @@
+from src.agents.prompts import STATIC_SYSTEM_PROMPT, build_diagnosis_messages, format_chunk, select_manual_context
+from src.core.schema import ManualChunk, TelemetryReading
+from src.core.tokens import count_tokens
+
+def chunk(chunk_id, score, words=10):
+    return ManualChunk(chunk_id=chunk_id, content=" ".join(["word"] * words),
+                       source_doc=f"{chunk_id}.pdf", page_number=1, score=score)
+
+def state(**overrides):
+    base = {
+        "telemetry": TelemetryReading(elevator_id="E1", velocity_m_s=1.0, door_cycles_count=10,
+                                      vibration_level_hz=4.5, error_codes=["W-104"]),
+        "retrieved_docs": [chunk("a", 0.5), chunk("b", 0.9)],
+        "validation_error": None,
+    }
+    base.update(overrides)
+    return base
+
+# ---------------------------------------------------------
+# TEST 1: Cache-Friendly Layout
+# ---------------------------------------------------------
+
+def test_static_prefix_is_identical_across_requests():
+    first = build_diagnosis_messages(state())
+    second = build_diagnosis_messages(state(
+        telemetry=TelemetryReading(elevator_id="E2", velocity_m_s=0.0, door_cycles_count=99,
+                                   vibration_level_hz=0.1, error_codes=["E-302"]),
+        validation_error="Missing safety warning"
+    ))
+
+    assert first[0].content == second[0].content == STATIC_SYSTEM_PROMPT
+    assert "E2" not in second[0].content
+    assert "Missing safety warning" in second[1].content
+
+def test_telemetry_json_is_compact():
+    user = build_diagnosis_messages(state())[1].content
+    assert '"elevator_id":"E1"' in user
+    assert '\n  "elevator_id"' not in user
+
+# ---------------------------------------------------------
+# TEST 2: Manual Context Budget
+# ---------------------------------------------------------
+
+def test_manual_context_ranked_by_score():
+    docs = [chunk("low", 0.1), chunk("exact", None), chunk("high", 0.9)]
+    assert [d.chunk_id for d in select_manual_context(docs, 10_000)] == ["high", "low", "exact"]
+
+def test_manual_context_respects_token_budget():
+    docs = [chunk("big", 0.9, words=400), chunk("small", 0.5), chunk("other", 0.4)]
+    budget = count_tokens(format_chunk(docs[1])) + count_tokens(format_chunk(docs[2]))
+
+    selected = select_manual_context(docs, budget)
+
+    # The oversized top chunk is skipped, the smaller ones still fit
+    assert [d.chunk_id for d in selected] == ["small", "other"]
+    assert sum(count_tokens(format_chunk(d)) for d in selected) <= budget
@@ -0,0 +1,227 @@
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from langchain_openai import ChatOpenAI
+
+from src.agents.graph import app_graph, route_after_validate, END
+from src.core.schema import ManualChunk, TelemetryReading
+from src.services.llm_service import DraftParseError, LLMService
+from src.services.report_repair import repair_report, repair_stats
+
+SAFETY_DOC = ManualChunk(chunk_id="s", content="Safety Protocol: Engage pit stop switch before entering.",
+                         source_doc="KONE_Global_Safety_Manual.pdf", page_number=1)
+DOOR_DOC = ManualChunk(chunk_id="d", content="E-302 sill groove", source_doc="KONE_Door_Systems_Maintenance_2024.pdf",
+                       page_number=42, related_error_codes=["E-302"])
+
+def draft(**overrides):
+    report = {
+        "fault_summary": "Door obstruction",
+        "root_cause_hypothesis": "Debris in sill",
+        "severity_score": 4,
+        "cited_manual_references": ["KONE_Door_Systems_Maintenance_2024.pdf (Pg 42)"],
+        "recommended_actions": [{"step_order": 1, "instruction": "Clean sill", "tool_required": "Vacuum"}],
+        "safety_warnings": ["Wear gloves"],
+    }
+    report.update(overrides)
+    return report
+
+class FakeCompletions:
+    """Stands in for the OpenAI chat.completions resource: answers with one forced tool call."""
+    def __init__(self, arguments):
+        self.arguments = arguments
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        return {
+            "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "gpt-4o",
+            "choices": [{"index": 0, "finish_reason": "tool_calls", "message": {
+                "role": "assistant", "content": None,
+                "tool_calls": [{"id": "call_1", "type": "function", "function": {
+                    "name": "DiagnosticResult", "arguments": json.dumps(self.arguments)
+                }}]
+            }}],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 40, "total_tokens": 140},
+        }
+
+class FakeAsyncCompletions(FakeCompletions):
+    async def create(self, **kwargs):
+        return FakeCompletions.create(self, **kwargs)
+
+def fake_llm_service(arguments):
+    """A real LLMService (structured output and parsing included) on a canned chat model."""
+    service = LLMService()
+    service.llm = ChatOpenAI(api_key="sk-test", client=FakeCompletions(arguments),
+                             async_client=FakeAsyncCompletions(arguments))
+    return service
+
+# Typical mechanical mistakes that do not parse as a DiagnosticResult
+MALFORMED = draft(
+    severity_score="5",
+    safety_warnings="Wear gloves",
+    recommended_actions=[
+        {"step_order": 0, "instruction": "Isolate car", "action_type": "manual"},
+        {"step_order": 0, "instruction": "Clean sill", "tool_required": 3},
+        "Test door cycle",
+    ],
+)
+
+# ---------------------------------------------------------
+# TEST 1: Mechanical Repairs
+# ---------------------------------------------------------
+
+def test_strips_unknown_fields_coerces_types_and_renumbers_steps():
+    report, fixes = repair_report(draft(
+        severity_score="5",
+        estimated_time="2h",
+        safety_warnings="Wear gloves",
+        recommended_actions=[
+            {"step_order": 0, "instruction": "Isolate car", "action_type": "manual"},
+            {"step_order": 0, "instruction": "Clean sill", "tool_required": 3},
+            "Test door cycle",
+        ],
+    ), [])
+
+    assert report is not None
+    assert report.severity_score == 5
+    assert report.safety_warnings == ["Wear gloves"]
+    assert [s.step_order for s in report.recommended_actions] == [1, 2, 3]
+    assert report.recommended_actions[1].tool_required == "3"
+    assert report.recommended_actions[2].instruction == "Test door cycle"
+    assert set(fixes) == {"stripped_fields", "coerced_types", "renumbered_steps"}
+
+def test_missing_content_cannot_be_repaired():
+    broken = draft()
+    del broken["root_cause_hypothesis"]
+    report, _ = repair_report(broken, [SAFETY_DOC])
+    assert report is None
+
+def test_out_of_range_severity_is_not_clamped():
+    report, _ = repair_report(draft(severity_score="12"), [SAFETY_DOC])
+    assert report is None
+
+# ---------------------------------------------------------
+# TEST 2: Mandated Lockout Warning
+# ---------------------------------------------------------
+
+def test_injects_lockout_warning_from_safety_manual():
+    report, fixes = repair_report(draft(severity_score=9), [DOOR_DOC, SAFETY_DOC])
+
+    assert "injected_lockout_warning" in fixes
+    assert report.safety_warnings[0].startswith("Lock out power")
+    assert "pit stop switch" in report.safety_warnings[0]
+    assert "KONE_Global_Safety_Manual.pdf (Pg 1)" in report.cited_manual_references
+
+def test_lockout_warning_needs_safety_manual_context():
+    report, _ = repair_report(draft(severity_score=9), [DOOR_DOC])
+    assert report is None
+    report, _ = repair_report(draft(severity_score=9), [DOOR_DOC], fetch_safety_docs=lambda: [])
+    assert report is None
+
+def test_safety_manual_is_fetched_when_not_retrieved():
+    fetch = MagicMock(return_value=[SAFETY_DOC])
+    report, fixes = repair_report(draft(severity_score=9), [DOOR_DOC], fetch_safety_docs=fetch)
+
+    assert "injected_lockout_warning" in fixes
+    assert "KONE_Global_Safety_Manual.pdf (Pg 1)" in report.cited_manual_references
+    fetch.assert_called_once()
+
+    # Already retrieved (or not needed): no lookup
+    fetch.reset_mock()
+    repair_report(draft(severity_score=9), [SAFETY_DOC], fetch_safety_docs=fetch)
+    repair_report(draft(severity_score=3), [DOOR_DOC], fetch_safety_docs=fetch)
+    fetch.assert_not_called()
+
+# ---------------------------------------------------------
+# TEST 3: Graph (repair instead of LLM retry)
+# ---------------------------------------------------------
+
+TELEMETRY = TelemetryReading(elevator_id="E1", velocity_m_s=0.0, door_cycles_count=100,
+                             vibration_level_hz=0.1, error_codes=["E-999"])
+
+def test_route_after_validate():
+    assert route_after_validate({"validation_error": "bad"}) == "repair"
+    assert route_after_validate({"validation_error": None}) == END
+
+@pytest.mark.asyncio
+@patch("src.agents.nodes.llm_service")
+@patch("src.agents.nodes.vector_service")
+async def test_graph_repairs_without_llm_retry(mock_vector_service, mock_llm_service):
+    mock_vector_service.aretrieve = AsyncMock(return_value=[SAFETY_DOC])
+    mock_llm_service.adiagnose = AsyncMock(return_value=draft(
+        severity_score=9,
+        recommended_actions=[{"step_order": 3, "instruction": "Isolate", "action_type": "manual"}]
+    ))
+    before = repair_stats.snapshot()
+
+    result = await app_graph.ainvoke({"telemetry": TELEMETRY, "retry_count": 0, "validation_error": None})
+
+    assert result["validation_error"] is None
+    assert result["retry_count"] == 0
+    assert result["repair_count"] == 1
+    assert result["diagnostic_report"].recommended_actions[0].step_order == 1
+    assert mock_llm_service.adiagnose.await_count == 1
+    assert repair_stats.snapshot()["repaired"] == before["repaired"] + 1
+
+@pytest.mark.asyncio
+@patch("src.agents.nodes.llm_service")
+@patch("src.agents.nodes.vector_service")
+async def test_graph_repairs_lockout_when_safety_manual_was_not_retrieved(mock_vector_service, mock_llm_service):
+    # exact_first retrieval returns the tagged door chunk; the safety manual has no tags
+    mock_vector_service.aretrieve = AsyncMock(return_value=[DOOR_DOC])
+    mock_vector_service.fetch_by_source.return_value = [SAFETY_DOC]
+    mock_llm_service.adiagnose = AsyncMock(return_value=draft(severity_score=9))
+
+    result = await app_graph.ainvoke({"telemetry": TELEMETRY, "retry_count": 0, "validation_error": None})
+
+    assert result["validation_error"] is None and result["repair_count"] == 1
+    assert result["diagnostic_report"].safety_warnings[0].startswith("Lock out power")
+    assert mock_llm_service.adiagnose.await_count == 1
+    mock_vector_service.fetch_by_source.assert_called_once_with(["KONE_Global_Safety_Manual.pdf"], limit=1)
+
+def test_unparsable_report_raises_with_the_raw_draft():
+    service = fake_llm_service(MALFORMED)
+    with pytest.raises(DraftParseError) as error:
+        service.diagnose("prompt")
+
+    assert error.value.draft == MALFORMED
+    assert service.usage_totals.stats()["total_tokens"] == 140
+    assert fake_llm_service(draft()).diagnose("prompt").severity_score == 4
+
+@pytest.mark.asyncio
+@patch("src.agents.nodes.vector_service")
+async def test_graph_repairs_a_draft_the_real_parser_rejects(mock_vector_service):
+    mock_vector_service.aretrieve = AsyncMock(return_value=[DOOR_DOC])
+    service = fake_llm_service(MALFORMED)
+    before = repair_stats.snapshot()
+
+    with patch("src.agents.nodes.llm_service", service):
+        result = await app_graph.ainvoke({"telemetry": TELEMETRY, "retry_count": 0, "validation_error": None})
+
+    report = result["diagnostic_report"]
+    assert result["validation_error"] is None and result["repair_count"] == 1
+    assert service.llm.async_client.calls == 1
+    assert report.safety_warnings == ["Wear gloves"]
+    assert [step.step_order for step in report.recommended_actions] == [1, 2, 3]
+    assert report.recommended_actions[1].tool_required == "3"
+    by_fix = repair_stats.snapshot()["by_fix"]
+    for fix in ("stripped_fields", "coerced_types", "renumbered_steps"):
+        assert by_fix.get(fix, 0) == before["by_fix"].get(fix, 0) + 1
+
+@pytest.mark.asyncio
+@patch("src.agents.nodes.llm_service")
+@patch("src.agents.nodes.vector_service")
+async def test_graph_escalates_unrepairable_draft(mock_vector_service, mock_llm_service):
+    mock_vector_service.aretrieve = AsyncMock(return_value=[DOOR_DOC])
+    mock_vector_service.fetch_by_source.return_value = []
+    mock_llm_service.adiagnose = AsyncMock(side_effect=[
+        draft(severity_score=9),                              # No lockout, nothing to ground it
+        draft(severity_score=9, safety_warnings=["Lock out power"]),
+    ])
+    before = repair_stats.snapshot()
+
+    result = await app_graph.ainvoke({"telemetry": TELEMETRY, "retry_count": 0, "validation_error": None})
+
+    assert result["validation_error"] is None
+    assert mock_llm_service.adiagnose.await_count == 2
+    assert repair_stats.snapshot()["escalated"] == before["escalated"] + 1
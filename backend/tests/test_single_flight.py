@@ -0,0 +1,144 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from src.services.single_flight import SingleFlight
+
+# ---------------------------------------------------------
+# TEST 1: Coalescing
+# ---------------------------------------------------------
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_run():
+    flight = SingleFlight()
+    runs = 0
+    release = asyncio.Event()
+
+    async def work():
+        nonlocal runs
+        runs += 1
+        await release.wait()
+        return "report"
+
+    callers = [asyncio.create_task(flight.do("E-302", work)) for _ in range(20)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*callers)
+
+    assert runs == 1
+    assert [r for r, _ in results] == ["report"] * 20
+    assert sum(shared for _, shared in results) == 19
+    assert flight.stats() == {"leaders": 1, "coalesced": 19, "failures": 0, "abandoned": 0, "in_flight": 0}
+
+@pytest.mark.asyncio
+async def test_finished_keys_are_forgotten():
+    flight = SingleFlight()
+
+    async def work():
+        return 1
+
+    await flight.do("k", work)
+    _, shared = await flight.do("k", work)
+    assert shared is False
+    assert flight.stats()["leaders"] == 2
+
+# ---------------------------------------------------------
+# TEST 2: Errors and Cancellation
+# ---------------------------------------------------------
+
+@pytest.mark.asyncio
+async def test_error_reaches_every_waiter():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        raise RuntimeError("LLM unavailable")
+
+    callers = [asyncio.create_task(flight.do("k", work)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    outcomes = await asyncio.gather(*callers, return_exceptions=True)
+
+    assert all(isinstance(o, RuntimeError) for o in outcomes)
+    assert flight.stats()["failures"] == 1
+    assert flight.stats()["in_flight"] == 0
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_work():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        return "report"
+
+    leader = asyncio.create_task(flight.do("k", work))
+    follower = asyncio.create_task(flight.do("k", work))
+    await asyncio.sleep(0)
+
+    leader.cancel()   # e.g. the first HTTP client disconnected
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await follower == ("report", True)
+    assert leader.cancelled()
+    assert flight.stats()["abandoned"] == 0
+
+@pytest.mark.asyncio
+async def test_work_is_cancelled_when_every_caller_leaves():
+    flight = SingleFlight()
+    started, cancelled = asyncio.Event(), asyncio.Event()
+
+    async def work():
+        started.set()
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    caller = asyncio.create_task(flight.do("k", work))
+    await started.wait()
+    caller.cancel()
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+    assert flight.stats()["abandoned"] == 1
+    assert flight.stats()["in_flight"] == 0
+
+# ---------------------------------------------------------
+# TEST 3: DiagnosisService Integration
+# ---------------------------------------------------------
+from src.core.schema import DiagnosticResult, TelemetryReading
+from src.services.diagnosis_service import DiagnosisService
+
+REPORT = DiagnosticResult(
+    fault_summary="Door obstruction", root_cause_hypothesis="Debris", severity_score=4,
+    cited_manual_references=["Door.pdf (Pg 42)"], recommended_actions=[], safety_warnings=[]
+)
+
+@pytest.mark.asyncio
+@patch("src.services.diagnosis_service.app_graph")
+async def test_identical_faults_in_a_bank_run_the_graph_once(mock_graph):
+    release = asyncio.Event()
+
+    async def slow_graph(state):
+        await release.wait()
+        return {"diagnostic_report": REPORT, "validation_error": None}
+    mock_graph.ainvoke.side_effect = slow_graph
+
+    service = DiagnosisService()
+    readings = [
+        TelemetryReading(elevator_id=f"BANK-A-{i}", velocity_m_s=0.0, door_cycles_count=12000,
+                         vibration_level_hz=0.1, error_codes=["E-302"])
+        for i in range(12)
+    ]
+    callers = [asyncio.create_task(service.diagnose(r)) for r in readings]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*callers)
+
+    assert mock_graph.ainvoke.call_count == 1
+    assert all(report == REPORT and not cache_hit for report, cache_hit in results)
+    # Each caller owns its report object
+    assert len({id(report) for report, _ in results}) == 12
+    assert service.flight.stats()["coalesced"] == 11
@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+from datetime import datetime, timedelta
+
+from src.agents.prompts import build_diagnosis_messages
+from src.core.schema import TelemetryReading
+from src.services.diagnosis_cache import telemetry_fingerprint
+from src.services.telemetry_history import READING_DTYPE, TelemetryHistory
+
+START = datetime(2026, 1, 1, 8, 0, 0)
+
+def reading(minutes, vibration=1.0, velocity=1.0, door_cycles=1000, elevator_id="KONE-01"):
+    return TelemetryReading(
+        elevator_id=elevator_id, timestamp=START + timedelta(minutes=minutes),
+        velocity_m_s=velocity, door_cycles_count=door_cycles, vibration_level_hz=vibration
+    )
+
+def feed(history, values, **kwargs):
+    features = None
+    for i, vibration in enumerate(values):
+        features = history.record(reading(i * 10, vibration=vibration, door_cycles=1000 + i * 5, **kwargs))
+    return features
+
+# ---------------------------------------------------------
+# TEST 1: Ring Buffer
+# ---------------------------------------------------------
+
+def test_buffer_keeps_latest_readings_in_order():
+    history = TelemetryHistory(capacity=8, min_readings=2)
+    feed(history, [float(i) for i in range(20)])
+
+    window = history.window("KONE-01")
+    assert window.dtype == READING_DTYPE and READING_DTYPE.itemsize == 20
+    assert list(window["vibration"]) == [float(i) for i in range(12, 20)]
+    assert history.stats()["readings"] == 8
+
+def test_duplicate_and_out_of_order_readings_are_skipped():
+    history = TelemetryHistory(capacity=8, min_readings=2)
+    history.record(reading(10))
+    history.record(reading(10))
+    history.record(reading(5))
+
+    assert history.stats()["appended"] == 1
+    assert history.stats()["skipped"] == 2
+
+def test_least_recently_seen_elevator_is_evicted():
+    history = TelemetryHistory(capacity=4, max_elevators=2)
+    for elevator_id in ("A", "B", "C"):
+        history.record(reading(0, elevator_id=elevator_id))
+
+    assert history.features("A") is None and history.window("A") is None
+    assert history.stats()["elevators"] == 2
+
+# ---------------------------------------------------------
+# TEST 2: Incremental Features
+# ---------------------------------------------------------
+
+def test_incremental_slope_matches_full_fit_after_wrapping():
+    history = TelemetryHistory(capacity=16, min_readings=2)
+    rng = np.random.default_rng(7)
+    values = list(1.0 + 0.05 * np.arange(53) + rng.normal(0, 0.1, 53))
+    features = feed(history, values)
+
+    window = history.window("KONE-01")
+    hours = window["t"].astype(np.float64) / 3600.0
+    expected = np.polyfit(hours, window["vibration"].astype(np.float64), 1)[0]
+    assert features.readings == 16
+    assert features.vibration_slope_per_hour == pytest.approx(expected, rel=1e-4)
+    # 5 door cycles every 10 minutes
+    assert features.door_cycles_per_hour == pytest.approx(30.0)
+
+def test_time_keeps_sub_second_resolution_after_a_year_of_uptime():
+    history = TelemetryHistory(capacity=8, min_readings=2)
+    history.record(reading(0))
+    late = START + timedelta(days=365)
+    # 16 readings: the ring wraps once, which re-bases the offsets after the year-long gap
+    for step in range(15):
+        history.record(TelemetryReading(
+            elevator_id="KONE-01", timestamp=late + timedelta(seconds=step * 0.5),
+            velocity_m_s=1.0, door_cycles_count=1000, vibration_level_hz=1.0 + step
+        ))
+
+    window = history.window("KONE-01")
+    assert np.diff(window["t"]).tolist() == [0.5] * 7
+    # One Hz every half second
+    assert history.features("KONE-01").vibration_slope_per_hour == pytest.approx(7200.0)
+
+def test_door_counter_reset_is_not_a_negative_rate():
+    history = TelemetryHistory(capacity=16, min_readings=2)
+    history.record(reading(0, door_cycles=5000))
+    history.record(reading(60, door_cycles=5060))
+    features = history.record(reading(120, door_cycles=30))   # Counter reset after maintenance
+
+    assert features.door_cycles_per_hour == pytest.approx(30.0)
+
+def test_spike_and_drift_flags():
+    steady = feed(TelemetryHistory(min_readings=5), [2.0, 2.1, 1.9, 2.0, 2.1, 1.9, 2.0, 2.0])
+    spike = feed(TelemetryHistory(min_readings=5), [2.0, 2.1, 1.9, 2.0, 2.1, 1.9, 2.0, 6.0])
+    drift = feed(TelemetryHistory(min_readings=5), [2.0 + 0.3 * i for i in range(10)])
+
+    assert steady.flags() == []
+    assert "vibration_spike" in spike.flags()
+    assert "vibration_rising" in drift.flags()
+
+def test_no_features_before_min_readings():
+    history = TelemetryHistory(min_readings=5)
+    assert feed(history, [1.0] * 4) is None
+    assert history.record(reading(100)).readings == 5
+
+# ---------------------------------------------------------
+# TEST 3: Prompt and Cache Key
+# ---------------------------------------------------------
+
+def test_trend_summary_is_injected_into_prompt():
+    trend = feed(TelemetryHistory(min_readings=5), [2.0 + 0.3 * i for i in range(10)])
+    messages = build_diagnosis_messages({
+        "telemetry": reading(100, vibration=4.7), "trend": trend, "retrieved_docs": [], "validation_error": None
+    })
+
+    assert "RECENT TREND" in messages[1].content
+    assert "vibration_rising" in messages[1].content
+    assert "RECENT TREND" not in build_diagnosis_messages({"telemetry": reading(0), "retrieved_docs": []})[1].content
+
+def test_trend_flags_separate_fingerprints():
+    snapshot = reading(0, vibration=4.2)
+    assert telemetry_fingerprint(snapshot, ()) == telemetry_fingerprint(snapshot)
+    assert telemetry_fingerprint(snapshot, ["vibration_rising"]) != telemetry_fingerprint(snapshot)
@@ -0,0 +1,242 @@
+import asyncio
+import os
+import socket
+import uuid
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from src.services.telemetry_monitor import TelemetryMonitor
+from src.services.telemetry_sources import MQTTTelemetrySource, QueueTelemetrySource
+from src.core.schema import DiagnosticResult, TelemetryReading
+
+def reading(elevator_id="KONE-01", vibration=1.0, velocity=1.0, codes=None):
+    return TelemetryReading(
+        elevator_id=elevator_id, velocity_m_s=velocity, door_cycles_count=1000,
+        vibration_level_hz=vibration, error_codes=codes or []
+    )
+
+def report():
+    return DiagnosticResult(
+        fault_summary="Roller wear", root_cause_hypothesis="Guide rail", severity_score=5,
+        cited_manual_references=[], recommended_actions=[], safety_warnings=[]
+    )
+
+def make_monitor(clock, debounce=60.0, source=None, max_elevators=50000):
+    return TelemetryMonitor(
+        diagnose=AsyncMock(return_value=report()), source=source, window_size=10,
+        debounce_seconds=debounce, vibration_threshold_hz=4.0, velocity_threshold_m_s=2.5,
+        clock=clock, max_elevators=max_elevators
+    )
+
+# ---------------------------------------------------------
+# TEST 1: Trigger Logic
+# ---------------------------------------------------------
+
+@pytest.mark.asyncio
+async def test_only_threshold_crossings_and_new_codes_trigger():
+    monitor = make_monitor(clock=lambda: 0.0, debounce=0.0)
+
+    assert await monitor.ingest(reading(vibration=1.0)) is None
+    assert await monitor.ingest(reading(vibration=4.5)) == "vibration_threshold"
+    # Still above threshold: not a new crossing
+    assert await monitor.ingest(reading(vibration=4.6)) is None
+    assert await monitor.ingest(reading(vibration=4.6, codes=["E-302"])) == "new_error_code"
+    # Code already in the window
+    assert await monitor.ingest(reading(vibration=4.6, codes=["E-302"])) is None
+    assert await monitor.ingest(reading(vibration=1.0, velocity=3.0, codes=["E-302"])) == "velocity_threshold"
+
+    await monitor.drain()
+    assert monitor.diagnose.await_count == 3
+    assert monitor.windows["KONE-01"].last_result.fault_summary == "Roller wear"
+
+# ---------------------------------------------------------
+# TEST 2: Per-Elevator Debounce
+# ---------------------------------------------------------
+
+@pytest.mark.asyncio
+async def test_flapping_sensor_is_debounced_to_one_trailing_run():
+    """
+    Scenario: Vibration flaps across the threshold 5 times within the debounce window.
+    Expectation: 1 immediate diagnosis + 1 trailing diagnosis of the latest reading.
+    """
+    monitor = make_monitor(clock=asyncio.get_running_loop().time, debounce=0.2)
+
+    for i in range(5):
+        await monitor.ingest(reading(vibration=1.0))
+        await monitor.ingest(reading(vibration=4.0 + i))
+    await monitor.drain()
+    assert monitor.diagnose.await_count == 1
+    assert monitor.stats.debounced == 4
+
+    await monitor.windows["KONE-01"].deferred
+    assert monitor.diagnose.await_count == 2
+    assert monitor.diagnose.await_args.args[0].vibration_level_hz == 8.0
+
+@pytest.mark.asyncio
+async def test_debounce_is_per_elevator():
+    monitor = make_monitor(clock=lambda: 0.0, debounce=60.0)
+
+    await monitor.ingest(reading(elevator_id="A", codes=["E-302"]))
+    await monitor.ingest(reading(elevator_id="B", codes=["E-302"]))
+    await monitor.drain()
+
+    assert monitor.diagnose.await_count == 2
+
+@pytest.mark.asyncio
+async def test_least_recently_seen_window_is_dropped():
+    monitor = make_monitor(clock=lambda: 0.0, max_elevators=2)
+
+    for elevator_id in ("A", "B", "A", "C"):
+        await monitor.ingest(reading(elevator_id=elevator_id))
+
+    assert list(monitor.windows) == ["A", "C"]
+    assert monitor.stats.evicted_elevators == 1
+
+# ---------------------------------------------------------
+# TEST 3: Queue Source
+# ---------------------------------------------------------
+
+@pytest.mark.asyncio
+async def test_monitor_consumes_queue_source():
+    source = QueueTelemetrySource()
+    monitor = make_monitor(clock=lambda: 0.0, source=source)
+    monitor.start()
+
+    await source.publish(reading(codes=["W-104"]))
+    await source.publish(reading(codes=["W-104"]))
+    while monitor.stats.readings < 2:
+        await asyncio.sleep(0)
+    await monitor.drain()
+    await monitor.stop()
+
+    assert monitor.stats.triggers == 1
+    assert monitor.diagnose.await_count == 1
+
+def broker_address():
+    """(host, port) of a reachable MQTT broker (TEST_MQTT_HOST/PORT, default localhost:1883), else None."""
+    host = os.environ.get("TEST_MQTT_HOST", "localhost")
+    port = int(os.environ.get("TEST_MQTT_PORT", "1883"))
+    try:
+        socket.create_connection((host, port), timeout=0.5).close()
+    except OSError:
+        return None
+    return host, port
+
+async def wait_until(condition, timeout=10.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.05)
+
+class FakeMQTTClient:
+    """
+    aiomqtt.Client stand-in replaying one scripted session per connection: an exception
+    (connection refused) or a list of payloads, after which the connection drops.
+    The last session stays open once its payloads are delivered.
+    """
+    sessions = []
+
+    def __init__(self, hostname, port):
+        self.session = FakeMQTTClient.sessions.pop(0)
+        self.last = not FakeMQTTClient.sessions
+
+    async def __aenter__(self):
+        if isinstance(self.session, Exception):
+            raise self.session
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def subscribe(self, topic):
+        pass
+
+    @property
+    async def messages(self):
+        import aiomqtt
+        for payload in self.session:
+            yield SimpleNamespace(topic="flowguard/telemetry/KONE-01", payload=payload)
+        if self.last:
+            await asyncio.Event().wait()
+        raise aiomqtt.MqttError("Disconnected during message iteration")
+
+@pytest.mark.asyncio
+async def test_mqtt_source_reconnects_after_refused_and_dropped_connections(monkeypatch):
+    aiomqtt = pytest.importorskip("aiomqtt")
+    monkeypatch.setattr(aiomqtt, "Client", FakeMQTTClient)
+    monkeypatch.setattr(FakeMQTTClient, "sessions", [
+        aiomqtt.MqttError("Connection refused"),          # Broker not up yet
+        [reading(codes=["E-302"]).model_dump_json()],      # Then a broker restart
+        [reading(codes=["E-302", "W-104"]).model_dump_json()],
+    ])
+    source = MQTTTelemetrySource("mqtt", 1883, "flowguard/telemetry/#",
+                                 reconnect_min_seconds=0.01, reconnect_max_seconds=0.02)
+    monitor = make_monitor(clock=lambda: 0.0, debounce=0.0, source=source)
+    monitor.start()
+
+    await wait_until(lambda: monitor.stats.readings == 2)
+    await monitor.drain()
+    await monitor.stop()
+
+    assert source.reconnects == 2
+    assert monitor.stats.triggers == 2 and monitor.diagnose.await_count == 2
+
+@pytest.mark.asyncio
+async def test_monitor_consumes_mqtt_broker():
+    """Needs a broker, e.g. `docker compose up mqtt`; skipped when none is reachable."""
+    aiomqtt = pytest.importorskip("aiomqtt")
+    address = broker_address()
+    if address is None:
+        pytest.skip("No MQTT broker reachable (set TEST_MQTT_HOST/TEST_MQTT_PORT).")
+    host, port = address
+    topic = f"flowguard-test/{uuid.uuid4().hex}"
+    monitor = make_monitor(clock=lambda: 0.0, debounce=0.0,
+                           source=MQTTTelemetrySource(host, port, f"{topic}/#"))
+    monitor.start()
+
+    async with aiomqtt.Client(hostname=host, port=port) as client:
+        # The source subscribes in the background: publish until the first reading arrives
+        async def publish_until_received():
+            while monitor.stats.readings == 0:
+                await client.publish(f"{topic}/KONE-01", reading(codes=["E-302"]).model_dump_json())
+                await asyncio.sleep(0.1)
+        await asyncio.wait_for(publish_until_received(), timeout=10.0)
+        await client.publish(f"{topic}/KONE-01", b"not a reading")
+        await client.publish(f"{topic}/KONE-01", reading(codes=["E-302", "W-104"]).model_dump_json())
+        await wait_until(lambda: monitor.stats.triggers == 2)
+
+    await monitor.drain()
+    await monitor.stop()
+    assert monitor.diagnose.await_count == 2
+
+# ---------------------------------------------------------
+# TEST 4: Recording
+# ---------------------------------------------------------
+
+@pytest.mark.asyncio
+async def test_triggered_diagnosis_records_the_reading_once(tmp_path, monkeypatch):
+    from src.services import diagnosis_service as diagnosis_module
+    from src.services.telemetry_archive import TelemetryArchive
+    from src.services.telemetry_history import TelemetryHistory
+    from src.services.telemetry_monitor import _diagnose_with_service
+
+    archive = TelemetryArchive(str(tmp_path / "archive"))
+    history = TelemetryHistory(capacity=8, min_readings=2)
+    monkeypatch.setattr(diagnosis_module, "telemetry_archive", archive)
+    monkeypatch.setattr(diagnosis_module, "telemetry_history", history)
+    monkeypatch.setattr(diagnosis_module.settings, "ARCHIVE_ENABLED", True)
+    monkeypatch.setattr(diagnosis_module.settings, "HISTORY_ENABLED", True)
+    diagnose = AsyncMock(return_value=(report(), False))
+    monkeypatch.setattr(diagnosis_module.diagnosis_service, "_diagnose", diagnose)
+    monitor = TelemetryMonitor(diagnose=_diagnose_with_service, history=history, archive=archive,
+                               vibration_threshold_hz=4.0, debounce_seconds=0.0)
+
+    assert await monitor.ingest(reading(vibration=1.0)) is None
+    assert await monitor.ingest(reading(vibration=4.5)) == "vibration_threshold"
+    await monitor.drain()
+
+    assert monitor.stats.diagnoses == 1
+    assert archive.stats()["appended"] == 2
+    assert history.stats()["appended"] == 2 and history.stats()["skipped"] == 0
+    # The diagnosis still sees the trend including the reading the monitor recorded
+    assert diagnose.call_args.args[2].readings == 2
@@ -0,0 +1,84 @@
+import time
+import pytest
+from unittest.mock import AsyncMock, patch
+from src.services.triage_engine import TriageEngine
+from src.core.config import get_settings
+from src.core.schema import ManualChunk, TelemetryReading
+
+settings = get_settings()
+
+DOOR_DOC = ManualChunk(chunk_id="1", content="E-302 sill groove", source_doc="KONE_Door_Systems_Maintenance_2024.pdf",
+                       page_number=42, related_error_codes=["E-302"])
+RIDE_DOC = ManualChunk(chunk_id="2", content="> 4.0 Hz rollers", source_doc="KONE_Ride_Comfort_Standards.pdf",
+                       page_number=12, related_error_codes=["W-104", "VIB-HIGH"])
+
+def reading(codes, vibration=1.0):
+    return TelemetryReading(elevator_id="E1", velocity_m_s=1.0, door_cycles_count=1000,
+                            vibration_level_hz=vibration, error_codes=codes)
+
+@pytest.fixture(scope="module")
+def engine():
+    return TriageEngine.from_file(settings.TRIAGE_RULES_PATH, min_confidence=0.9)
+
+# ---------------------------------------------------------
+# TEST 1: Rule Matching
+# ---------------------------------------------------------
+
+def test_known_faults_match_rules(engine):
+    matches = engine.match_batch([
+        reading(["E-302"]),               # Door rule
+        reading([], vibration=4.5),       # Vibration rule (no codes)
+        reading(["W-104"], vibration=4.5),
+        reading(["E-302"], vibration=4.5),  # E-302 + high vibration: not explained by one rule
+        reading(["E-501"]),               # Unknown code
+        reading([]),                      # Nothing wrong
+    ])
+    assert [m.rule_id if m else None for m in matches] == [
+        "door-sill-obstruction", "guide-rail-roller-wear", "guide-rail-roller-wear", None, None, None
+    ]
+
+def test_low_confidence_rules_route_to_llm():
+    strict = TriageEngine.from_file(settings.TRIAGE_RULES_PATH, min_confidence=0.99)
+    assert strict.match_batch([reading(["E-302"])]) == [None]
+
+def test_rule_report_cites_retrieved_manuals(engine):
+    rule_id, report = engine.triage(reading(["E-302"]), [DOOR_DOC, RIDE_DOC])
+
+    assert rule_id == "door-sill-obstruction"
+    assert report.cited_manual_references == ["KONE_Door_Systems_Maintenance_2024.pdf (Pg 42)"]
+    assert any("lock out" in w.lower() for w in report.safety_warnings)
+
+def test_rule_without_supporting_manual_defers_to_llm(engine):
+    assert engine.triage(reading(["E-302"]), [RIDE_DOC]) is None
+
+def test_batch_triage_is_fast(engine):
+    """Thousands of readings are triaged in one vectorized pass."""
+    readings = [reading(["E-302"] if i % 2 else [], vibration=(i % 10) * 0.6) for i in range(5000)]
+    started = time.perf_counter()
+    matches = engine.match_batch(readings)
+    elapsed = time.perf_counter() - started
+
+    assert len(matches) == 5000
+    assert elapsed < 0.5
+
+# ---------------------------------------------------------
+# TEST 2: Graph Branch (no LLM for known faults)
+# ---------------------------------------------------------
+from src.agents.graph import app_graph, route_after_triage
+
+def test_route_after_triage():
+    assert route_after_triage({"triage_rule": "door-sill-obstruction"}) == "validate"
+    assert route_after_triage({"triage_rule": None}) == "diagnose"
+
+@pytest.mark.asyncio
+@patch("src.agents.nodes.llm_service")
+@patch("src.agents.nodes.vector_service")
+async def test_graph_skips_llm_for_matched_rule(mock_vector_service, mock_llm_service):
+    mock_vector_service.aretrieve = AsyncMock(return_value=[DOOR_DOC])
+    mock_llm_service.adiagnose = AsyncMock()
+
+    result = await app_graph.ainvoke({"telemetry": reading(["E-302"]), "retry_count": 0, "validation_error": None})
+
+    assert result["triage_rule"] == "door-sill-obstruction"
+    assert result["validation_error"] is None
+    mock_llm_service.adiagnose.assert_not_called()
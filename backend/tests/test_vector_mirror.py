@@ -0,0 +1,153 @@
+import os
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+from src.core.schema import ManualChunk
+from src.services.vector_mirror import VectorMirror
+from src.services.vector_service import VectorService, settings
+
+COLLECTION = "kone_manuals"
+
+# ---------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    def __call__(self):
+        return self.now
+
+def make_collection(n=50, dim=8, seed=0):
+    client = QdrantClient(":memory:")
+    client.create_collection(COLLECTION, vectors_config=models.VectorParams(size=dim, distance=models.Distance.COSINE))
+    rng = np.random.default_rng(seed)
+    client.upsert(COLLECTION, points=[
+        models.PointStruct(id=i, vector=rng.normal(size=dim).tolist(), payload={"indexed_at": 1.0 + i, "n": i})
+        for i in range(n)
+    ])
+    return client, rng
+
+# ---------------------------------------------------------
+# TEST 1: Search Parity with Qdrant
+# ---------------------------------------------------------
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_mirror_matches_qdrant_top_k(tmp_path, dtype):
+    client, rng = make_collection()
+    mirror = VectorMirror(str(tmp_path), dtype=dtype)
+    assert mirror.refresh(client, COLLECTION) == "rebuilt"
+
+    queries = rng.normal(size=(5, 8)).tolist()
+    mirrored = mirror.search_batch(queries, limit=5)
+
+    for query, hits in zip(queries, mirrored):
+        expected = client.search(COLLECTION, query_vector=query, limit=5)
+        assert [str(h.id) for h in hits] == [str(h.id) for h in expected]
+        assert np.allclose([h.score for h in hits], [h.score for h in expected], atol=1e-2)
+        assert hits[0].payload["n"] == expected[0].payload["n"]
+
+def test_mirror_is_memory_mapped_and_shared_between_workers(tmp_path):
+    client, _ = make_collection()
+    VectorMirror(str(tmp_path)).refresh(client, COLLECTION)
+
+    # A second worker picks up the written generation without a full scroll
+    worker = VectorMirror(str(tmp_path))
+    assert worker.refresh(client, COLLECTION) == "unchanged"
+    assert isinstance(worker._corpus.matrix, np.memmap)
+    assert worker.full_rebuilds == 0
+
+# ---------------------------------------------------------
+# TEST 2: Incremental Refresh
+# ---------------------------------------------------------
+
+def test_refresh_picks_up_new_and_deleted_points(tmp_path):
+    client, _ = make_collection(n=10)
+    mirror = VectorMirror(str(tmp_path))
+    mirror.refresh(client, COLLECTION)
+
+    target = [0.0] * 7 + [1.0]
+    client.upsert(COLLECTION, points=[models.PointStruct(id=99, vector=target, payload={"indexed_at": 500.0, "n": 99})])
+    assert mirror.refresh(client, COLLECTION) == "incremental"
+    assert mirror.search_batch([target], limit=1)[0][0].id == "99"
+    assert mirror.full_rebuilds == 1
+
+    assert mirror.refresh(client, COLLECTION) == "unchanged"
+
+    client.delete(COLLECTION, points_selector=models.PointIdsList(points=[99]))
+    assert mirror.refresh(client, COLLECTION) == "rebuilt"
+    assert mirror.stats()["points"] == 10
+
+def test_emptied_collection_is_dropped_by_every_worker(tmp_path):
+    client, _ = make_collection(n=5)
+    writer, reader = VectorMirror(str(tmp_path)), VectorMirror(str(tmp_path))
+    writer.refresh(client, COLLECTION)
+    reader.refresh(client, COLLECTION)
+    assert reader.search_batch([[1.0] * 8], limit=3) is not None
+
+    client.delete(COLLECTION, points_selector=models.PointIdsList(points=list(range(5))))
+    assert writer.refresh(client, COLLECTION) == "rebuilt"
+    assert not any(name.endswith(".npy") for name in os.listdir(tmp_path))
+
+    reader.refresh(client, COLLECTION)
+    assert reader.generation == writer.generation
+    assert reader.search_batch([[1.0] * 8], limit=3) is None
+    assert reader.stats()["points"] == 0
+
+def test_search_reads_one_generation(tmp_path):
+    client, _ = make_collection(n=10)
+    mirror = VectorMirror(str(tmp_path))
+    mirror.refresh(client, COLLECTION)
+    old = mirror._corpus
+
+    # A rebuild that shrinks the corpus replaces matrix, ids and payloads in one step
+    client.delete(COLLECTION, points_selector=models.PointIdsList(points=list(range(5))))
+    mirror.refresh(client, COLLECTION)
+    assert mirror._corpus is not old
+    assert mirror._corpus.matrix.shape[0] == len(mirror._corpus.ids) == len(mirror._corpus.payloads) == 5
+    hits = mirror.search_batch([[1.0] * 8], limit=10)[0]
+    assert len(hits) == 5 and {h.payload["n"] for h in hits} == set(range(5, 10))
+
+# ---------------------------------------------------------
+# TEST 3: Fallback to Qdrant
+# ---------------------------------------------------------
+
+def test_stale_or_missing_mirror_returns_none(tmp_path):
+    clock = FakeClock()
+    mirror = VectorMirror(str(tmp_path), max_staleness_seconds=60, clock=clock)
+    assert mirror.search_batch([[1.0] * 8], limit=3) is None
+
+    client, _ = make_collection()
+    mirror.refresh(client, COLLECTION)
+    assert mirror.search_batch([[1.0] * 8], limit=3) is not None
+
+    clock.now += 61
+    assert mirror.search_batch([[1.0] * 8], limit=3) is None
+    assert mirror.search_batch([[1.0] * 3], limit=3) is None   # Dimension mismatch
+    assert mirror.stats()["fallbacks"] == 3
+
+def test_vector_service_serves_dense_search_from_mirror(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "EMBEDDING_PROVIDER", "hashing")
+    monkeypatch.setattr(settings, "EMBEDDING_DIMENSION", 64)
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_PATH", "")
+    monkeypatch.setattr(settings, "VECTOR_MIRROR_ENABLED", True)
+    monkeypatch.setattr(settings, "VECTOR_MIRROR_PATH", str(tmp_path))
+    service = VectorService()
+    service.client = QdrantClient(":memory:")
+
+    service.upsert_manuals([
+        ManualChunk(chunk_id="1", content="Error E-302 indicates a door obstruction.",
+                    source_doc="Door.pdf", page_number=42, related_error_codes=["E-302"]),
+        ManualChunk(chunk_id="2", content="High vibration suggests guide rail roller wear.",
+                    source_doc="Ride.pdf", page_number=12, related_error_codes=["W-104"]),
+    ])
+    assert service.mirror.stats()["points"] == 2
+
+    real_client = service.client
+    service.client = MagicMock(wraps=real_client)
+    docs = service.search_batch(["E-302 door"], limit_per_query=1)
+
+    assert docs[0].source_doc == "Door.pdf"
+    service.client.search_batch.assert_not_called()
@@ -0,0 +1,231 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.http import models
+from src.services.vector_service import VectorService, settings
+from src.core.schema import ManualChunk
+from src.services.embedding_cache import EmbeddingCache
+
+# ---------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------
+
+def make_service():
+    """Builds a VectorService with mocked Qdrant and embedding clients."""
+    service = VectorService()
+    service.client = MagicMock()
+    service.client.get_collections.return_value.collections = []
+    service.embeddings = MagicMock()
+    service.embeddings.embed_documents.side_effect = lambda texts: [[0.1, 0.2] for _ in texts]
+    return service
+
+def make_chunks(n):
+    return [
+        ManualChunk(chunk_id=str(i), content=f"Chunk {i}", source_doc="Doc", page_number=i)
+        for i in range(n)
+    ]
+
+# ---------------------------------------------------------
+# TEST 1: Batched Ingestion
+# ---------------------------------------------------------
+
+def test_upsert_manuals_batches_embeddings_and_upserts(monkeypatch):
+    """
+    Scenario: 10 chunks with embed batch 4 and upsert batch 3.
+    Expectation: 3 embed_documents calls, 4 bounded upserts, no per-chunk embed_query.
+    """
+    monkeypatch.setattr(settings, "EMBEDDING_BATCH_SIZE", 4)
+    monkeypatch.setattr(settings, "EMBEDDING_MAX_CONCURRENCY", 2)
+    monkeypatch.setattr(settings, "UPSERT_BATCH_SIZE", 3)
+    monkeypatch.setattr(settings, "UPSERT_MAX_RETRIES", 3)
+    service = make_service()
+
+    stats = service.upsert_manuals(make_chunks(10))
+
+    assert service.embeddings.embed_documents.call_count == 3
+    service.embeddings.embed_query.assert_not_called()
+    sizes = [len(c.kwargs["points"]) for c in service.client.upsert.call_args_list]
+    assert sizes == [3, 3, 3, 1]
+    assert stats["upserted"] == 10
+    assert stats["failed"] == 0
+    assert "chunks_per_second" in stats
+
+def test_upsert_manuals_retries_failed_chunk(monkeypatch):
+    """
+    Scenario: The first upsert request fails once.
+    Expectation: Only that chunk is retried and nothing is lost.
+    """
+    monkeypatch.setattr(settings, "EMBEDDING_BATCH_SIZE", 10)
+    monkeypatch.setattr(settings, "EMBEDDING_MAX_CONCURRENCY", 1)
+    monkeypatch.setattr(settings, "UPSERT_BATCH_SIZE", 5)
+    monkeypatch.setattr(settings, "UPSERT_MAX_RETRIES", 3)
+    monkeypatch.setattr(settings, "UPSERT_RETRY_BACKOFF_SECONDS", 0)
+    service = make_service()
+    service.client.upsert.side_effect = [ConnectionError("boom"), None, None]
+
+    stats = service.upsert_manuals(make_chunks(10))
+
+    assert service.client.upsert.call_count == 3
+    assert stats["upserted"] == 10
+    assert stats["failed"] == 0
+
+def test_upsert_manuals_reports_exhausted_chunk(monkeypatch):
+    """
+    Scenario: One upsert chunk fails on every attempt.
+    Expectation: The other chunk still lands and the failure is reported.
+    """
+    monkeypatch.setattr(settings, "EMBEDDING_BATCH_SIZE", 10)
+    monkeypatch.setattr(settings, "EMBEDDING_MAX_CONCURRENCY", 1)
+    monkeypatch.setattr(settings, "UPSERT_BATCH_SIZE", 5)
+    monkeypatch.setattr(settings, "UPSERT_MAX_RETRIES", 2)
+    monkeypatch.setattr(settings, "UPSERT_RETRY_BACKOFF_SECONDS", 0)
+    service = make_service()
+    service.client.upsert.side_effect = [ConnectionError("boom"), ConnectionError("boom"), None]
+
+    stats = service.upsert_manuals(make_chunks(10))
+
+    assert stats["upserted"] == 5
+    assert stats["failed"] == 5
+
+# ---------------------------------------------------------
+# TEST 2: Single-Round-Trip Multi-Query Retrieval
+# ---------------------------------------------------------
+def make_memory_service():
+    """VectorService backed by an in-memory Qdrant with 3 orthogonal 'manual' vectors."""
+    service = VectorService()
+    service.client = QdrantClient(":memory:")
+    service.client.create_collection(
+        collection_name=service.collection_name,
+        vectors_config=models.VectorParams(size=3, distance=models.Distance.COSINE)
+    )
+    service.client.upsert(
+        collection_name=service.collection_name,
+        points=[
+            models.PointStruct(id=i, vector=vec, payload={
+                "content": f"Manual {i}", "source_doc": "Doc", "page_number": i,
+                "related_error_codes": []
+            })
+            for i, vec in enumerate([[1, 0, 0], [0, 1, 0], [0, 0, 1]])
+        ]
+    )
+    query_vectors = {"E-302": [1, 0.1, 0], "W-104": [0, 1, 0.2]}
+    service.embeddings = MagicMock()
+    service.embeddings.embed_documents.side_effect = lambda texts: [query_vectors[t] for t in texts]
+    service.query_cache = EmbeddingCache(model_name="test")
+    return service
+
+def test_search_batch_single_embedding_call_and_merge():
+    """
+    Scenario: Two codes (one duplicated) searched with 2 hits each.
+    Expectation: One embed call for the unique codes, deduplicated chunks ranked by score.
+    """
+    service = make_memory_service()
+
+    docs = service.search_batch(["E-302", "W-104", "E-302"], limit_per_query=2, limit=3)
+
+    service.embeddings.embed_documents.assert_called_once_with(["E-302", "W-104"])
+    ids = [d.chunk_id for d in docs]
+    assert len(ids) == len(set(ids)) == 3
+    assert ids[:2] == ["0", "1"]  # Best matches first
+    assert docs[0].score >= docs[1].score >= docs[2].score
+
+def test_search_batch_uses_query_cache():
+    service = make_memory_service()
+    service.search_batch(["E-302"])
+    service.search_batch(["E-302", "W-104"])
+
+    # Second call only embeds the code it has not seen before
+    assert service.embeddings.embed_documents.call_args_list[1].args[0] == ["W-104"]
+
+@pytest.mark.asyncio
+async def test_asearch_batch_matches_sync_results():
+    """
+    Scenario: The async path runs against an in-memory AsyncQdrantClient.
+    Expectation: Same ranking as search_batch, using aembed_documents.
+    """
+    service = make_memory_service()
+    service.async_client = AsyncQdrantClient(":memory:")
+    await service.async_client.create_collection(
+        collection_name=service.collection_name,
+        vectors_config=models.VectorParams(size=3, distance=models.Distance.COSINE)
+    )
+    points = service.client.scroll(service.collection_name, with_vectors=True)[0]
+    await service.async_client.upsert(
+        collection_name=service.collection_name,
+        points=[models.PointStruct(id=p.id, vector=p.vector, payload=p.payload) for p in points]
+    )
+    service.embeddings.aembed_documents = AsyncMock(
+        side_effect=lambda texts: service.embeddings.embed_documents(texts)
+    )
+
+    docs = await service.asearch_batch(["E-302", "W-104"], limit_per_query=2, limit=3)
+
+    service.embeddings.aembed_documents.assert_awaited_once()
+    assert [d.chunk_id for d in docs][:2] == ["0", "1"]
+
+# ---------------------------------------------------------
+# TEST 3: Exact Error-Code Fast Path
+# ---------------------------------------------------------
+
+def test_ensure_collection_creates_error_code_index():
+    service = make_service()
+    service.client.get_collection.return_value.payload_schema = {}
+
+    service.ensure_collection_exists()
+
+    service.client.create_payload_index.assert_called_once()
+    assert service.client.create_payload_index.call_args.kwargs["field_name"] == "related_error_codes"
+    assert service.client.create_payload_index.call_args.kwargs["field_schema"] == models.PayloadSchemaType.KEYWORD
+
+def test_ensure_collection_keeps_existing_index():
+    service = make_service()
+    service.client.get_collection.return_value.payload_schema = {"related_error_codes": object()}
+
+    service.ensure_collection_exists()
+
+    service.client.create_payload_index.assert_not_called()
+
+def tag_point(service, point_id, codes):
+    service.client.set_payload(
+        collection_name=service.collection_name,
+        payload={"related_error_codes": codes},
+        points=[point_id]
+    )
+
+def test_retrieve_exact_first_skips_embedding_for_tagged_codes(monkeypatch):
+    """
+    Scenario: E-302 has a tagged chunk, W-104 does not.
+    Expectation: Only W-104 is embedded; the tagged chunk ranks first.
+    """
+    monkeypatch.setattr(settings, "RETRIEVAL_MODE", "exact_first")
+    monkeypatch.setattr(settings, "RETRIEVAL_MIN_TAGGED_HITS", 1)
+    service = make_memory_service()
+    tag_point(service, 2, ["E-302"])
+
+    docs = service.retrieve(["E-302", "W-104"], limit_per_query=1, limit=5)
+
+    service.embeddings.embed_documents.assert_called_once_with(["W-104"])
+    assert docs[0].chunk_id == "2"
+    assert docs[0].score == 1.0
+    assert "1" in [d.chunk_id for d in docs]
+
+def test_retrieve_exact_first_no_embedding_when_all_tagged(monkeypatch):
+    monkeypatch.setattr(settings, "RETRIEVAL_MODE", "exact_first")
+    monkeypatch.setattr(settings, "RETRIEVAL_MIN_TAGGED_HITS", 1)
+    service = make_memory_service()
+    tag_point(service, 0, ["E-302"])
+
+    docs = service.retrieve(["E-302"], limit_per_query=2, limit=5)
+
+    service.embeddings.embed_documents.assert_not_called()
+    assert [d.chunk_id for d in docs] == ["0"]
+
+def test_retrieve_hybrid_mixes_in_dense(monkeypatch):
+    monkeypatch.setattr(settings, "RETRIEVAL_MODE", "hybrid")
+    service = make_memory_service()
+    tag_point(service, 2, ["E-302"])
+
+    docs = service.retrieve(["E-302"], limit_per_query=1, limit=5)
+
+    service.embeddings.embed_documents.assert_called_once_with(["E-302"])
+    assert [d.chunk_id for d in docs] == ["2", "0"]
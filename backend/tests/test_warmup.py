@@ -0,0 +1,103 @@
+import threading
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from httpx import AsyncClient, ASGITransport
+
+from src.core.config import Settings
+from src.core.lazy import Lazy, is_built, resolve
+from src.main import app
+from src.services import warmup
+from src.services.warmup import Readiness, warm_up
+
+class Service:
+    builds = 0
+    def __init__(self):
+        Service.builds += 1
+        self.client = "real"
+
+@pytest.fixture
+def services(monkeypatch):
+    """Warmup dependencies replaced by mocks (no Qdrant, no OpenAI)."""
+    vector = MagicMock()
+    vector.async_client.get_collections = AsyncMock()
+    monkeypatch.setattr(warmup, "vector_service", vector)
+    monkeypatch.setattr(warmup, "llm_service", MagicMock())
+    monkeypatch.setattr(warmup, "app_graph", MagicMock())
+    monkeypatch.setattr(warmup.settings, "WARMUP_RETRY_SECONDS", 0)
+    monkeypatch.setattr(warmup.settings, "WARMUP_ERROR_CODES", ["X-999"])
+    return vector
+
+# ---------------------------------------------------------
+# TEST 1: Lazy Singletons
+# ---------------------------------------------------------
+
+def test_lazy_builds_once_on_first_use():
+    Service.builds = 0
+    lazy = Lazy(Service)
+    assert not is_built(lazy) and Service.builds == 0
+
+    threads = [threading.Thread(target=lambda: lazy.client) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert Service.builds == 1 and is_built(lazy)
+    assert isinstance(resolve(lazy), Service)
+
+def test_lazy_forwards_attribute_writes(monkeypatch):
+    lazy = Lazy(Service)
+    monkeypatch.setattr(lazy, "client", "stub")
+    assert resolve(lazy).client == "stub"
+    monkeypatch.undo()
+    assert lazy.client == "real"
+
+def test_openai_key_is_optional_at_import(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    assert Settings(_env_file=None).OPENAI_API_KEY is None
+
+# ---------------------------------------------------------
+# TEST 2: Warmup and Readiness
+# ---------------------------------------------------------
+
+@pytest.mark.asyncio
+async def test_warmup_connects_and_embeds_hot_codes(services):
+    readiness = Readiness()
+    await warm_up(readiness)
+
+    assert readiness.ready
+    services.ensure_collection_exists.assert_called_once()
+    codes = services.embed_queries.call_args.args[0]
+    assert "E-302" in codes and codes[-1] == "X-999"   # Triage rule codes + configured codes
+    assert readiness.snapshot()["steps"]["hot_error_codes"]["codes"] == len(codes)
+
+@pytest.mark.asyncio
+async def test_required_step_is_retried_until_qdrant_is_up(services):
+    services.ensure_collection_exists.side_effect = [ConnectionError("qdrant starting"), None]
+    readiness = Readiness()
+    await warm_up(readiness)
+
+    assert readiness.ready
+    assert services.ensure_collection_exists.call_count == 2
+
+@pytest.mark.asyncio
+async def test_embedding_failure_does_not_block_readiness(services):
+    services.embed_queries.side_effect = RuntimeError("rate limited")
+    readiness = Readiness()
+    await warm_up(readiness)
+
+    assert readiness.ready
+    assert readiness.steps["hot_error_codes"]["ok"] is False
+
+@pytest.mark.asyncio
+async def test_ready_probe_flips_after_warmup(services, monkeypatch):
+    readiness = Readiness()
+    monkeypatch.setattr("src.main.readiness", readiness)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        before = await ac.get("/ready")
+        health = await ac.get("/health")
+        await warm_up(readiness)
+        after = await ac.get("/ready")
+
+    assert before.status_code == 503 and health.status_code == 200
+    assert after.status_code == 200 and after.json()["ready"] is True